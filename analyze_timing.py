@@ -1,74 +1,282 @@
 #!/usr/bin/env python3
-import json
-import statistics
+"""
+Timing Analysis for Answer Outputs
+Streams one or more answer files (JSONL, optionally .gz/.bz2/.xz) into NumPy arrays and
+reports the time between consecutive answers - statistics, percentiles, a histogram of
+interval ranges and the extremes - overall and per backend, character and question category.
+"""
+
+import os
+import time
+from collections import deque
 from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from clean_data import read_chunks
+from planner import record_backend
+from serialization import JSONDecodeError, loads
+
+GROUP_FIELDS = ("backend", "character", "category")
+
+PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+# Interval ranges in seconds
+RANGES = [
+    (0, 30, "0-30 seconds"),
+    (30, 60, "30-60 seconds"),
+    (60, 120, "1-2 minutes"),
+    (120, 300, "2-5 minutes"),
+    (300, 600, "5-10 minutes"),
+    (600, float('inf'), "10+ minutes")
+]
 
-def analyze_timing():
+
+def _labels(method, model, searched: bool, character, category) -> Tuple[str, str, str]:
+    """Backend, character and question category from the fields of an answer record that decide them"""
+    record = {"method": method, "model": model}
+    if searched:
+        record["search_results"] = None
+    backend = record_backend(record) or method or "unknown"
+    return str(backend), str(character or "unknown"), str(category or "unknown")
+
+
+def _parse_chunk(label: str, first_line: int, lines: List[str]):
+    """Timestamps, question ids (-1 if missing) and group codes of a chunk's answers, with the
+    vocabulary of each group field and messages for unparseable lines"""
     timestamps = []
     question_ids = []
-    
-    # Read the JSONL file
-    with open('output/answers.jsonl', 'r') as f:
-        for line_num, line in enumerate(f):
-            try:
-                data = json.loads(line.strip())
-                timestamp = data.get('timestamp')
-                question_id = data.get('question_id')
-                
-                if timestamp is not None:
-                    timestamps.append(timestamp)
-                    question_ids.append(question_id)
-                    
-            except json.JSONDecodeError as e:
-                print(f"Error parsing line {line_num + 1}: {e}")
-                continue
-    
-    if len(timestamps) < 2:
+    # Records are coded by their raw label fields; each distinct combination is resolved once
+    combos = {}
+    combo_codes = []
+    messages = []
+    for line_num, line in enumerate(lines, first_line):
+        try:
+            data = loads(line)
+        except JSONDecodeError as e:
+            messages.append(f"Error parsing {label}line {line_num}: {e}")
+            continue
+        if not isinstance(data, dict):
+            continue
+        timestamp = data.get('timestamp')
+        if not isinstance(timestamp, (int, float)):
+            continue
+        question_id = data.get('question_id')
+        if isinstance(question_id, str) and question_id.isdigit():
+            question_id = int(question_id)
+        timestamps.append(timestamp)
+        question_ids.append(question_id if isinstance(question_id, int) else -1)
+        key = (data.get('method'), data.get('model'), 'search_results' in data,
+               data.get('roleplay_character') or data.get('character'),
+               data.get('category') or data.get('generation_type'))
+        combo_codes.append(combos.setdefault(key, len(combos)))
+
+    vocabs = [{} for _ in GROUP_FIELDS]
+    # Code of each field for each combination, then for each record
+    combo_fields = np.array([[vocab.setdefault(value, len(vocab)) for vocab, value in zip(vocabs, _labels(*key))]
+                             for key in combos], dtype=np.int32).reshape(-1, len(GROUP_FIELDS))
+    codes = combo_fields[np.array(combo_codes, dtype=np.int64)]
+    return (np.array(timestamps, dtype=np.float64), np.array(question_ids, dtype=np.int64),
+            codes, [list(vocab) for vocab in vocabs], messages)
+
+
+def load_timings(paths: List[str], workers: int = 1) -> Dict:
+    """
+    Read answer files into arrays.
+
+    Returns:
+        dict: "timestamp" and "question_id" arrays, "interval" (seconds since the previous answer
+        in the same file; NaN for a file's first answer), an integer code array per group field
+        and "labels" mapping each field to the names behind its codes
+    """
+    names = {field: {} for field in GROUP_FIELDS}
+    parts = []
+    file_starts = []
+    count = 0
+
+    def collect(result: Tuple, first_line: int):
+        nonlocal count
+        timestamps, question_ids, codes, vocabs, messages = result
+        for message in messages:
+            print(message)
+        if first_line == 1:
+            file_starts.append(count)
+        # Map the chunk's codes onto codes shared by all chunks
+        for column, (field, vocab) in enumerate(zip(GROUP_FIELDS, vocabs)):
+            lookup = np.array([names[field].setdefault(value, len(names[field])) for value in vocab],
+                              dtype=np.int32)
+            if len(codes):
+                codes[:, column] = lookup[codes[:, column]]
+        parts.append((timestamps, question_ids, codes))
+        count += len(timestamps)
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Same bounded, in-order window as clean_data.py
+            pending = deque()
+            for label, first_line, lines in read_chunks(paths):
+                pending.append((executor.submit(_parse_chunk, label, first_line, lines), first_line))
+                if len(pending) >= workers * 2:
+                    future, first = pending.popleft()
+                    collect(future.result(), first)
+            while pending:
+                future, first = pending.popleft()
+                collect(future.result(), first)
+    else:
+        for label, first_line, lines in read_chunks(paths):
+            collect(_parse_chunk(label, first_line, lines), first_line)
+
+    timestamps = np.concatenate([p[0] for p in parts]) if parts else np.empty(0)
+    codes = np.concatenate([p[2] for p in parts]) if parts else np.empty((0, len(GROUP_FIELDS)), np.int32)
+    interval = np.diff(timestamps, prepend=np.nan)
+    # Gaps between files are not intervals between answers
+    interval[[start for start in file_starts if start < len(interval)]] = np.nan
+
+    timings = {
+        "timestamp": timestamps,
+        "question_id": np.concatenate([p[1] for p in parts]) if parts else np.empty(0, np.int64),
+        "interval": interval,
+        "labels": {field: list(names[field]) for field in GROUP_FIELDS},
+    }
+    for column, field in enumerate(GROUP_FIELDS):
+        timings[field] = codes[:, column]
+    return timings
+
+
+def group_stats(codes: np.ndarray, values: np.ndarray, groups: int) -> Dict[str, np.ndarray]:
+    """Count, mean, percentiles and max of (non-empty) values per group code, without a Python
+    loop over groups. Percentiles interpolate linearly, like np.percentile."""
+    counts = np.bincount(codes, minlength=groups)
+    present = counts > 0
+    # Sort by group, then value, so each group is a sorted slice starting at starts
+    ordered = values[np.lexsort((values, codes))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    last = np.maximum(counts - 1, 0)
+    end = len(ordered) - 1
+
+    stats = {"count": counts,
+             "mean": np.divide(np.bincount(codes, weights=values, minlength=groups), counts,
+                               out=np.full(groups, np.nan), where=present)}
+    for q in PERCENTILES:
+        position = starts + last * (q / 100)
+        low = np.minimum(np.floor(position).astype(np.int64), end)
+        high = np.minimum(np.ceil(position).astype(np.int64), end)
+        value = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+        stats[f"p{q}"] = np.where(present, value, np.nan)
+    stats["max"] = np.where(present, ordered[np.minimum(starts + last, end)], np.nan)
+    return stats
+
+
+def _pair(question_ids: np.ndarray, index: int, joiner: str = "to") -> str:
+    """'Q<previous> to Q<current>' for the interval ending at answer index"""
+    ids = ["?" if qid < 0 else str(qid) for qid in (question_ids[index - 1], question_ids[index])]
+    return f"Q{ids[0]} {joiner} Q{ids[1]}"
+
+
+def report(timings: Dict, group_by: List[str] = GROUP_FIELDS, top: int = 10):
+    """Print the timing report"""
+    timestamps = timings["timestamp"]
+    question_ids = timings["question_id"]
+    valid = ~np.isnan(timings["interval"])
+    index = np.flatnonzero(valid)
+    seconds = timings["interval"][valid]
+
+    if len(seconds) < 1:
         print("Not enough timestamps to calculate intervals")
         return
-    
-    # Calculate time intervals between consecutive answers
-    intervals = []
-    for i in range(1, len(timestamps)):
-        interval = timestamps[i] - timestamps[i-1]
-        intervals.append(interval)
-    
-    # Convert to minutes for easier reading
-    intervals_minutes = [interval / 60 for interval in intervals]
-    
-    # Calculate statistics
-    avg_interval = statistics.mean(intervals_minutes)
-    median_interval = statistics.median(intervals_minutes)
-    min_interval = min(intervals_minutes)
-    max_interval = max(intervals_minutes)
-    
+
+    minutes = seconds / 60
+    mean = minutes.mean()
+    percentiles = dict(zip(PERCENTILES, np.percentile(minutes, PERCENTILES)))
+
+    print("=== TIMING ANALYSIS ===")
+    print(f"Total answers: {len(timestamps)}")
+    print(f"Total intervals: {len(minutes)}")
+    print("\n=== STATISTICS ===")
+    print(f"Average time between answers: {mean:.2f} minutes ({mean*60:.1f} seconds)")
+    print(f"Median time between answers: {percentiles[50]:.2f} minutes ({percentiles[50]*60:.1f} seconds)")
+    for q in PERCENTILES:
+        if q != 50:
+            print(f"{q}th percentile: {percentiles[q]:.2f} minutes")
+    print(f"Minimum interval: {minutes.min():.2f} minutes ({minutes.min()*60:.1f} seconds)")
+    print(f"Maximum interval: {minutes.max():.2f} minutes ({minutes.max()*60:.1f} seconds)")
+
     # Calculate total time span
-    total_time_span = (timestamps[-1] - timestamps[0]) / 3600  # in hours
-    
-    print(f"Timing Analysis for {len(timestamps)} answers:")
-    print(f"Total time span: {total_time_span:.2f} hours")
-    print(f"Average time between answers: {avg_interval:.2f} minutes")
-    print(f"Median time between answers: {median_interval:.2f} minutes")
-    print(f"Minimum interval: {min_interval:.2f} minutes")
-    print(f"Maximum interval: {max_interval:.2f} minutes")
-    
-    # Show first and last timestamps
-    first_time = datetime.fromtimestamp(timestamps[0])
-    last_time = datetime.fromtimestamp(timestamps[-1])
-    print(f"\nFirst answer: {first_time}")
-    print(f"Last answer: {last_time}")
-    
-    # Show some specific intervals
-    print(f"\nSample intervals (first 10):")
-    for i in range(min(10, len(intervals_minutes))):
-        print(f"  Q{question_ids[i]} to Q{question_ids[i+1]}: {intervals_minutes[i]:.2f} minutes")
-    
-    # Find longest and shortest intervals
-    longest_idx = intervals_minutes.index(max_interval)
-    shortest_idx = intervals_minutes.index(min_interval)
-    
-    print(f"\nLongest interval: {max_interval:.2f} minutes (between Q{question_ids[longest_idx]} and Q{question_ids[longest_idx+1]})")
-    print(f"Shortest interval: {min_interval:.2f} minutes (between Q{question_ids[shortest_idx]} and Q{question_ids[shortest_idx+1]})")
+    total_time_span = (timestamps.max() - timestamps.min()) / 3600  # in hours
+    print(f"\nTotal time span: {total_time_span:.2f} hours ({total_time_span*60:.1f} minutes)")
+    print(f"\nFirst answer: {datetime.fromtimestamp(timestamps.min())}")
+    print(f"Last answer: {datetime.fromtimestamp(timestamps.max())}")
+
+    # Analyze intervals by ranges
+    print("\n=== INTERVAL DISTRIBUTION ===")
+    counts, _ = np.histogram(seconds, bins=[low for low, _, _ in RANGES] + [np.inf])
+    for count, (_, _, label) in zip(counts, RANGES):
+        print(f"{label}: {count} intervals ({count / len(seconds) * 100:.1f}%)")
+
+    print("\n=== EXTREME INTERVALS ===")
+    longest, shortest = index[np.argmax(seconds)], index[np.argmin(seconds)]
+    print(f"Longest interval: {minutes.max():.2f} minutes (between {_pair(question_ids, longest, 'and')})")
+    print(f"Shortest interval: {minutes.min():.2f} minutes (between {_pair(question_ids, shortest, 'and')})")
+
+    # Intervals significantly longer than usual (> 2x median), longest first
+    long_mask = minutes > 2 * percentiles[50]
+    if long_mask.any():
+        long_positions = np.flatnonzero(long_mask)
+        shown = long_positions[np.argsort(-minutes[long_positions], kind="stable")[:top]]
+        print(f"\n=== LONG INTERVALS (> 2x median): {len(long_positions)}, longest {len(shown)} ===")
+        for position in shown:
+            print(f"{_pair(question_ids, index[position])}: {minutes[position]:.2f} minutes")
+
+    # Rough estimate, since only completion timestamps are recorded
+    estimated_time_per_answer = total_time_span * 60 / len(timestamps)  # in minutes
+    print("\n=== ESTIMATED TIME PER ANSWER ===")
+    print(f"Estimated average time per answer: {estimated_time_per_answer:.2f} minutes ({estimated_time_per_answer*60:.1f} seconds)")
+
+    print(f"\n=== RECENT INTERVALS (last {min(top, len(minutes))}) ===")
+    for position in range(max(0, len(minutes) - top), len(minutes)):
+        print(f"{_pair(question_ids, index[position])}: {minutes[position]:.2f} minutes")
+
+    for field in group_by:
+        names = timings["labels"][field]
+        stats = group_stats(timings[field][valid], seconds, len(names))
+        print(f"\n=== BY {field.upper()} (seconds between answers) ===")
+        print(f"{field:<24}{'answers':>9}{'mean':>9}" + "".join(f"{'p' + str(q):>9}" for q in PERCENTILES)
+              + f"{'max':>9}")
+        for group in np.argsort(-stats["count"], kind="stable"):
+            if not stats["count"][group]:
+                continue
+            print(f"{names[group][:23]:<24}{stats['count'][group]:>9}{stats['mean'][group]:>9.1f}"
+                  + "".join(f"{stats[f'p{q}'][group]:>9.1f}" for q in PERCENTILES)
+                  + f"{stats['max'][group]:>9.1f}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze the time between answers in output files")
+    parser.add_argument("inputs", nargs="*", default=["output/answers.jsonl"],
+                       help="Answer JSONL files, optionally compressed (.gz, .bz2, .xz)")
+    parser.add_argument("--group-by", nargs="*", choices=GROUP_FIELDS, default=list(GROUP_FIELDS),
+                       help="Break intervals down by these fields")
+    parser.add_argument("--top", type=int, default=10, help="Intervals listed in the long and recent sections")
+    parser.add_argument("--workers", type=int, default=1, help="Processes parsing the input in parallel")
+
+    args = parser.parse_args()
+
+    for input_file in args.inputs:
+        if not os.path.exists(input_file):
+            print(f"Error: Input file {input_file} not found!")
+            return
+
+    started = time.perf_counter()
+    timings = load_timings(args.inputs, workers=args.workers)
+    loaded = time.perf_counter() - started
+    report(timings, group_by=args.group_by, top=args.top)
+    print(f"\nAnalyzed {len(timings['timestamp'])} answers from {len(args.inputs)} file(s) "
+          f"in {time.perf_counter() - started:.1f}s ({loaded:.1f}s reading)")
+
 
 if __name__ == "__main__":
-    analyze_timing() 
\ No newline at end of file
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Data-Path Micro-Benchmarks
+Times the CPU and I/O side of the tool - dataset loading, answer saving, question
+dedup, near-duplicate filtering, text extraction, truncated-array salvage and clean_data - over synthetic datasets of 10k, 100k and 1M
+records, reports time and peak memory, and fails when regression thresholds are exceeded.
+"""
+
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_thresholds.json")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+WORDS = ("freedom justice reconciliation prison leadership courage education community "
+         "struggle dignity nation history hope future unity negotiation patience apartheid "
+         "ubuntu forgiveness youth elder democracy rivonia robben island transkei").split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+def synthetic_questions(count: int, duplicate_share: float = 0.3, seed: int = 0) -> List[Dict]:
+    """Question records shaped like question_generator output, with a share of case/space variants"""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(count):
+        if questions and rng.random() < duplicate_share:
+            text = rng.choice(questions)["question"]
+            text = text.upper() if rng.random() < 0.5 else f"  {text} "
+        else:
+            text = f"How did {_sentence(rng, 8)} shape your view of {WORDS[i % len(WORDS)]} ({i})?"
+        questions.append({
+            "question": text,
+            "category": "synthetic",
+            "complexity": "intermediate",
+            "focus_area": WORDS[i % len(WORDS)],
+            "topic": "Nelson Mandela",
+            "generation_type": "comprehensive",
+            "batch": i // 10,
+            "timestamp": 1700000000.0 + i
+        })
+    return questions
+
+
+def synthetic_answers(count: int, seed: int = 0) -> List[Dict]:
+    """Answer records shaped like the runners' output"""
+    rng = random.Random(seed)
+    return [{
+        "question": f"What did {_sentence(rng, 6)} teach you ({i})?",
+        "answer": _sentence(rng, 120),
+        "character": "Nelson Mandela",
+        "roleplay_character": "mandela",
+        "timestamp": 1700000000.0 + i,
+        "model": "synthetic",
+        "method": "llm_only",
+        "question_id": i
+    } for i in range(count)]
+
+
+class Workspace:
+    """Synthetic input files for one dataset size, built lazily and shared across cases"""
+
+    def __init__(self, root: str, size: int):
+        self.root = root
+        self.size = size
+        self._cache: Dict[str, object] = {}
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, f"{self.size}_{name}")
+
+    def questions(self) -> List[Dict]:
+        if "questions" not in self._cache:
+            self._cache["questions"] = synthetic_questions(self.size)
+        return self._cache["questions"]
+
+    def answers(self) -> List[Dict]:
+        if "answers" not in self._cache:
+            self._cache["answers"] = synthetic_answers(self.size)
+        return self._cache["answers"]
+
+    def dataset_file(self, ext: str) -> str:
+        path = self.path(f"dataset.{ext}")
+        if not os.path.exists(path):
+            questions = self.questions()
+            if ext == "json":
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(questions, f, ensure_ascii=False)
+            elif ext == "csv":
+                with open(path, 'w', encoding='utf-8', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=["question", "category"], extrasaction="ignore")
+                    writer.writeheader()
+                    writer.writerows(questions)
+            elif ext == "txt":
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.writelines(q["question"].strip() + "\n" for q in questions)
+        return path
+
+    def answers_file(self) -> str:
+        path = self.path("answers.jsonl")
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                for answer in self.answers():
+                    f.write(json.dumps(answer, ensure_ascii=False) + '\n')
+        return path
+
+    def truncated_array_text(self) -> str:
+        """Questions as a pretty-printed JSON array cut off partway through, like a max_tokens stop"""
+        if "array" not in self._cache:
+            text = json.dumps(self.questions(), ensure_ascii=False, indent=2)
+            self._cache["array"] = text[:len(text) * 9 // 10]
+        return self._cache["array"]
+
+    def extraction_text(self) -> str:
+        if "text" not in self._cache:
+            lines = []
+            for i, question in enumerate(self.questions()):
+                if i % 3 == 0:
+                    lines.append(f'    "question": "{question["question"].strip()}",')
+                elif i % 3 == 1:
+                    lines.append(f'{i}. {question["question"].strip()}')
+                else:
+                    lines.append('    "category": "synthetic",')
+            self._cache["text"] = "\n".join(lines)
+        return self._cache["text"]
+
+
+def _answer_generator():
+    from main_local_llm_only import LLMOnlyQAGenerator
+    return LLMOnlyQAGenerator()
+
+
+def _question_generator():
+    from question_generator import QuestionGenerator
+    return QuestionGenerator()
+
+
+def _case_load_dataset(ext: str):
+    def setup(ws: Workspace) -> Callable:
+        generator = _answer_generator()
+        path = ws.dataset_file(ext)
+        return lambda: generator.load_dataset(path)
+    return setup
+
+
+def _case_save_answers(ws: Workspace) -> Callable:
+    generator = _answer_generator()
+    answers = ws.answers()
+    output_path = ws.path("saved/answers.jsonl")
+
+    def run():
+        if os.path.exists(output_path):
+            os.remove(output_path)  # save_answers appends
+        generator.save_answers(answers, output_path)
+    return run
+
+
+def _case_deduplicate(ws: Workspace) -> Callable:
+    generator = _question_generator()
+    questions = ws.questions()
+    return lambda: generator.deduplicate_questions(questions)
+
+
+def _case_near_deduplicate(ws: Workspace) -> Callable:
+    from near_dedup import NearDuplicateIndex
+    questions = ws.questions()
+    return lambda: NearDuplicateIndex().filter(questions)
+
+
+def _case_extract_questions(ws: Workspace) -> Callable:
+    generator = _question_generator()
+    text = ws.extraction_text()
+    return lambda: generator._extract_questions_from_text(text, "Nelson Mandela", ws.size)
+
+
+def _case_salvage_partial_array(ws: Workspace) -> Callable:
+    from json_stream import parse_partial_array
+    text = ws.truncated_array_text()
+    return lambda: parse_partial_array(text)
+
+
+def _case_clean_data(ws: Workspace) -> Callable:
+    from clean_data import clean_data
+    input_path = ws.answers_file()
+    output_path = ws.path("cleaned.jsonl")
+    return lambda: clean_data(input_path, output_path)
+
+
+CASES = {
+    "load_dataset_json": _case_load_dataset("json"),
+    "load_dataset_csv": _case_load_dataset("csv"),
+    "load_dataset_txt": _case_load_dataset("txt"),
+    "save_answers": _case_save_answers,
+    "deduplicate_questions": _case_deduplicate,
+    "near_deduplicate_questions": _case_near_deduplicate,
+    "extract_questions_from_text": _case_extract_questions,
+    "salvage_partial_array": _case_salvage_partial_array,
+    "clean_data": _case_clean_data,
+}
+
+# Largest dataset a case runs on; near-dedup targets question sets of a few hundred thousand
+SIZE_LIMITS = {
+    "near_deduplicate_questions": 300_000,
+}
+
+
+def measure(run: Callable, repeat: int, track_memory: bool) -> Dict:
+    """Best-of-N wall time, plus a separate tracemalloc pass so tracing does not skew timings"""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        peak = None
+        if track_memory:
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def check_thresholds(results: List[Dict], thresholds: Dict, baseline: Dict = None) -> List[str]:
+    """Return a description of every case that exceeds its per-record budget or regresses vs baseline"""
+    failures = []
+    tolerance = thresholds.get("tolerance", 0.25)
+    baseline_index = {(r["case"], r["size"]): r for r in (baseline or {}).get("results", [])}
+    for r in results:
+        us_budget = thresholds.get("per_record_us", {}).get(r["case"])
+        if us_budget is not None and r["us_per_record"] > us_budget:
+            failures.append(f"{r['case']} @ {r['size']:,}: {r['us_per_record']:.2f} µs/record > budget {us_budget}")
+        bytes_budget = thresholds.get("per_record_bytes", {}).get(r["case"])
+        if bytes_budget is not None and r["bytes_per_record"] is not None and r["bytes_per_record"] > bytes_budget:
+            failures.append(f"{r['case']} @ {r['size']:,}: {r['bytes_per_record']:.0f} B/record > budget {bytes_budget}")
+        # Streaming cases hold about one chunk at any size, so their budget is a flat peak
+        peak_budget = thresholds.get("peak_mb", {}).get(r["case"])
+        if peak_budget is not None and r["peak_mb"] is not None and r["peak_mb"] > peak_budget:
+            failures.append(f"{r['case']} @ {r['size']:,}: {r['peak_mb']:.1f} MB peak > budget {peak_budget}")
+        previous = baseline_index.get((r["case"], r["size"]))
+        if previous and r["seconds"] > previous["seconds"] * (1 + tolerance):
+            failures.append(f"{r['case']} @ {r['size']:,}: {r['seconds']:.3f}s vs baseline "
+                            f"{previous['seconds']:.3f}s (> +{tolerance:.0%})")
+    return failures
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the data-path functions")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Synthetic record counts")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Cases to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per case (best is kept)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH, help="Per-record budget file")
+    parser.add_argument("--baseline", help="Earlier results JSON; fail on slowdowns beyond the tolerance")
+    parser.add_argument("--output", help="Results JSON path (default: output/benchmarks/data_path_<time>.json)")
+    args = parser.parse_args()
+
+    with open(args.thresholds, 'r', encoding='utf-8') as f:
+        thresholds = json.load(f)
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="qa_data_path_")
+    try:
+        print(f"{'case':<30}{'records':>11}{'seconds':>10}{'µs/rec':>9}{'peak MB':>10}")
+        for size in sorted(args.sizes):
+            workspace = Workspace(work_dir, size)
+            os.makedirs(workspace.path("saved"), exist_ok=True)
+            for case in args.cases:
+                if size > SIZE_LIMITS.get(case, size):
+                    continue
+                run = CASES[case](workspace)
+                measured = measure(run, args.repeat, not args.no_memory)
+                peak = measured["peak_bytes"]
+                result = {
+                    "case": case,
+                    "size": size,
+                    "seconds": round(measured["seconds"], 4),
+                    "us_per_record": round(measured["seconds"] / size * 1e6, 3),
+                    "peak_mb": round(peak / 2**20, 2) if peak is not None else None,
+                    "bytes_per_record": round(peak / size, 1) if peak is not None else None,
+                }
+                results.append(result)
+                peak_text = f"{result['peak_mb']:>10.1f}" if peak is not None else f"{'-':>10}"
+                print(f"{case:<30}{size:>11,}{result['seconds']:>10.3f}{result['us_per_record']:>9.2f}{peak_text}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    output_path = args.output or f"output/benchmarks/data_path_{int(time.time())}.json"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"timestamp": time.time(), "python": sys.version.split()[0], "results": results}, f, indent=2)
+    print(f"\n📁 Results saved to: {output_path}")
+
+    failures = check_thresholds(results, thresholds, baseline)
+    if failures:
+        print("\n❌ Data-path regressions:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("✅ All data-path cases within thresholds")
+
+
+if __name__ == "__main__":
+    main()
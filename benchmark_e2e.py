@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+End-to-End Benchmark
+Drives the runners and the question generator against the local mock server with a
+fixed workload and reports questions/s, p50/p95/p99 request latency and peak RSS.
+Results are saved as JSON so runs can be compared across versions.
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List
+
+from mock_server import (
+    EndpointConfig, MockConfig, start_mock_server,
+    add_endpoint_arguments, endpoint_config_from_args
+)
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TARGETS = ["main", "main_llm_only", "main_local_llm_only", "question_generator"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _mock_call(base_url: str, path: str, method: str = "GET") -> Dict:
+    request = urllib.request.Request(f"{base_url}{path}", data=b"" if method == "POST" else None, method=method)
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def _count_records(output_dir: str) -> Dict[str, int]:
+    """Count final output records, ignoring .temp/.interrupted progress files"""
+    counts = {"records": 0, "errors": 0}
+    for name in os.listdir(output_dir):
+        if not name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(output_dir, name), 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                counts["records"] += 1
+                if json.loads(line).get("error"):
+                    counts["errors"] += 1
+    return counts
+
+
+def build_workload(work_dir: str, num_questions: int) -> str:
+    """Write the first num_questions questions of the bundled dataset to a fixed workload file"""
+    with open(os.path.join(REPO_DIR, "NelsonMandelaFormattedQuestions.json"), 'r', encoding='utf-8') as f:
+        questions = json.load(f)[:num_questions]
+    dataset_path = os.path.join(work_dir, "workload.json")
+    with open(dataset_path, 'w', encoding='utf-8') as f:
+        json.dump(questions, f, ensure_ascii=False)
+    return dataset_path
+
+
+def target_command(target: str, dataset_path: str, num_questions: int) -> List[str]:
+    script = os.path.join(REPO_DIR, f"{target}.py")
+    if target == "question_generator":
+        return [sys.executable, script, "--topic", "Nelson Mandela", "--count", str(num_questions),
+                "--output", "output/questions.jsonl"]
+    return [sys.executable, script, "--dataset", dataset_path, "--character", "mandela"]
+
+
+def run_target(target: str, base_url: str, dataset_path: str, num_questions: int,
+               work_dir: str, verbose: bool = False) -> Dict:
+    run_dir = os.path.join(work_dir, target)
+    os.makedirs(os.path.join(run_dir, "output"), exist_ok=True)
+
+    env = dict(os.environ)
+    env.update({
+        "QWEN_AI_KEY": "mock-key",
+        "QWEN_AI_BASE_URL": f"{base_url}/v1",
+        "LOCAL_AI_BASE_URL": f"{base_url}/v1",
+        "GOOGLE_SEARCH_KEY": "mock-key",
+        "GOOGLE_SEARCH_CX": "mock-cx",
+        "GOOGLE_SEARCH_URL": f"{base_url}/customsearch/v1",
+        "DELAY_BETWEEN_REQUESTS": "0",
+        "DELAY_BETWEEN_BATCHES": "0",
+    })
+
+    _mock_call(base_url, "/_reset", "POST")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        target_command(target, dataset_path, num_questions), cwd=run_dir, env=env,
+        stdout=None if verbose else subprocess.DEVNULL, stderr=None if verbose else subprocess.DEVNULL
+    )
+    # wait4 gives the resource usage of this child alone, unlike RUSAGE_CHILDREN
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall_time = time.perf_counter() - start
+
+    stats = _mock_call(base_url, "/_stats")
+    counts = _count_records(os.path.join(run_dir, "output"))
+    chat_latencies = stats["latencies"]["chat"]
+
+    return {
+        "target": target,
+        "exit_code": process.returncode,
+        "wall_time_s": round(wall_time, 3),
+        "questions": counts["records"],
+        "errors": counts["errors"],
+        "questions_per_s": round(counts["records"] / wall_time, 3) if wall_time else 0,
+        "requests": len(chat_latencies),
+        "rate_limited": stats["rate_limited"],
+        "latency_s": {
+            "p50": round(percentile(chat_latencies, 50), 4),
+            "p95": round(percentile(chat_latencies, 95), 4),
+            "p99": round(percentile(chat_latencies, 99), 4),
+            "mean": round(statistics.mean(chat_latencies), 4) if chat_latencies else 0,
+        },
+        "search_latency_p50_s": round(percentile(stats["latencies"]["search"], 50), 4),
+        "completion_tokens": stats["completion_tokens"],
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss is KiB on Linux
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def print_results(results: List[Dict], baseline: Dict = None):
+    baseline_by_target = {r["target"]: r for r in (baseline or {}).get("results", [])}
+    print(f"\n{'target':<22}{'q/s':>9}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'RSS MB':>9}{'errors':>8}")
+    for r in results:
+        line = (f"{r['target']:<22}{r['questions_per_s']:>9.2f}{r['latency_s']['p50']:>9.3f}"
+                f"{r['latency_s']['p95']:>9.3f}{r['latency_s']['p99']:>9.3f}{r['peak_rss_mb']:>9.1f}{r['errors']:>8}")
+        previous = baseline_by_target.get(r["target"])
+        if previous and previous["questions_per_s"]:
+            change = (r["questions_per_s"] / previous["questions_per_s"] - 1) * 100
+            line += f"   ({change:+.1f}% q/s vs {baseline.get('revision', 'baseline')})"
+        print(line)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against a mock OpenAI-compatible server")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS, help="Entry points to drive")
+    parser.add_argument("--questions", type=int, default=50, help="Questions in the fixed workload")
+    parser.add_argument("--answer-tokens", type=int, default=300, help="Words per simulated answer")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the mock server")
+    parser.add_argument("--output", help="Results JSON path (default: output/benchmarks/e2e_<time>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show runner output")
+    add_endpoint_arguments(parser, "chat", EndpointConfig(latency_median=0.05, tokens_per_second=2000))
+    add_endpoint_arguments(parser, "search", EndpointConfig(latency_median=0.02))
+    args = parser.parse_args()
+
+    config = MockConfig(chat=endpoint_config_from_args(args, "chat"),
+                        search=endpoint_config_from_args(args, "search"),
+                        answer_tokens=args.answer_tokens, seed=args.seed)
+    server = start_mock_server(config)
+    print(f"🧪 Mock server on {server.base_url}")
+
+    work_dir = tempfile.mkdtemp(prefix="qa_bench_")
+    results = []
+    try:
+        dataset_path = build_workload(work_dir, args.questions)
+        for target in args.targets:
+            print(f"🚀 Benchmarking {target} ({args.questions} questions)...")
+            results.append(run_target(target, server.base_url, dataset_path, args.questions,
+                                      work_dir, args.verbose))
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "revision": _git_revision(),
+        "timestamp": time.time(),
+        "python": sys.version.split()[0],
+        "workload": {"questions": args.questions, "answer_tokens": args.answer_tokens, "seed": args.seed},
+        "mock": {"chat": vars(config.chat), "search": vars(config.search)},
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output_path = args.output or f"output/benchmarks/e2e_{int(time.time())}.json"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📁 Results saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
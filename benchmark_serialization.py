@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark
+Compares the stdlib json calls the tool made before serialization.py with the module's active
+backend (orjson when installed), decoding and encoding the question dataset and a streamed
+multi-GB answers JSONL, and reports seconds, MB/s and the speedup.
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import serialization
+from benchmark_data_path import synthetic_answers
+from clean_data import read_chunks
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+QUESTIONS_PATH = os.path.join(REPO_DIR, "NelsonMandelaFormattedQuestions.json")
+
+# How each path serialized before: json.load/json.loads, json.dumps(..., ensure_ascii=False) per
+# JSONL record and json.dump(..., indent=2) for pretty-printed files
+BEFORE = {
+    "decode": json.loads,
+    "encode": lambda obj: json.dumps(obj, ensure_ascii=False),
+    "encode_indent": lambda obj: json.dumps(obj, ensure_ascii=False, indent=2),
+}
+AFTER = {
+    "decode": serialization.loads,
+    "encode": serialization.dumps,
+    "encode_indent": lambda obj: serialization.dumps(obj, indent=True),
+}
+
+# Synthetic answers are generated this many at a time
+GENERATE_BATCH = 10000
+
+
+def best_of(run: Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_questions(path: str, repeat: int) -> List[Dict]:
+    """Load the question dataset as load_dataset does, save it as JSONL lines as save_questions
+    does, and pretty-print it as the subtopic outline is written"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    data = json.loads(text)
+    items = data if isinstance(data, list) else list(data.values())
+    size_mb = len(text.encode('utf-8')) / 1e6
+
+    cases = {
+        "questions: load": lambda impl: impl["decode"](text),
+        "questions: save JSONL": lambda impl: "".join(impl["encode"](item) + '\n' for item in items),
+        "questions: dump indent=2": lambda impl: impl["encode_indent"](data),
+    }
+    return [{"case": name, "records": len(items), "mb": round(size_mb, 3),
+             "before_s": best_of(lambda: run(BEFORE), repeat),
+             "after_s": best_of(lambda: run(AFTER), repeat)} for name, run in cases.items()]
+
+
+def write_answers(path: str, megabytes: float) -> int:
+    """Synthetic answers JSONL of about megabytes, written in batches; returns the record count"""
+    target = megabytes * 1e6
+    written = 0
+    records = 0
+    seed = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target:
+            text = "".join(serialization.dumps(answer) + '\n'
+                           for answer in synthetic_answers(GENERATE_BATCH, seed=seed))
+            f.write(text)
+            written += len(text)
+            records += GENERATE_BATCH
+            seed += 1
+    return records
+
+
+def bench_answers(path: str) -> List[Dict]:
+    """Decode every line of an answers file, then encode every record, timing only the JSON calls
+    so both sides pay the same reading cost"""
+    size_mb = os.path.getsize(path) / 1e6
+    timings = {"before_decode": 0.0, "after_decode": 0.0, "before_encode": 0.0, "after_encode": 0.0}
+    records = 0
+    for _, _, lines in read_chunks([path]):
+        for side, impl in (("before", BEFORE), ("after", AFTER)):
+            decode = impl["decode"]
+            start = time.perf_counter()
+            for line in lines:
+                decode(line)
+            timings[f"{side}_decode"] += time.perf_counter() - start
+        parsed = [serialization.loads(line) for line in lines]
+        for side, impl in (("before", BEFORE), ("after", AFTER)):
+            encode = impl["encode"]
+            start = time.perf_counter()
+            for record in parsed:
+                encode(record)
+            timings[f"{side}_encode"] += time.perf_counter() - start
+        records += len(lines)
+
+    return [{"case": f"answers: {kind}", "records": records, "mb": round(size_mb, 1),
+             "before_s": timings[f"before_{kind}"], "after_s": timings[f"after_{kind}"]}
+            for kind in ("decode", "encode")]
+
+
+def print_results(results: List[Dict]):
+    print(f"\n{'case':<28}{'records':>11}{'MB':>9}{'before s':>10}{'after s':>10}"
+          f"{'before MB/s':>13}{'after MB/s':>12}{'speedup':>9}")
+    for r in results:
+        print(f"{r['case']:<28}{r['records']:>11,}{r['mb']:>9.1f}{r['before_s']:>10.3f}{r['after_s']:>10.3f}"
+              f"{r['mb'] / r['before_s']:>13.1f}{r['mb'] / r['after_s']:>12.1f}"
+              f"{r['before_s'] / r['after_s']:>8.1f}x")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark JSON decoding and encoding before and after serialization.py")
+    parser.add_argument("--questions", default=QUESTIONS_PATH, help="Question dataset (.json array)")
+    parser.add_argument("--answers", help="Existing answers JSONL (optionally .gz, .bz2, .xz) instead of a synthetic one")
+    parser.add_argument("--answers-mb", type=float, default=2048,
+                       help="Size of the synthetic answers file in MB (0 skips the answers cases)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions of the question cases (best is kept)")
+    parser.add_argument("--output", help="Results JSON path (default: output/benchmarks/serialization_<time>.json)")
+    args = parser.parse_args()
+
+    print(f"⚙️ serialization backend: {serialization.BACKEND}")
+    results = bench_questions(args.questions, args.repeat)
+
+    work_dir = None
+    try:
+        answers_path = args.answers
+        if not answers_path and args.answers_mb > 0:
+            work_dir = tempfile.mkdtemp(prefix="qa_serialization_")
+            answers_path = os.path.join(work_dir, "answers.jsonl")
+            print(f"📝 Writing {args.answers_mb:.0f} MB of synthetic answers...")
+            write_answers(answers_path, args.answers_mb)
+        if answers_path:
+            print(f"⏱️ Timing {answers_path}...")
+            results.extend(bench_answers(answers_path))
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results(results)
+
+    output_path = args.output or f"output/benchmarks/serialization_{int(time.time())}.json"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        serialization.dump({"timestamp": time.time(), "python": sys.version.split()[0],
+                            "backend": serialization.BACKEND, "results": results}, f, indent=True)
+    print(f"\n📁 Results saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
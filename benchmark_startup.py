@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Startup Budget Check
+Measures how long each entry point takes to import and to run a short command
+(--list-characters / --help), and checks that heavy modules stay out of the import path.
+Exits non-zero when an entry point goes over the budget in benchmark_thresholds.json.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+THRESHOLDS_PATH = os.path.join(REPO_DIR, "benchmark_thresholds.json")
+
+ENTRY_POINTS = {
+    "main": ["--list-characters"],
+    "main_llm_only": ["--list-characters"],
+    "main_local_llm_only": ["--list-characters"],
+    "main_claude_code": ["--list-characters"],
+    "main_claude_login": ["--list-characters"],
+    "question_generator": ["--help"],
+    "pipeline": ["--help"],
+    "export_parquet": ["--help"],
+    "monitor": ["--help"],
+}
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of a module as reported by python -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"Could not import {module}:\n{result.stderr[-2000:]}")
+
+
+def loaded_heavy_modules(module: str, heavy: List[str]) -> List[str]:
+    code = f"import sys, {module}; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def command_time_ms(module: str, args: List[str], repeat: int) -> float:
+    """Best-of-N wall time for a short command, including interpreter startup"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, f"{module}.py", *args], cwd=REPO_DIR,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check entry point import time and short-command startup")
+    parser.add_argument("--entry-points", nargs="+", choices=list(ENTRY_POINTS), default=list(ENTRY_POINTS),
+                       help="Entry points to check")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per short command (best is kept)")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH, help="Budget file")
+    args = parser.parse_args()
+
+    with open(args.thresholds, 'r', encoding='utf-8') as f:
+        budget: Dict = json.load(f)["startup"]
+
+    failures = []
+    print(f"{'entry point':<24}{'import ms':>11}{'command ms':>12}  heavy modules loaded")
+    for module in args.entry_points:
+        imported = import_time_ms(module)
+        command = command_time_ms(module, ENTRY_POINTS[module], args.repeat)
+        heavy = loaded_heavy_modules(module, budget["forbidden_modules"])
+        print(f"{module:<24}{imported:>11.1f}{command:>12.1f}  {', '.join(heavy) or '-'}")
+
+        if imported > budget["import_ms"]:
+            failures.append(f"{module}: import took {imported:.1f} ms > {budget['import_ms']} ms")
+        if command > budget["command_ms"]:
+            failures.append(f"{module} {' '.join(ENTRY_POINTS[module])}: {command:.1f} ms > {budget['command_ms']} ms")
+        if heavy:
+            failures.append(f"{module}: imports {', '.join(heavy)} at module load")
+
+    if failures:
+        print("\n❌ Startup budget exceeded:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+    print("\n✅ All entry points within the startup budget")
+
+
+if __name__ == "__main__":
+    main()
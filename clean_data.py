@@ -1,90 +1,202 @@
 #!/usr/bin/env python3
 """
 Script to clean the All_Answers.jsonl file and extract only question and answer pairs.
+Streams in one pass: input lines are parsed in chunks (optionally in a process pool) and
+each pair is written to the JSONL and JSON array outputs as it is cleaned, so memory stays
+flat however large the input is.
 """
 
-import json
+import bz2
+import gzip
+import lzma
 import os
+from collections import deque
+from typing import Dict, Iterator, List, Tuple, Union
 
-def clean_data(input_file, output_file):
+from serialization import JSONDecodeError, dumps, encode_string, loads
+
+# Lines per parse job; large enough to amortize process pool overhead
+CHUNK_LINES = 10000
+
+_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def open_input(path: str):
+    """Open a plain, .gz, .bz2 or .xz text file for reading"""
+    opener = _OPENERS.get(os.path.splitext(path)[1].lower(), open)
+    return opener(path, 'rt', encoding='utf-8')
+
+
+def input_format(path: str) -> str:
+    """Extension of an input file under any .gz, .bz2 or .xz suffix, e.g. ".jsonl" for a.jsonl.gz"""
+    root, extension = os.path.splitext(path.lower())
+    if extension in _OPENERS:
+        extension = os.path.splitext(root)[1]
+    return extension
+
+
+def read_chunks(input_files: List[str]) -> Iterator[Tuple[str, int, List[str]]]:
+    """(source label, first line number, lines) for every CHUNK_LINES lines of the inputs"""
+    for path in input_files:
+        # Name the file in messages only when there is more than one
+        label = f"{path}: " if len(input_files) > 1 else ""
+        with open_input(path) as f:
+            chunk = []
+            first_line = 1
+            for line in f:
+                chunk.append(line)
+                if len(chunk) == CHUNK_LINES:
+                    yield label, first_line, chunk
+                    first_line += len(chunk)
+                    chunk = []
+            if chunk:
+                yield label, first_line, chunk
+
+
+def _pair_text(question, answer) -> Tuple[str, str]:
+    """A pair as a JSONL line and as an element of a json.dump(..., indent=2) array"""
+    if isinstance(question, str) and isinstance(answer, str):
+        # Common case: encode each string once and lay out both forms by hand
+        question, answer = encode_string(question), encode_string(answer)
+        return ('{"question": ' + question + ', "answer": ' + answer + '}',
+                '{\n    "question": ' + question + ',\n    "answer": ' + answer + '\n  }')
+    # Nested values: the JSONL line keeps the same top-level layout, with the values compact
+    cleaned_item = {
+        "question": question,
+        "answer": answer
+    }
+    return ('{"question": ' + dumps(question) + ', "answer": ' + dumps(answer) + '}',
+            dumps(cleaned_item, indent=True).replace("\n", "\n  "))
+
+
+def _clean_chunk(label: str, first_line: int,
+                 lines: List[str]) -> Tuple[List[Tuple[str, str]], List[str], int, int]:
+    """Clean one chunk of lines; returns each pair as (JSONL line, JSON array element) text,
+    messages for skipped lines, and the number of lines missing a field and failing to parse"""
+    cleaned = []
+    messages = []
+    missing = errors = 0
+    for line_num, line in enumerate(lines, first_line):
+        try:
+            # Parse each JSON line
+            data = loads(line)
+        except JSONDecodeError as e:
+            messages.append(f"Error parsing {label}line {line_num}: {e}")
+            errors += 1
+            continue
+
+        # Extract only question and answer
+        if isinstance(data, dict) and 'question' in data and 'answer' in data:
+            cleaned.append(_pair_text(data['question'], data['answer']))
+        else:
+            messages.append(f"Warning: {label}Line {line_num} missing question or answer field")
+            missing += 1
+    return cleaned, messages, missing, errors
+
+
+def array_path(output_file: str) -> str:
+    """Path of the JSON array copy written next to output_file: the same name with a .json extension"""
+    path = os.path.splitext(output_file)[0] + '.json'
+    if path == output_file:
+        raise ValueError(f"Output {output_file} would be overwritten by its JSON array copy; use a .jsonl name")
+    return path
+
+def clean_data(input_file: Union[str, List[str]], output_file: str, workers: int = 1) -> Dict[str, int]:
     """
     Clean the data by extracting only question and answer pairs.
-    
+
     Args:
-        input_file (str): Path to the input JSONL file
-        output_file (str): Path to the output JSONL file
+        input_file (str or list): Path(s) to the input JSONL files, optionally .gz, .bz2 or .xz
+        output_file (str): Path to the output JSONL file; a JSON array copy is written next to it
+        workers (int): Processes parsing chunks of lines in parallel (1 parses in this process)
+
+    Returns:
+        dict: Counts of lines read, pairs written, lines missing a field and unparseable lines
     """
-    cleaned_data = []
-    
-    print(f"Reading data from {input_file}...")
-    
-    with open(input_file, 'r', encoding='utf-8') as f:
-        for line_num, line in enumerate(f, 1):
-            try:
-                # Parse each JSON line
-                data = json.loads(line.strip())
-                
-                # Extract only question and answer
-                if 'question' in data and 'answer' in data:
-                    cleaned_item = {
-                        "question": data['question'],
-                        "answer": data['answer']
-                    }
-                    cleaned_data.append(cleaned_item)
-                else:
-                    print(f"Warning: Line {line_num} missing question or answer field")
-                    
-            except json.JSONDecodeError as e:
-                print(f"Error parsing line {line_num}: {e}")
-                continue
-    
-    print(f"Processed {len(cleaned_data)} valid question-answer pairs")
-    
-    # Write cleaned data to output file
-    print(f"Writing cleaned data to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        for item in cleaned_data:
-            f.write(json.dumps(item, ensure_ascii=False) + '\n')
-    
-    print(f"Successfully created {output_file} with {len(cleaned_data)} entries")
-    
-    # Also create a JSON array version if needed
-    json_array_file = output_file.replace('.jsonl', '.json')
-    print(f"Creating JSON array version: {json_array_file}")
-    with open(json_array_file, 'w', encoding='utf-8') as f:
-        json.dump(cleaned_data, f, ensure_ascii=False, indent=2)
-    
-    print(f"Successfully created {json_array_file}")
+    input_files = [input_file] if isinstance(input_file, str) else list(input_file)
+    json_array_file = array_path(output_file)
+    stats = {"lines": 0, "cleaned": 0, "missing": 0, "errors": 0}
+
+    print(f"Reading data from {', '.join(input_files)}...")
+    print(f"Writing cleaned data to {output_file} and {json_array_file}...")
+
+    with open(output_file, 'w', encoding='utf-8') as jsonl, open(json_array_file, 'w', encoding='utf-8') as array:
+
+        def write(result: Tuple[List[Tuple[str, str]], List[str], int, int], lines: int):
+            cleaned, messages, missing, errors = result
+            for message in messages:
+                print(message)
+            if cleaned:
+                jsonl.write("".join(line + '\n' for line, _ in cleaned))
+                array.write(("[\n  " if not stats["cleaned"] else ",\n  ")
+                            + ",\n  ".join(element for _, element in cleaned))
+                stats["cleaned"] += len(cleaned)
+            stats["lines"] += lines
+            stats["missing"] += missing
+            stats["errors"] += errors
+
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # A bounded window of chunks in flight keeps memory flat and output in order
+                pending = deque()
+                for label, first_line, lines in read_chunks(input_files):
+                    pending.append((executor.submit(_clean_chunk, label, first_line, lines), len(lines)))
+                    if len(pending) >= workers * 2:
+                        future, count = pending.popleft()
+                        write(future.result(), count)
+                while pending:
+                    future, count = pending.popleft()
+                    write(future.result(), count)
+        else:
+            for label, first_line, lines in read_chunks(input_files):
+                write(_clean_chunk(label, first_line, lines), len(lines))
+
+        array.write("\n]" if stats["cleaned"] else "[]")
+
+    print(f"Processed {stats['cleaned']} valid question-answer pairs")
+    print(f"Successfully created {output_file} and {json_array_file} with {stats['cleaned']} entries")
+    return stats
 
 def main():
-    input_file = "output/All_Answers.jsonl"
-    output_file = "nelson_mandela_QA.jsonl"
-    
-    # Check if input file exists
-    if not os.path.exists(input_file):
-        print(f"Error: Input file {input_file} not found!")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract question and answer pairs from answer files")
+    parser.add_argument("inputs", nargs="*", default=["output/All_Answers.jsonl"],
+                       help="Input JSONL files, optionally compressed (.gz, .bz2, .xz)")
+    parser.add_argument("--output", "-o", default="nelson_mandela_QA.jsonl",
+                       help="Output JSONL file; the JSON array goes next to it as .json")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Processes parsing the input in parallel")
+
+    args = parser.parse_args()
+
+    try:
+        json_array_file = array_path(args.output)
+    except ValueError as e:
+        print(f"Error: {e}")
         return
-    
+
+    # Check if input files exist
+    for input_file in args.inputs:
+        if not os.path.exists(input_file):
+            print(f"Error: Input file {input_file} not found!")
+            return
+
     # Clean the data
-    clean_data(input_file, output_file)
-    
+    stats = clean_data(args.inputs, args.output, workers=args.workers)
+
     # Show some statistics
     print("\n" + "="*50)
     print("CLEANING COMPLETE")
     print("="*50)
-    
-    # Count lines in original and cleaned files
-    with open(input_file, 'r') as f:
-        original_lines = sum(1 for _ in f)
-    
-    with open(output_file, 'r') as f:
-        cleaned_lines = sum(1 for _ in f)
-    
-    print(f"Original file: {original_lines} lines")
-    print(f"Cleaned file: {cleaned_lines} lines")
-    print(f"Files created:")
-    print(f"  - {output_file} (JSONL format)")
-    print(f"  - {output_file.replace('.jsonl', '.json')} (JSON array format)")
+
+    print(f"Original file{'s' if len(args.inputs) > 1 else ''}: {stats['lines']} lines")
+    print(f"Cleaned file: {stats['cleaned']} lines")
+    print(f"Skipped: {stats['missing']} missing question or answer, {stats['errors']} unparseable")
+    print("Files created:")
+    print(f"  - {args.output} (JSONL format)")
+    print(f"  - {json_array_file} (JSON array format)")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
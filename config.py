@@ -1,33 +1,81 @@
 import os
-from dotenv import load_dotenv
-from time import time
-
-load_dotenv()
-
-# API Configuration
-QWEN_AI_KEY = os.getenv("QWEN_AI_KEY")
-QWEN_AI_BASE_URL = os.getenv("QWEN_AI_BASE_URL")
-QWEN_AI_MODEL = os.getenv("QWEN_AI_MODEL", "qwen-plus")
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-CLAUDE_COOKIE = os.getenv("CLAUDE_COOKIE")
-GOOGLE_CSE_API_KEY = os.getenv("GOOGLE_SEARCH_KEY")
-GOOGLE_CSE_ID = os.getenv("GOOGLE_SEARCH_CX")
-LOCAL_AI_MODEL = os.getenv("LOCAL_AI_MODEL", "hf.co/unsloth/Qwen3-30B-A3B-Instruct-2507-GGUF:UD-Q4_K_XL")
-LOCAL_AI_BASE_URL = os.getenv("LOCAL_AI_BASE_URL", "http://localhost:11434/v1")
+import time
+
+# Static settings are plain constants. Settings that come from the environment (.env) and the
+# timestamped OUTPUT_PATH are resolved on first access through __getattr__, so importing config
+# stays cheap and .env is only read when a value is actually needed.
+
+_env_loaded = False
+
+
+def _load_env():
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def env(name: str, default=None):
+    """Read a setting from the environment, loading .env on first use"""
+    _load_env()
+    return os.getenv(name, default)
+
+
+# Environment-backed settings: name -> (variable, default, type)
+_ENV_SETTINGS = {
+    # API Configuration
+    "QWEN_AI_KEY": ("QWEN_AI_KEY", None, str),
+    "QWEN_AI_BASE_URL": ("QWEN_AI_BASE_URL", None, str),
+    "QWEN_AI_MODEL": ("QWEN_AI_MODEL", "qwen-plus", str),
+    "ANTHROPIC_API_KEY": ("ANTHROPIC_API_KEY", None, str),
+    "CLAUDE_COOKIE": ("CLAUDE_COOKIE", None, str),
+    "GOOGLE_CSE_API_KEY": ("GOOGLE_SEARCH_KEY", None, str),
+    "GOOGLE_CSE_ID": ("GOOGLE_SEARCH_CX", None, str),
+    "GOOGLE_CSE_URL": ("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1", str),
+    "LOCAL_AI_MODEL": ("LOCAL_AI_MODEL", "hf.co/unsloth/Qwen3-30B-A3B-Instruct-2507-GGUF:UD-Q4_K_XL", str),
+    "LOCAL_AI_BASE_URL": ("LOCAL_AI_BASE_URL", "http://localhost:11434/v1", str),
+    # Model Configuration
+    "AI_MODEL": ("AI_MODEL", "claude-3-5-sonnet-20241022", str),  # Default to Claude Code SDK model
+    # Processing Configuration
+    "DELAY_BETWEEN_REQUESTS": ("DELAY_BETWEEN_REQUESTS", 1, float),
+    "DELAY_BETWEEN_BATCHES": ("DELAY_BETWEEN_BATCHES", 2, float),
+}
+
+
+def __getattr__(name):
+    if name == "OUTPUT_PATH":
+        value = f"output/answers_{time.time()}.jsonl"
+    elif name in _ENV_SETTINGS:
+        variable, default, cast = _ENV_SETTINGS[name]
+        value = env(variable, default)
+        if value is not None:
+            value = cast(value)
+    else:
+        raise AttributeError(f"module 'config' has no attribute {name!r}")
+    globals()[name] = value  # Resolve once, then behave like a plain constant
+    return value
+
 
 # Model Configuration
-AI_MODEL = os.getenv("AI_MODEL", "claude-3-5-sonnet-20241022")  # Default to Claude Code SDK model
 MAX_TOKENS = 2000
 TEMPERATURE = 0.7
 
 # Processing Configuration
 BATCH_SIZE = 20
-DELAY_BETWEEN_REQUESTS = 1
 MAX_RETRIES = 3
 
+# Pricing in USD per million tokens, used by --plan to project run cost
+BACKEND_PRICING = {
+    "qwen": {"prompt": 0.40, "completion": 1.20},
+    "local": {"prompt": 0.0, "completion": 0.0},
+    "claude_code": {"prompt": 3.00, "completion": 15.00},
+    "claude_login": {"prompt": 0.0, "completion": 0.0},  # Subscription, no per-token cost
+}
+GOOGLE_CSE_PRICE_PER_1000 = 5.0
+
 # File Paths
 DATASET_PATH = "NelsonMandelaFormattedQuestions.json"
-OUTPUT_PATH = f"output/answers_{time()}.jsonl"
 
 # Roleplay Characters
 ROLEPLAY_PROMPTS = {
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Parquet Export for Answer Datasets
+Streams answer outputs (JSONL, compressed JSONL or JSON arrays) into size-bounded Parquet
+shards with a typed Arrow schema, dictionary-encoded repeated fields and zstd compression,
+so training jobs read columns directly instead of re-parsing JSON.
+"""
+
+# pyarrow is imported where it is used so that --help starts quickly
+import glob
+import json
+import os
+import time
+from typing import Dict, Iterator, List
+
+from clean_data import input_format, open_input
+from json_stream import JSONArrayParser
+from serialization import JSONDecodeError, loads
+
+# Columns holding a handful of distinct values, stored once per row group
+DICTIONARY_COLUMNS = ["character", "roleplay_character", "model", "method", "topic", "generation_type"]
+
+# Rows per record batch; each batch becomes one row group
+BATCH_ROWS = 50000
+
+
+def answer_schema():
+    """Arrow schema of an exported answer"""
+    import pyarrow as pa
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("question_id", pa.int64()),
+        ("question", pa.string()),
+        ("answer", pa.string()),
+        ("character", text),
+        ("roleplay_character", text),
+        ("model", text),
+        ("method", text),
+        ("topic", text),
+        ("generation_type", text),
+        ("error", pa.bool_()),
+        ("timestamp", pa.float64()),
+        ("latency_s", pa.float64()),
+        ("prompt_tokens", pa.int64()),
+        ("completion_tokens", pa.int64()),
+    ])
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Records of a .jsonl (optionally .gz/.bz2/.xz) or .json array file, one at a time"""
+    with open_input(path) as f:
+        if input_format(path) == ".json":
+            # Parse the array incrementally instead of loading the whole file
+            parser = JSONArrayParser()
+            while not parser.finished:
+                text = f.read(1 << 20)
+                if not text:
+                    break
+                for item in parser.feed(text):
+                    if isinstance(item, dict):
+                        yield item
+            return
+        for line in f:
+            try:
+                record = loads(line)
+            except JSONDecodeError:
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def to_row(record: Dict) -> Dict:
+    """Map an answer record onto the export schema"""
+    answer = record.get("answer", "")
+    if not isinstance(answer, str):
+        # Same flattening as upload_now.py, kept on json.dumps so both give the same
+        # ASCII-escaped text for a nested answer
+        answer = json.dumps(answer, indent=2)
+    usage = record.get("usage") or {}
+    question_id = record.get("question_id")
+    if isinstance(question_id, str) and question_id.isdigit():
+        question_id = int(question_id)
+    latency = record.get("latency_s")
+    if latency is None and record.get("duration_ms") is not None:
+        latency = record["duration_ms"] / 1000
+    return {
+        "question_id": question_id if isinstance(question_id, int) else None,
+        "question": str(record.get("question", "")),
+        "answer": answer,
+        "character": record.get("character"),
+        "roleplay_character": record.get("roleplay_character"),
+        "model": record.get("model"),
+        "method": record.get("method"),
+        "topic": record.get("topic"),
+        "generation_type": record.get("generation_type"),
+        "error": bool(record.get("error", False)),
+        "timestamp": record.get("timestamp"),
+        "latency_s": latency,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+    }
+
+
+def export_parquet(input_files: List[str], output_dir: str, prefix: str = "train",
+                   shard_mb: float = 256, skip_errors: bool = True) -> List[str]:
+    """Write the answers of input_files to {output_dir}/{prefix}-NNNNN-of-NNNNN.parquet shards of
+    about shard_mb each; returns the shard paths. Records flagged as errors are skipped unless
+    skip_errors is False."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = answer_schema()
+    os.makedirs(output_dir, exist_ok=True)
+    # Unfinished shards of an export that was killed before it could clean up
+    for old_path in glob.glob(os.path.join(glob.escape(output_dir), f"{glob.escape(prefix)}-*.parquet.tmp")):
+        os.remove(old_path)
+    shard_bytes = int(shard_mb * 1024 * 1024)
+    shards = []
+    state = {"writer": None, "file": None}
+
+    def close_shard():
+        if state["writer"]:
+            state["writer"].close()
+            state["file"].close()
+            state["writer"] = None
+
+    def write(rows: List[Dict]):
+        if state["writer"] is None:
+            path = os.path.join(output_dir, f"{prefix}-{len(shards):05d}.parquet.tmp")
+            shards.append(path)
+            state["file"] = open(path, 'wb')
+            state["writer"] = pq.ParquetWriter(state["file"], schema, compression="zstd",
+                                               use_dictionary=DICTIONARY_COLUMNS)
+        state["writer"].write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+        # Row groups are flushed as they are written, so the file offset is the shard size
+        if state["file"].tell() >= shard_bytes:
+            close_shard()
+
+    rows = []
+    skipped = 0
+    dropped_ids = 0
+    try:
+        for path in input_files:
+            for record in read_records(path):
+                if skip_errors and record.get("error"):
+                    skipped += 1
+                    continue
+                row = to_row(record)
+                dropped_ids += row["question_id"] is None and record.get("question_id") is not None
+                rows.append(row)
+                if len(rows) == BATCH_ROWS:
+                    write(rows)
+                    rows = []
+        if rows or not shards:
+            write(rows)
+    except BaseException:
+        # A failed export leaves the earlier shards as they were and no partial ones
+        try:
+            close_shard()
+        finally:
+            for path in shards:
+                if os.path.exists(path):
+                    os.remove(path)
+        raise
+    close_shard()
+
+    # Shards of an earlier export would be read as part of the split; replace them all
+    for old_path in glob.glob(os.path.join(glob.escape(output_dir), f"{glob.escape(prefix)}-*-of-*.parquet")):
+        os.remove(old_path)
+
+    # Name the shards the way dataset hubs expect once their count is known
+    final_paths = []
+    for index, path in enumerate(shards):
+        final_path = os.path.join(output_dir, f"{prefix}-{index:05d}-of-{len(shards):05d}.parquet")
+        os.replace(path, final_path)
+        final_paths.append(final_path)
+    if skipped:
+        print(f"⚠️ Skipped {skipped} answers that recorded an error (use --keep-errors to export them)")
+    if dropped_ids:
+        print(f"⚠️ {dropped_ids} answers had a question_id that is not an integer; exported without one")
+    return final_paths
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export answer outputs to sharded Parquet")
+    parser.add_argument("inputs", nargs="+",
+                       help="Answer files: .jsonl (optionally .gz, .bz2, .xz) or .json arrays")
+    parser.add_argument("--output-dir", "-o", default="output/parquet", help="Directory for the shards")
+    parser.add_argument("--prefix", default="train", help="Shard file name prefix (dataset split)")
+    parser.add_argument("--shard-mb", type=float, default=256, help="Approximate size of each shard in MB")
+    parser.add_argument("--keep-errors", action="store_true", help="Also export answers that recorded an error")
+
+    args = parser.parse_args()
+
+    for input_file in args.inputs:
+        if not os.path.exists(input_file):
+            print(f"❌ Input file {input_file} not found")
+            return
+
+    started = time.perf_counter()
+    shards = export_parquet(args.inputs, args.output_dir, args.prefix, args.shard_mb,
+                            skip_errors=not args.keep_errors)
+
+    import pyarrow.parquet as pq
+    rows = sum(pq.ParquetFile(path).metadata.num_rows for path in shards)
+    input_size = sum(os.path.getsize(path) for path in args.inputs)
+    output_size = sum(os.path.getsize(path) for path in shards)
+    print(f"✅ Exported {rows} answers to {len(shards)} shard(s) in {args.output_dir} "
+          f"in {time.perf_counter() - started:.1f}s")
+    if input_size:
+        print(f"📦 {input_size / 1e6:.1f} MB of input -> {output_size / 1e6:.1f} MB of Parquet "
+              f"({output_size / input_size:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Persistent Question Fingerprints
+SQLite store of every question kept by earlier runs or seeded from existing datasets: an exact
+hash of the normalized text plus the MinHash signature of its content words. The generator
+loads it into a near-duplicate index, so questions we already have are dropped before they
+count towards a run's target.
+"""
+
+# sqlite3 and csv are imported where they are used so that importing the generator stays quick
+import hashlib
+import os
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from metrics import record_cache_lookup
+from serialization import JSONDecodeError, load, loads
+from near_dedup import NearDuplicateIndex, content_words
+
+DEFAULT_FINGERPRINTS_PATH = "output/question_fingerprints.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    digest BLOB PRIMARY KEY,
+    words TEXT NOT NULL,
+    signature BLOB,
+    source TEXT,
+    added REAL
+);
+"""
+
+
+def question_digest(text: str) -> bytes:
+    """Exact fingerprint: normalized the same way as deduplicate_questions"""
+    return hashlib.blake2b(text.lower().strip().encode('utf-8'), digest_size=8).digest()
+
+
+def read_questions(path: str) -> List[str]:
+    """Question texts from a .json, .jsonl, .csv or .txt dataset or output file"""
+    file_ext = path.lower().split('.')[-1]
+    if file_ext == 'jsonl':
+        questions = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = loads(line)
+                except JSONDecodeError:
+                    continue
+                if isinstance(record, dict) and record.get("question"):
+                    questions.append(str(record["question"]))
+        return questions
+    if file_ext == 'json':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = load(f)
+        items = data if isinstance(data, list) else list(data.values())
+        return [str(item.get("question", "")) if isinstance(item, dict) else str(item) for item in items]
+    if file_ext == 'csv':
+        import csv
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            column = next((c for c in ['question', 'Question', 'text', 'Text', 'content', 'Content']
+                           if c in (reader.fieldnames or [])), None)
+            if not column:
+                raise ValueError(f"No question column found in {path}")
+            return [row[column] for row in reader]
+    if file_ext == 'txt':
+        with open(path, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f]
+    raise ValueError(f"Unsupported file format: {file_ext}")
+
+
+class FingerprintIndex(NearDuplicateIndex):
+    """Near-duplicate index backed by a SQLite file: every stored question is loaded on open
+    and every question it keeps is saved. A threshold of 0 checks exact repeats only."""
+
+    def __init__(self, path: str = DEFAULT_FINGERPRINTS_PATH, threshold: float = 0.7,
+                 num_perm: int = 48, seed: int = 1):
+        super().__init__(threshold, num_perm, seed)
+        self.path = path
+        self.near = threshold > 0
+        self._digests = set()
+        self._pending: List[tuple] = []
+        self.known = 0
+        self.saved = 0
+
+        import sqlite3
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Questions are kept on generator worker threads; QuestionGenerator._keep_lock serializes
+        # every filter() and so every write, so the connection may be shared across threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        # Signatures are only valid for the permutations they were computed with
+        layout = {"num_perm": str(num_perm), "seed": str(seed)}
+        stored = dict(self._db.execute("SELECT key, value FROM meta"))
+        if not stored:
+            self._db.executemany("INSERT INTO meta VALUES (?, ?)", layout.items())
+            self._db.commit()
+        self._reuse_signatures = stored in ({}, layout)
+        self.loaded = self._load()
+
+    def _load(self) -> int:
+        count = 0
+        for digest, words, signature in self._db.execute("SELECT digest, words, signature FROM fingerprints"):
+            self._digests.add(digest)
+            count += 1
+            if self.near and words:
+                words = tuple(words.split(" "))
+                if signature and self._reuse_signatures:
+                    self.add_signature(words, array('I', signature))
+                else:
+                    self.add_signature(words, self.signature(words))
+        return count
+
+    def _save(self, rows: List[tuple], source: str):
+        now = time.time()
+        records = []
+        for digest, text in rows:
+            words = content_words(text)
+            signature = array('I', self.signature(words)).tobytes() if words else None
+            records.append((digest, " ".join(words), signature, source, now))
+        self._db.executemany("INSERT OR IGNORE INTO fingerprints VALUES (?, ?, ?, ?, ?)", records)
+        self._db.commit()
+
+    def add(self, text: str):
+        """Index a question in memory without checking or saving it (e.g. resumed questions)"""
+        digest = question_digest(text)
+        if digest not in self._digests:
+            self._digests.add(digest)
+            if self.near:
+                super().add(text)
+
+    def check_and_add(self, text: str) -> Optional[float]:
+        digest = question_digest(text)
+        if digest in self._digests:
+            self.checked += 1
+            self.known += 1
+            self.dropped["1.0"] += 1
+            record_cache_lookup("fingerprints", True)
+            return 1.0
+        record_cache_lookup("fingerprints", False)
+        if self.near:
+            similarity = super().check_and_add(text)
+            if similarity is not None:
+                return similarity
+        else:
+            self.checked += 1
+        self._digests.add(digest)
+        self._pending.append((digest, text))
+        return None
+
+    def filter(self, questions: List[Dict]) -> List[Dict]:
+        """Keep the questions that are new to the store, and save them"""
+        kept = super().filter(questions)
+        if self._pending:
+            self._save(self._pending, "generated")
+            self.saved += len(self._pending)
+            self._pending = []
+        return kept
+
+    def seed(self, path: str) -> int:
+        """Store every question of a dataset that is not stored yet; returns how many were added"""
+        rows = []
+        for text in read_questions(path):
+            if not text or not text.strip():
+                continue
+            digest = question_digest(text)
+            if digest in self._digests:
+                continue
+            self._digests.add(digest)
+            if self.near:
+                super().add(text)
+            rows.append((digest, text))
+        self._save(rows, os.path.basename(path))
+        return len(rows)
+
+    def summary(self) -> str:
+        near = super().summary() if self.near else f"🔍 {sum(self.dropped.values())} exact repeats dropped"
+        return (f"{near}\n📚 Fingerprint store {self.path}: {self.loaded} questions loaded, "
+                f"{self.known} exact repeats of known questions, {self.saved} new questions saved")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Seed or inspect the persistent question fingerprint store")
+    parser.add_argument("--db", default=DEFAULT_FINGERPRINTS_PATH, help="Fingerprint store path")
+    parser.add_argument("--seed", nargs="+", default=[], metavar="FILE",
+                       help="Dataset or output files (.json, .jsonl, .csv, .txt) whose questions to store")
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = FingerprintIndex(args.db, threshold=0)
+    print(f"📚 {args.db}: {index.loaded} questions stored (loaded in {time.perf_counter() - started:.2f}s)")
+    total = index.loaded
+    for path in args.seed:
+        try:
+            added = index.seed(path)
+        except (OSError, ValueError) as e:
+            print(f"❌ {path}: {e}")
+            continue
+        total += added
+        print(f"✅ {path}: {added} new questions stored")
+    if args.seed:
+        print(f"📚 {total} questions in the store")
+
+
+if __name__ == "__main__":
+    main()
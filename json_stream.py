@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON Array Parser
+Pulls complete elements out of a JSON array as text arrives, so a response cut off
+by max_tokens (or still streaming) still yields every object that was finished.
+"""
+
+import json
+from typing import Any, List
+
+_WHITESPACE = " \t\n\r"
+
+
+class JSONArrayParser:
+    """Feed text chunks of a JSON array; each feed() returns the elements completed so far.
+    Text before the opening bracket (prose, a ```json fence) is skipped."""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self.started = False
+        self.finished = False
+        self.items = 0
+
+    def feed(self, text: str) -> List[Any]:
+        if self.finished:
+            return []
+        self._buffer += text
+        if not self.started:
+            start = self._buffer.find("[", self._pos)
+            if start == -1:
+                self._pos = len(self._buffer)
+                return []
+            self.started = True
+            self._pos = start + 1
+
+        items = []
+        buffer = self._buffer
+        while True:
+            # Skip separators between elements
+            pos = self._pos
+            while pos < len(buffer) and (buffer[pos] in _WHITESPACE or buffer[pos] == ","):
+                pos += 1
+            self._pos = pos
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.finished = True
+                self._pos = pos + 1
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element not complete yet
+            # A bare number at the end of the buffer may still be growing
+            if end == len(buffer) and not isinstance(item, (dict, list, str)):
+                break
+            items.append(item)
+            self._pos = end
+
+        # Drop consumed text so long streams do not rescan it
+        if self._pos > 65536:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        self.items += len(items)
+        return items
+
+
+def parse_partial_array(text: str) -> List[Any]:
+    """Every complete element of a JSON array that may be truncated"""
+    return JSONArrayParser().feed(text)
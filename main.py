@@ -4,44 +4,43 @@ Simple AI Q&A Generator with Google Custom Search
 Processes large datasets of questions with roleplay and search integration.
 """
 
-import requests
-import pandas as pd
-import json
+# pandas, requests and tqdm are imported where they are used so that short commands
+# like --list-characters start quickly
 import time
 import os
-from tqdm import tqdm
 from typing import List, Dict
-from config import (
-    QWEN_AI_KEY, QWEN_AI_BASE_URL, QWEN_AI_MODEL,
-    GOOGLE_CSE_API_KEY, GOOGLE_CSE_ID,
-    AI_MODEL, MAX_TOKENS, TEMPERATURE, BATCH_SIZE,
-    ROLEPLAY_PROMPTS, DATASET_PATH, OUTPUT_PATH
-)
+from serialization import dumps, dumps_bytes, load, loads
+from profiling import enable_profiling, stage
+from metrics import track_request, record_usage, start_metrics_server, QUEUE_DEPTH
+import config
+from config import MAX_TOKENS, TEMPERATURE, BATCH_SIZE, ROLEPLAY_PROMPTS, DATASET_PATH
 
 class SimpleQAGenerator:
     def __init__(self):
-        if not QWEN_AI_KEY:
+        if not config.QWEN_AI_KEY:
             raise ValueError("QWEN_AI_KEY required. Set QWEN_AI_KEY in .env file")
         
-        self.api_key = QWEN_AI_KEY
-        self.base_url = QWEN_AI_BASE_URL
-        self.model = QWEN_AI_MODEL
+        self.api_key = config.QWEN_AI_KEY
+        self.base_url = config.QWEN_AI_BASE_URL
+        self.model = config.QWEN_AI_MODEL
     
     def google_search(self, query: str, max_results: int = 5) -> List[Dict]:
         """Search using Google Custom Search API"""
         try:
-            url = "https://www.googleapis.com/customsearch/v1"
+            url = config.GOOGLE_CSE_URL
             params = {
-                'key': GOOGLE_CSE_API_KEY,
-                'cx': GOOGLE_CSE_ID,
+                'key': config.GOOGLE_CSE_API_KEY,
+                'cx': config.GOOGLE_CSE_ID,
                 'q': query,
                 'num': min(max_results, 10)  # Google CSE max is 10
             }
             
-            response = requests.get(url, params=params)
-            response.raise_for_status()
+            import requests
+            with track_request("google_cse"), stage("request"):
+                response = requests.get(url, params=params)
+                response.raise_for_status()
             
-            data = response.json()
+            data = loads(response.content)
             results = []
             
             if 'items' in data:
@@ -94,30 +93,37 @@ Provide your response as {character_name}:"""
 
         # Generate response using Qwen AI
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            with stage("prompt_build"):
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
             
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": system_prompt}
-                ],
-                "max_tokens": MAX_TOKENS,
-                "temperature": TEMPERATURE
-            }
+                payload = {
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt}
+                    ],
+                    "max_tokens": MAX_TOKENS,
+                    "temperature": TEMPERATURE
+                }
+                body = dumps_bytes(payload)
             
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
+            import requests
+            request_started = time.perf_counter()
+            with track_request("qwen"), stage("request"):
+                response = requests.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    data=body,
+                    timeout=60
+                )
+                response.raise_for_status()
             
-            data = response.json()
-            answer = data['choices'][0]['message']['content'].strip()
+            with stage("parse"):
+                data = loads(response.content)
+                answer = data['choices'][0]['message']['content'].strip()
+            record_usage("qwen", data.get('usage'))
             
             return {
                 "question": question,
@@ -126,6 +132,8 @@ Provide your response as {character_name}:"""
                 "roleplay_character": character,
                 "search_results": search_results,
                 "timestamp": time.time(),
+                "latency_s": round(time.perf_counter() - request_started, 3),
+                "usage": data.get('usage'),
                 "model": self.model
             }
             
@@ -139,7 +147,8 @@ Provide your response as {character_name}:"""
                 "timestamp": time.time()
             }
     
-    def load_dataset(self, file_path: str) -> List[Dict]:
+    @staticmethod
+    def load_dataset(file_path: str) -> List[Dict]:
         """Load dataset from various formats"""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Dataset file not found: {file_path}")
@@ -147,6 +156,7 @@ Provide your response as {character_name}:"""
         file_ext = file_path.lower().split('.')[-1]
         
         if file_ext == 'csv':
+            import pandas as pd
             df = pd.read_csv(file_path)
             # Find question column
             question_col = None
@@ -169,7 +179,7 @@ Provide your response as {character_name}:"""
         
         elif file_ext == 'json':
             with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = load(f)
             
             if isinstance(data, list):
                 return [{"id": i, "question": str(item.get("question", item))} for i, item in enumerate(data)]
@@ -189,9 +199,9 @@ Provide your response as {character_name}:"""
         """Save answers to JSONL file"""
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        with open(output_path, 'a', encoding='utf-8') as f:
+        with stage("save"), open(output_path, 'a', encoding='utf-8') as f:
             for answer in answers:
-                f.write(json.dumps(answer, ensure_ascii=False) + '\n')
+                f.write(dumps(answer) + '\n')
         
         print(f"✅ Saved {len(answers)} answers to {output_path}")
     
@@ -199,9 +209,11 @@ Provide your response as {character_name}:"""
                        start_from: int = 0, max_questions: int = None,
                        include_search: bool = True) -> List[Dict]:
         """Process the entire dataset"""
+        from tqdm import tqdm
         
         print(f"🚀 Loading dataset: {dataset_path}")
-        questions = self.load_dataset(dataset_path)
+        with stage("load"):
+            questions = self.load_dataset(dataset_path)
         
         # Apply limits
         if start_from > 0:
@@ -217,10 +229,12 @@ Provide your response as {character_name}:"""
         print(f"🤖 Using model: {self.model}")
         
         answers = []
+        saved = 0
         
         try:
             for i, question_data in enumerate(tqdm(questions, desc="Processing questions")):
                 question = question_data["question"]
+                QUEUE_DEPTH.set(len(questions) - i - 1, stage="answer")
                 
                 if not question or len(question.strip()) < 10:
                     continue
@@ -239,21 +253,24 @@ Provide your response as {character_name}:"""
                 
                 # Save progress every 50 questions
                 if (i + 1) % 50 == 0:
-                    temp_path = f"{OUTPUT_PATH}.temp"
-                    self.save_answers(answers, temp_path)
+                    # Append only the answers since the last checkpoint, so the temp file
+                    # holds each answer once and can be followed while the run writes it
+                    temp_path = f"{config.OUTPUT_PATH}.temp"
+                    self.save_answers(answers[saved:], temp_path)
+                    saved = len(answers)
                     print(f"💾 Progress saved: {i + 1}/{len(questions)} questions")
                 
                 # Rate limiting
-                time.sleep(1)
+                time.sleep(config.DELAY_BETWEEN_REQUESTS)
         
         except KeyboardInterrupt:
             print("\n⚠️ Process interrupted by user")
             if answers:
-                self.save_answers(answers, f"{OUTPUT_PATH}.interrupted")
+                self.save_answers(answers, f"{config.OUTPUT_PATH}.interrupted")
             return answers
         
         # Save final results
-        self.save_answers(answers, OUTPUT_PATH)
+        self.save_answers(answers, config.OUTPUT_PATH)
         print(f"🎉 Completed! Generated {len(answers)} answers")
         
         return answers
@@ -268,14 +285,21 @@ def main():
     parser.add_argument("--start-from", type=int, default=0, help="Start from question number")
     parser.add_argument("--max-questions", type=int, help="Maximum questions to process")
     parser.add_argument("--list-characters", action="store_true", help="List available characters")
+    parser.add_argument("--metrics-port", type=int, help="Expose live run metrics on this local port")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PREFIX",
+                       help="Profile each pipeline stage and write a report and flamegraph stacks")
+    parser.add_argument("--plan", action="store_true",
+                       help="Estimate wall-clock time, tokens and cost without calling any backend")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel requests assumed by --plan")
+    parser.add_argument("--rate-limit", type=float, help="Provider requests per minute assumed by --plan")
     
     args = parser.parse_args()
     
     # List characters
     if args.list_characters:
         print("🎭 Available characters:")
-        for key, config in ROLEPLAY_PROMPTS.items():
-            print(f"   {key}: {config['name']}")
+        for key, prompt in ROLEPLAY_PROMPTS.items():
+            print(f"   {key}: {prompt['name']}")
         return
     
     # Validate character
@@ -284,6 +308,20 @@ def main():
         print(f"Available: {', '.join(ROLEPLAY_PROMPTS.keys())}")
         return
     
+    # Dry run: estimate the run from the dataset and past telemetry
+    if args.plan:
+        from planner import print_plan
+        print_plan(SimpleQAGenerator.load_dataset, args.dataset, args.character, "qwen" if args.no_search else "qwen_search",
+                   start_from=args.start_from, max_questions=args.max_questions,
+                   concurrency=args.concurrency, rate_limit=args.rate_limit)
+        return
+    
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    
+    if args.profile is not None:
+        enable_profiling(args.profile or None)
+    
     # Process dataset
     try:
         generator = SimpleQAGenerator()
@@ -5,27 +5,25 @@ Processes large datasets of questions with roleplay using Claude Code SDK.
 Uses the official Claude Code SDK for agentic capabilities.
 """
 
-import pandas as pd
-import json
+# claude_code_sdk, anyio, asyncio, pandas and tqdm are imported where they are used so that
+# short commands like --list-characters start quickly
 import time
 import os
-import anyio
-import asyncio
-from tqdm import tqdm
 from typing import List, Dict
 from pathlib import Path
-from claude_code_sdk import query, ClaudeCodeOptions, Message
-from config import (
-    ANTHROPIC_API_KEY, AI_MODEL, MAX_TOKENS, TEMPERATURE, BATCH_SIZE,
-    ROLEPLAY_PROMPTS, DATASET_PATH, OUTPUT_PATH
-)
+from serialization import JSONDecodeError, dumps, load, loads
+from profiling import enable_profiling, stage
+from metrics import track_request, record_usage, start_metrics_server, QUEUE_DEPTH
+import config
+from config import MAX_TOKENS, TEMPERATURE, BATCH_SIZE, ROLEPLAY_PROMPTS, DATASET_PATH
 
 class ClaudeCodeQAGenerator:
     def __init__(self):
-        self.model = AI_MODEL
+        self.model = config.AI_MODEL
     
     async def generate_answer(self, question: str, character: str = "default") -> Dict:
         """Generate AI answer using Claude Code SDK"""
+        from claude_code_sdk import query, ClaudeCodeOptions, Message
         
         # Get character config
         char_config = ROLEPLAY_PROMPTS.get(character, ROLEPLAY_PROMPTS["default"])
@@ -67,36 +65,38 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
             result_text = ""
             session_id = None
             
-            # Use Claude Code SDK to process the question
-            async for message in query(
-                prompt=f"Answer as {character_name}. conversational style. clear and concise. Use web search if needed. output is json: ```question: {question}```",
-                options=options
-            ):
-                messages.append(message)
+            with track_request("claude_code"), stage("request"):
+                # Use Claude Code SDK to process the question
+                async for message in query(
+                    prompt=f"Answer as {character_name}. conversational style. clear and concise. Use web search if needed. output is json: ```question: {question}```",
+                    options=options
+                ):
+                    messages.append(message)
                 
-                # Extract session ID from system message
-                if hasattr(message, 'type') and message.type == "system" and hasattr(message, 'subtype') and message.subtype == "init":
-                    session_id = message.session_id
+                    # Extract session ID from system message
+                    if hasattr(message, 'type') and message.type == "system" and hasattr(message, 'subtype') and message.subtype == "init":
+                        session_id = message.session_id
                 
-                # Extract the final result using the proven method from test file
-                if type(message).__name__ == "ResultMessage":
-                    result = getattr(message, "result", None)
-                    if result:
-                        # Extract JSON from the result using regex
-                        import re
-                        match = re.search(r"```json\s*(\{.*?\})\s*```", result, re.DOTALL)
-                        if match:
-                            json_text = match.group(1)
-                            try:
-                                # Parse the JSON and extract just the answer
-                                json_data = json.loads(json_text)
-                                result_text = json_data.get("answer", json_text)
-                            except json.JSONDecodeError:
-                                result_text = json_text
-                        else:
-                            # If no JSON block found, use the full result
-                            result_text = result
-                        break
+                    # Extract the final result using the proven method from test file
+                    if type(message).__name__ == "ResultMessage":
+                        result = getattr(message, "result", None)
+                        if result:
+                            # Extract JSON from the result using regex
+                            import re
+                            match = re.search(r"```json\s*(\{.*?\})\s*```", result, re.DOTALL)
+                            if match:
+                                json_text = match.group(1)
+                                try:
+                                    # Parse the JSON and extract just the answer
+                                    json_data = loads(json_text)
+                                    result_text = json_data.get("answer", json_text)
+                                except JSONDecodeError:
+                                    result_text = json_text
+                            else:
+                                # If no JSON block found, use the full result
+                                result_text = result
+                            break
+            record_usage("claude_code", getattr(messages[-1], 'usage', None) if messages else None)
             
             # # Print progress
             # if result_text:
@@ -130,7 +130,8 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
                 "method": "claude_code_sdk"
             }
     
-    def load_dataset(self, file_path: str) -> List[Dict]:
+    @staticmethod
+    def load_dataset(file_path: str) -> List[Dict]:
         """Load dataset from various formats"""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Dataset file not found: {file_path}")
@@ -138,6 +139,7 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         file_ext = file_path.lower().split('.')[-1]
         
         if file_ext == 'csv':
+            import pandas as pd
             df = pd.read_csv(file_path)
             # Find question column
             question_col = None
@@ -160,7 +162,7 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         
         elif file_ext == 'json':
             with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = load(f)
             
             if isinstance(data, list):
                 return [{"id": i, "question": str(item.get("question", item))} for i, item in enumerate(data)]
@@ -180,18 +182,21 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         """Save answers to JSONL file"""
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        with open(output_path, 'a', encoding='utf-8') as f:
+        with stage("save"), open(output_path, 'a', encoding='utf-8') as f:
             for answer in answers:
-                f.write(json.dumps(answer, ensure_ascii=False) + '\n')
+                f.write(dumps(answer) + '\n')
         
         print(f"✅ Saved {len(answers)} answers to {output_path}")
     
     async def process_dataset_async(self, dataset_path: str, character: str = "default", 
                                    start_from: int = 0, max_questions: int = None) -> List[Dict]:
         """Process the entire dataset using Claude Code SDK"""
+        import anyio
+        from tqdm import tqdm
         
         print(f"🚀 Loading dataset: {dataset_path}")
-        questions = self.load_dataset(dataset_path)
+        with stage("load"):
+            questions = self.load_dataset(dataset_path)
         
         # Apply limits
         if start_from > 0:
@@ -207,10 +212,12 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         print(f"🤖 Using model: {self.model}")
         
         answers = []
+        saved = 0
         
         try:
             for i, question_data in enumerate(tqdm(questions, desc="Processing questions")):
                 question = question_data["question"]
+                QUEUE_DEPTH.set(len(questions) - i - 1, stage="answer")
                 
                 if not question or len(question.strip()) < 10:
                     continue
@@ -228,8 +235,11 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
                 
                 # Save progress every 50 questions
                 if (i + 1) % 50 == 0:
-                    temp_path = f"{OUTPUT_PATH}.temp"
-                    self.save_answers(answers, temp_path)
+                    # Append only the answers since the last checkpoint, so the temp file
+                    # holds each answer once and can be followed while the run writes it
+                    temp_path = f"{config.OUTPUT_PATH}.temp"
+                    self.save_answers(answers[saved:], temp_path)
+                    saved = len(answers)
                     print(f"💾 Progress saved: {i + 1}/{len(questions)} questions")
                 
                 # Rate limiting
@@ -238,11 +248,11 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         except KeyboardInterrupt:
             print("\n⚠️ Process interrupted by user")
             if answers:
-                self.save_answers(answers, f"{OUTPUT_PATH}.interrupted")
+                self.save_answers(answers, f"{config.OUTPUT_PATH}.interrupted")
             return answers
         
         # Save final results
-        self.save_answers(answers, OUTPUT_PATH)
+        self.save_answers(answers, config.OUTPUT_PATH)
         print(f"🎉 Completed! Generated {len(answers)} answers using Claude Code SDK")
         
         return answers
@@ -250,6 +260,7 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
     def process_dataset(self, dataset_path: str, character: str = "default", 
                        start_from: int = 0, max_questions: int = None) -> List[Dict]:
         """Synchronous wrapper for async processing"""
+        import asyncio
         return asyncio.run(self.process_dataset_async(
             dataset_path=dataset_path,
             character=character,
@@ -266,14 +277,21 @@ def main():
     parser.add_argument("--start-from", type=int, default=0, help="Start from question number")
     parser.add_argument("--max-questions", type=int, help="Maximum questions to process")
     parser.add_argument("--list-characters", action="store_true", help="List available characters")
+    parser.add_argument("--metrics-port", type=int, help="Expose live run metrics on this local port")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PREFIX",
+                       help="Profile each pipeline stage and write a report and flamegraph stacks")
+    parser.add_argument("--plan", action="store_true",
+                       help="Estimate wall-clock time, tokens and cost without calling any backend")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel requests assumed by --plan")
+    parser.add_argument("--rate-limit", type=float, help="Provider requests per minute assumed by --plan")
     
     args = parser.parse_args()
     
     # List characters
     if args.list_characters:
         print("🎭 Available characters:")
-        for key, config in ROLEPLAY_PROMPTS.items():
-            print(f"   {key}: {config['name']}")
+        for key, prompt in ROLEPLAY_PROMPTS.items():
+            print(f"   {key}: {prompt['name']}")
         return
     
     # Validate character
@@ -282,6 +300,20 @@ def main():
         print(f"Available: {', '.join(ROLEPLAY_PROMPTS.keys())}")
         return
     
+    # Dry run: estimate the run from the dataset and past telemetry
+    if args.plan:
+        from planner import print_plan
+        print_plan(ClaudeCodeQAGenerator.load_dataset, args.dataset, args.character, "claude_code",
+                   start_from=args.start_from, max_questions=args.max_questions,
+                   concurrency=args.concurrency, rate_limit=args.rate_limit)
+        return
+    
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    
+    if args.profile is not None:
+        enable_profiling(args.profile or None)
+    
     # Process dataset
     try:
         generator = ClaudeCodeQAGenerator()
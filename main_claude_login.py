@@ -5,25 +5,25 @@ Processes large datasets of questions with roleplay using Claude with cookie-bas
 Uses claude-api package for login-based access to Claude.
 """
 
-import pandas as pd
-import json
+# claude_api, pandas and tqdm are imported where they are used so that short commands
+# like --list-characters start quickly
 import time
 import os
-from tqdm import tqdm
 from typing import List, Dict
-from claude_api import Client
-from config import (
-    CLAUDE_COOKIE, AI_MODEL, MAX_TOKENS, TEMPERATURE, BATCH_SIZE,
-    ROLEPLAY_PROMPTS, DATASET_PATH, OUTPUT_PATH
-)
+from serialization import dumps, load
+from profiling import enable_profiling, stage
+from metrics import track_request, start_metrics_server, QUEUE_DEPTH
+import config
+from config import MAX_TOKENS, TEMPERATURE, BATCH_SIZE, ROLEPLAY_PROMPTS, DATASET_PATH
 
 class ClaudeLoginQAGenerator:
     def __init__(self):
-        if not CLAUDE_COOKIE:
+        if not config.CLAUDE_COOKIE:
             raise ValueError("CLAUDE_COOKIE required. Set CLAUDE_COOKIE in .env file")
         
-        self.client = Client(CLAUDE_COOKIE)
-        self.model = AI_MODEL
+        from claude_api import Client
+        self.client = Client(config.CLAUDE_COOKIE)
+        self.model = config.AI_MODEL
     
     def generate_answer(self, question: str, character: str = "default") -> Dict:
         """Generate AI answer using Claude with cookie-based authentication"""
@@ -57,15 +57,17 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
 
         # Generate response using Claude with cookie authentication
         try:
-            # Create a new conversation for each question
-            conversation_id = self.client.create_new_chat()
-            
-            # Send the message
-            response = self.client.send_message(
-                prompt=f"Please answer this question as {character_name}: {question}",
-                conversation_id=conversation_id,
-                timeout=120
-            )
+            request_started = time.perf_counter()
+            with track_request("claude_login"), stage("request"):
+                # Create a new conversation for each question
+                conversation_id = self.client.create_new_chat()
+                
+                # Send the message
+                response = self.client.send_message(
+                    prompt=f"Please answer this question as {character_name}: {question}",
+                    conversation_id=conversation_id,
+                    timeout=120
+                )
             
             answer = response.strip()
             
@@ -81,6 +83,7 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
                 "character": character_name,
                 "roleplay_character": character,
                 "timestamp": time.time(),
+                "latency_s": round(time.perf_counter() - request_started, 3),
                 "model": "claude-web",
                 "method": "claude_login",
                 "conversation_id": conversation_id
@@ -97,7 +100,8 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
                 "method": "claude_login"
             }
     
-    def load_dataset(self, file_path: str) -> List[Dict]:
+    @staticmethod
+    def load_dataset(file_path: str) -> List[Dict]:
         """Load dataset from various formats"""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Dataset file not found: {file_path}")
@@ -105,6 +109,7 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         file_ext = file_path.lower().split('.')[-1]
         
         if file_ext == 'csv':
+            import pandas as pd
             df = pd.read_csv(file_path)
             # Find question column
             question_col = None
@@ -127,7 +132,7 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         
         elif file_ext == 'json':
             with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = load(f)
             
             if isinstance(data, list):
                 return [{"id": i, "question": str(item.get("question", item))} for i, item in enumerate(data)]
@@ -147,18 +152,20 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         """Save answers to JSONL file"""
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        with open(output_path, 'a', encoding='utf-8') as f:
+        with stage("save"), open(output_path, 'a', encoding='utf-8') as f:
             for answer in answers:
-                f.write(json.dumps(answer, ensure_ascii=False) + '\n')
+                f.write(dumps(answer) + '\n')
         
         print(f"✅ Saved {len(answers)} answers to {output_path}")
     
     def process_dataset(self, dataset_path: str, character: str = "default", 
                        start_from: int = 0, max_questions: int = None) -> List[Dict]:
         """Process the entire dataset using Claude with login authentication"""
+        from tqdm import tqdm
         
         print(f"🚀 Loading dataset: {dataset_path}")
-        questions = self.load_dataset(dataset_path)
+        with stage("load"):
+            questions = self.load_dataset(dataset_path)
         
         # Apply limits
         if start_from > 0:
@@ -174,10 +181,12 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         print(f"🤖 Using model: {self.model}")
         
         answers = []
+        saved = 0
         
         try:
             for i, question_data in enumerate(tqdm(questions, desc="Processing questions")):
                 question = question_data["question"]
+                QUEUE_DEPTH.set(len(questions) - i - 1, stage="answer")
                 
                 if not question or len(question.strip()) < 10:
                     continue
@@ -195,8 +204,11 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
                 
                 # Save progress every 50 questions
                 if (i + 1) % 50 == 0:
-                    temp_path = f"{OUTPUT_PATH}.temp"
-                    self.save_answers(answers, temp_path)
+                    # Append only the answers since the last checkpoint, so the temp file
+                    # holds each answer once and can be followed while the run writes it
+                    temp_path = f"{config.OUTPUT_PATH}.temp"
+                    self.save_answers(answers[saved:], temp_path)
+                    saved = len(answers)
                     print(f"💾 Progress saved: {i + 1}/{len(questions)} questions")
                 
                 # Rate limiting
@@ -205,11 +217,11 @@ Please provide a comprehensive answer as {character_name}, using your capabiliti
         except KeyboardInterrupt:
             print("\n⚠️ Process interrupted by user")
             if answers:
-                self.save_answers(answers, f"{OUTPUT_PATH}.interrupted")
+                self.save_answers(answers, f"{config.OUTPUT_PATH}.interrupted")
             return answers
         
         # Save final results
-        self.save_answers(answers, OUTPUT_PATH)
+        self.save_answers(answers, config.OUTPUT_PATH)
         print(f"🎉 Completed! Generated {len(answers)} answers using Claude with login")
         
         return answers
@@ -223,14 +235,21 @@ def main():
     parser.add_argument("--start-from", type=int, default=0, help="Start from question number")
     parser.add_argument("--max-questions", type=int, help="Maximum questions to process")
     parser.add_argument("--list-characters", action="store_true", help="List available characters")
+    parser.add_argument("--metrics-port", type=int, help="Expose live run metrics on this local port")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PREFIX",
+                       help="Profile each pipeline stage and write a report and flamegraph stacks")
+    parser.add_argument("--plan", action="store_true",
+                       help="Estimate wall-clock time, tokens and cost without calling any backend")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel requests assumed by --plan")
+    parser.add_argument("--rate-limit", type=float, help="Provider requests per minute assumed by --plan")
     
     args = parser.parse_args()
     
     # List characters
     if args.list_characters:
         print("🎭 Available characters:")
-        for key, config in ROLEPLAY_PROMPTS.items():
-            print(f"   {key}: {config['name']}")
+        for key, prompt in ROLEPLAY_PROMPTS.items():
+            print(f"   {key}: {prompt['name']}")
         return
     
     # Validate character
@@ -239,6 +258,20 @@ def main():
         print(f"Available: {', '.join(ROLEPLAY_PROMPTS.keys())}")
         return
     
+    # Dry run: estimate the run from the dataset and past telemetry
+    if args.plan:
+        from planner import print_plan
+        print_plan(ClaudeLoginQAGenerator.load_dataset, args.dataset, args.character, "claude_login",
+                   start_from=args.start_from, max_questions=args.max_questions,
+                   concurrency=args.concurrency, rate_limit=args.rate_limit)
+        return
+    
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    
+    if args.profile is not None:
+        enable_profiling(args.profile or None)
+    
     # Process dataset
     try:
         generator = ClaudeLoginQAGenerator()
@@ -5,26 +5,23 @@ Processes large datasets of questions with roleplay using only the model's inter
 Optimized prompts designed to access deep layers of the model's knowledge base.
 """
 
-import requests
-import pandas as pd
-import json
+# pandas, requests and tqdm are imported where they are used so that short commands
+# like --list-characters start quickly
 import time
 import os
-from tqdm import tqdm
 from typing import List, Dict
-from config import (
-    QWEN_AI_KEY, QWEN_AI_BASE_URL, QWEN_AI_MODEL,
-    AI_MODEL, MAX_TOKENS, TEMPERATURE, BATCH_SIZE,
-    ROLEPLAY_PROMPTS, DATASET_PATH, OUTPUT_PATH,
-    LOCAL_AI_MODEL, LOCAL_AI_BASE_URL
-)
+from serialization import dumps, dumps_bytes, load, loads
+from profiling import enable_profiling, stage
+from metrics import track_request, record_usage, start_metrics_server, QUEUE_DEPTH
+import config
+from config import MAX_TOKENS, TEMPERATURE, BATCH_SIZE, ROLEPLAY_PROMPTS, DATASET_PATH
 
 class LLMOnlyQAGenerator:
     def __init__(self):
         
         self.api_key = "hf_QZqYQZqYQZqYQZqYQZqYQZqYQZqYQZqY"
-        self.base_url = LOCAL_AI_BASE_URL
-        self.model = LOCAL_AI_MODEL
+        self.base_url = config.LOCAL_AI_BASE_URL
+        self.model = config.LOCAL_AI_MODEL
     
     def generate_answer(self, question: str, character: str = "default") -> Dict:
         """Generate AI answer using only the model's internal knowledge with optimized prompts"""
@@ -65,30 +62,37 @@ class LLMOnlyQAGenerator:
 
         # Generate response using Qwen AI
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            with stage("prompt_build"):
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
             
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": system_prompt}
-                ],
-                "max_tokens": MAX_TOKENS,
-                "temperature": TEMPERATURE
-            }
+                payload = {
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt}
+                    ],
+                    "max_tokens": MAX_TOKENS,
+                    "temperature": TEMPERATURE
+                }
+                body = dumps_bytes(payload)
             
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
+            import requests
+            request_started = time.perf_counter()
+            with track_request("local"), stage("request"):
+                response = requests.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    data=body,
+                    timeout=60
+                )
+                response.raise_for_status()
             
-            data = response.json()
-            answer = data['choices'][0]['message']['content'].strip()
+            with stage("parse"):
+                data = loads(response.content)
+                answer = data['choices'][0]['message']['content'].strip()
+            record_usage("local", data.get('usage'))
             
             return {
                 "question": question,
@@ -96,6 +100,8 @@ class LLMOnlyQAGenerator:
                 "character": character_name,
                 "roleplay_character": character,
                 "timestamp": time.time(),
+                "latency_s": round(time.perf_counter() - request_started, 3),
+                "usage": data.get('usage'),
                 "model": self.model,
                 "method": "llm_only"
             }
@@ -111,7 +117,8 @@ class LLMOnlyQAGenerator:
                 "method": "llm_only"
             }
     
-    def load_dataset(self, file_path: str) -> List[Dict]:
+    @staticmethod
+    def load_dataset(file_path: str) -> List[Dict]:
         """Load dataset from various formats"""
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Dataset file not found: {file_path}")
@@ -119,6 +126,7 @@ class LLMOnlyQAGenerator:
         file_ext = file_path.lower().split('.')[-1]
         
         if file_ext == 'csv':
+            import pandas as pd
             df = pd.read_csv(file_path)
             # Find question column
             question_col = None
@@ -141,7 +149,7 @@ class LLMOnlyQAGenerator:
         
         elif file_ext == 'json':
             with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                data = load(f)
             
             if isinstance(data, list):
                 return [{"id": i, "question": str(item.get("question", item))} for i, item in enumerate(data)]
@@ -161,18 +169,20 @@ class LLMOnlyQAGenerator:
         """Save answers to JSONL file"""
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        with open(output_path, 'a', encoding='utf-8') as f:
+        with stage("save"), open(output_path, 'a', encoding='utf-8') as f:
             for answer in answers:
-                f.write(json.dumps(answer, ensure_ascii=False) + '\n')
+                f.write(dumps(answer) + '\n')
         
         print(f"✅ Saved {len(answers)} answers to {output_path}")
     
     def process_dataset(self, dataset_path: str, character: str = "default", 
                        start_from: int = 0, max_questions: int = None) -> List[Dict]:
         """Process the entire dataset using only LLM knowledge"""
+        from tqdm import tqdm
         
         print(f"🚀 Loading dataset: {dataset_path}")
-        questions = self.load_dataset(dataset_path)
+        with stage("load"):
+            questions = self.load_dataset(dataset_path)
         
         # Apply limits
         if start_from > 0:
@@ -188,10 +198,12 @@ class LLMOnlyQAGenerator:
         print(f"🤖 Using model: {self.model}")
         
         answers = []
+        saved = 0
         
         try:
             for i, question_data in enumerate(tqdm(questions, desc="Processing questions")):
                 question = question_data["question"]
+                QUEUE_DEPTH.set(len(questions) - i - 1, stage="answer")
                 
                 if not question or len(question.strip()) < 10:
                     continue
@@ -209,21 +221,24 @@ class LLMOnlyQAGenerator:
                 
                 # Save progress every 50 questions
                 if (i + 1) % 50 == 0:
-                    temp_path = f"{OUTPUT_PATH}.temp"
-                    self.save_answers(answers, temp_path)
+                    # Append only the answers since the last checkpoint, so the temp file
+                    # holds each answer once and can be followed while the run writes it
+                    temp_path = f"{config.OUTPUT_PATH}.temp"
+                    self.save_answers(answers[saved:], temp_path)
+                    saved = len(answers)
                     print(f"💾 Progress saved: {i + 1}/{len(questions)} questions")
                 
                 # Rate limiting
-                time.sleep(1)
+                time.sleep(config.DELAY_BETWEEN_REQUESTS)
         
         except KeyboardInterrupt:
             print("\n⚠️ Process interrupted by user")
             if answers:
-                self.save_answers(answers, f"{OUTPUT_PATH}.interrupted")
+                self.save_answers(answers, f"{config.OUTPUT_PATH}.interrupted")
             return answers
         
         # Save final results
-        self.save_answers(answers, OUTPUT_PATH)
+        self.save_answers(answers, config.OUTPUT_PATH)
         print(f"🎉 Completed! Generated {len(answers)} answers using LLM-only mode")
         
         return answers
@@ -237,14 +252,21 @@ def main():
     parser.add_argument("--start-from", type=int, default=0, help="Start from question number")
     parser.add_argument("--max-questions", type=int, help="Maximum questions to process")
     parser.add_argument("--list-characters", action="store_true", help="List available characters")
+    parser.add_argument("--metrics-port", type=int, help="Expose live run metrics on this local port")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PREFIX",
+                       help="Profile each pipeline stage and write a report and flamegraph stacks")
+    parser.add_argument("--plan", action="store_true",
+                       help="Estimate wall-clock time, tokens and cost without calling any backend")
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel requests assumed by --plan")
+    parser.add_argument("--rate-limit", type=float, help="Provider requests per minute assumed by --plan")
     
     args = parser.parse_args()
     
     # List characters
     if args.list_characters:
         print("🎭 Available characters:")
-        for key, config in ROLEPLAY_PROMPTS.items():
-            print(f"   {key}: {config['name']}")
+        for key, prompt in ROLEPLAY_PROMPTS.items():
+            print(f"   {key}: {prompt['name']}")
         return
     
     # Validate character
@@ -253,6 +275,20 @@ def main():
         print(f"Available: {', '.join(ROLEPLAY_PROMPTS.keys())}")
         return
     
+    # Dry run: estimate the run from the dataset and past telemetry
+    if args.plan:
+        from planner import print_plan
+        print_plan(LLMOnlyQAGenerator.load_dataset, args.dataset, args.character, "local",
+                   start_from=args.start_from, max_questions=args.max_questions,
+                   concurrency=args.concurrency, rate_limit=args.rate_limit)
+        return
+    
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    
+    if args.profile is not None:
+        enable_profiling(args.profile or None)
+    
     # Process dataset
     try:
         generator = LLMOnlyQAGenerator()
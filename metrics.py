@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Live Run Metrics
+Keeps in-process counters, gauges and histograms for the runners and serves them
+in the Prometheus text exposition format on a local /metrics endpoint.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds - local models and web backends both take seconds to minutes
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# Window used for the completions/s and tokens/s gauges
+RATE_WINDOW_SECONDS = 60
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(label_names: Tuple[str, ...], key: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, key)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: List[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in items]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class RollingRate(Metric):
+    """Gauge reporting events per second over the last RATE_WINDOW_SECONDS"""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_names: List[str] = (),
+                 window: float = RATE_WINDOW_SECONDS):
+        super().__init__(name, help_text, label_names)
+        self.window = window
+        self._events: Dict[Tuple[str, ...], deque] = {}
+
+    def add(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        now = time.monotonic()
+        with self._lock:
+            self._events.setdefault(key, deque()).append((now, amount))
+
+    def samples(self) -> List[str]:
+        cutoff = time.monotonic() - self.window
+        lines = []
+        with self._lock:
+            for key, events in self._events.items():
+                while events and events[0][0] < cutoff:
+                    events.popleft()
+                total = sum(amount for _, amount in events)
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {total / self.window:.6f}")
+        return lines
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: List[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0, 0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()]
+        for key, (bucket_counts, count, total) in items:
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            inf_labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total}")
+        return lines
+
+
+class CacheHitRatio(Metric):
+    """Gauge derived from the cache lookup counter at scrape time"""
+    metric_type = "gauge"
+
+    def __init__(self, name: str, help_text: str, lookups: Counter):
+        super().__init__(name, help_text, ["cache"])
+        self.lookups = lookups
+
+    def samples(self) -> List[str]:
+        totals: Dict[str, List[float]] = {}
+        with self.lookups._lock:
+            for (cache, result), value in self.lookups._values.items():
+                hits_and_total = totals.setdefault(cache, [0, 0])
+                hits_and_total[1] += value
+                if result == "hit":
+                    hits_and_total[0] += value
+        return [
+            f"{self.name}{_format_labels(self.label_names, (cache,))} {hits / total:.6f}"
+            for cache, (hits, total) in totals.items() if total
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "qa_requests_in_flight", "Backend requests currently in flight", ["backend"]))
+COMPLETIONS = REGISTRY.register(Counter(
+    "qa_completions_total", "Backend requests completed successfully", ["backend"]))
+COMPLETIONS_PER_SECOND = REGISTRY.register(RollingRate(
+    "qa_completions_per_second", f"Completions per second over the last {RATE_WINDOW_SECONDS}s", ["backend"]))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "qa_request_latency_seconds", "Backend request latency in seconds", ["backend"]))
+TOKENS = REGISTRY.register(Counter(
+    "qa_tokens_total", "Tokens reported by the backend", ["backend", "kind"]))
+TOKENS_PER_SECOND = REGISTRY.register(RollingRate(
+    "qa_tokens_per_second", f"Tokens per second over the last {RATE_WINDOW_SECONDS}s", ["backend", "kind"]))
+ERRORS = REGISTRY.register(Counter(
+    "qa_request_errors_total", "Backend requests that failed", ["backend", "reason"]))
+RETRIES = REGISTRY.register(Counter(
+    "qa_request_retries_total", "Backend requests that were retried", ["backend"]))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "qa_cache_lookups_total", "Cache and dedup lookups by result", ["cache", "result"]))
+CACHE_HIT_RATIO = REGISTRY.register(CacheHitRatio(
+    "qa_cache_hit_ratio", "Share of cache lookups that were hits", CACHE_LOOKUPS))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "qa_queue_depth", "Work items waiting to be processed", ["stage"]))
+PARSE_RESULTS = REGISTRY.register(Counter(
+    "qa_generation_parse_results_total", "Question generation responses by parse result", ["result"]))
+UNIQUE_YIELD = REGISTRY.register(Histogram(
+    "qa_generation_unique_yield", "New questions kept per question requested, per generation call",
+    ["generation_type"], buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)))
+FIRST_QUESTION_LATENCY = REGISTRY.register(Histogram(
+    "qa_generation_first_question_seconds", "Seconds from a streamed generation request to its first parsed question"))
+
+
+def _error_reason(error: Exception) -> str:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return f"http_{status}"
+    return type(error).__name__
+
+
+@contextmanager
+def track_request(backend: str):
+    """Track one backend request: in-flight gauge, latency, completions and errors"""
+    REQUESTS_IN_FLIGHT.inc(backend=backend)
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        ERRORS.inc(backend=backend, reason=_error_reason(e))
+        raise
+    else:
+        COMPLETIONS.inc(backend=backend)
+        COMPLETIONS_PER_SECOND.add(backend=backend)
+    finally:
+        REQUEST_LATENCY.observe(time.perf_counter() - start, backend=backend)
+        REQUESTS_IN_FLIGHT.dec(backend=backend)
+
+
+def record_usage(backend: str, usage: Dict):
+    """Record token usage from an OpenAI-style or Anthropic-style usage block"""
+    if not usage:
+        return
+    prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+    completion_tokens = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+    for kind, amount in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+        if amount:
+            TOKENS.inc(amount, backend=backend, kind=kind)
+            TOKENS_PER_SECOND.add(amount, backend=backend, kind=kind)
+
+
+def record_retry(backend: str):
+    RETRIES.inc(backend=backend)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_parse_result(result: str):
+    PARSE_RESULTS.inc(result=result)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """Serve /metrics from a daemon thread for the lifetime of the process"""
+    # http.server is only imported when the endpoint is requested
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep scrapes out of the progress output
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    print(f"📈 Metrics available at http://{host}:{server.server_port}/metrics")
+    return server
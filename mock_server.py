@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Mock OpenAI-Compatible Server and Google Custom Search
+Serves /chat/completions and /customsearch/v1 locally with configurable latency
+distributions, 429 injection and token-rate simulation, so runners can be
+benchmarked without spending money on a real provider.
+"""
+
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List
+
+from serialization import dumps, dumps_bytes, loads
+
+WORDS = ("freedom justice reconciliation prison leadership courage education community "
+         "struggle dignity nation history hope future unity negotiation patience").split()
+
+
+@dataclass
+class EndpointConfig:
+    latency: str = "lognormal"      # fixed, uniform, exponential or lognormal
+    latency_median: float = 0.2     # seconds
+    latency_spread: float = 0.5     # lognormal sigma, uniform +/- fraction, ignored otherwise
+    error_rate_429: float = 0.0     # probability of answering 429 Too Many Requests
+    tokens_per_second: float = 0.0  # completion token rate, 0 disables token-rate delay
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.latency == "fixed":
+            return self.latency_median
+        if self.latency == "uniform":
+            low = self.latency_median * (1 - self.latency_spread)
+            high = self.latency_median * (1 + self.latency_spread)
+            return rng.uniform(max(low, 0), high)
+        if self.latency == "exponential":
+            return rng.expovariate(1 / self.latency_median) if self.latency_median > 0 else 0
+        return rng.lognormvariate(0, self.latency_spread) * self.latency_median
+
+
+@dataclass
+class MockConfig:
+    chat: EndpointConfig
+    search: EndpointConfig
+    answer_tokens: int = 300
+    seed: int = 0
+    # Distinct questions the mock can generate (0 = every question is new); a finite pool
+    # makes repeats more likely as a run goes on, like a model saturating on one prompt
+    question_pool: int = 0
+
+
+class MockStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latencies: Dict[str, List[float]] = {"chat": [], "search": []}
+            self.rate_limited = {"chat": 0, "search": 0}
+            self.completion_tokens = 0
+
+    def record(self, endpoint: str, latency: float, completion_tokens: int = 0):
+        with self._lock:
+            self.latencies[endpoint].append(latency)
+            self.completion_tokens += completion_tokens
+
+    def record_429(self, endpoint: str):
+        with self._lock:
+            self.rate_limited[endpoint] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "latencies": {k: list(v) for k, v in self.latencies.items()},
+                "rate_limited": dict(self.rate_limited),
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+def _count_tokens(text: str) -> int:
+    # Rough tokenizer: good enough for sizing simulated completions
+    return max(1, len(text) // 4)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockServer"
+
+    def _send_json(self, status: int, body: Dict, headers: Dict = None):
+        payload = dumps_bytes(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _rate_limited(self, endpoint: str, config: EndpointConfig) -> bool:
+        if config.error_rate_429 and self.server.random() < config.error_rate_429:
+            self.server.stats.record_429(endpoint)
+            self._send_json(429, {"error": {"message": "Rate limit exceeded (mock)", "type": "rate_limit"}},
+                            {"Retry-After": "1"})
+            return True
+        return False
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == "/_stats":
+            self._send_json(200, self.server.stats.snapshot())
+        elif path.endswith("/customsearch/v1"):
+            self._handle_search()
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b"{}"
+        path = self.path.split('?')[0]
+        if path == "/_reset":
+            self.server.stats.reset()
+            self._send_json(200, {"ok": True})
+        elif path.endswith("/chat/completions"):
+            self._handle_chat(loads(body or b"{}"))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+    def _handle_search(self):
+        config = self.server.config.search
+        start = time.perf_counter()
+        if self._rate_limited("search", config):
+            return
+        time.sleep(self.server.sample_latency(config))
+        items = [{
+            "title": f"Mock result {i + 1}",
+            "snippet": " ".join(self.server.choices(WORDS, 40)),
+            "link": f"https://example.org/result/{i + 1}"
+        } for i in range(5)]
+        self._send_json(200, {"items": items})
+        self.server.stats.record("search", time.perf_counter() - start)
+
+    def _handle_chat(self, request: Dict):
+        config = self.server.config.chat
+        start = time.perf_counter()
+        if self._rate_limited("chat", config):
+            return
+
+        prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+        if "subtopic strings" in prompt:
+            match = re.search(r"List exactly (\d+)", prompt)
+            content = dumps([" ".join(self.server.choices(WORDS, 3))
+                                  for _ in range(int(match.group(1)) if match else 10)])
+        elif "JSON array" in prompt:
+            match = re.search(r"Generate exactly (\d+)", prompt)
+            questions = self.server.make_questions(int(match.group(1)) if match else 10)
+            # Schema-constrained requests get the {"questions": [...]} object the schema describes
+            if (request.get("response_format") or {}).get("type") == "json_schema":
+                questions = {"questions": questions}
+            content = dumps(questions, indent=True)
+        else:
+            content = " ".join(self.server.choices(WORDS, self.server.config.answer_tokens))
+
+        completion_tokens = _count_tokens(content)
+        max_tokens = request.get("max_tokens")
+        finish_reason = "stop"
+        if max_tokens and completion_tokens > max_tokens:
+            content = content[:max_tokens * 4]
+            completion_tokens = max_tokens
+            finish_reason = "length"
+
+        usage = {"prompt_tokens": _count_tokens(prompt), "completion_tokens": completion_tokens,
+                 "total_tokens": _count_tokens(prompt) + completion_tokens}
+        delay = self.server.sample_latency(config)
+        if request.get("stream"):
+            time.sleep(delay)
+            self._send_stream(request, content, finish_reason, usage, config.tokens_per_second)
+            self.server.stats.record("chat", time.perf_counter() - start, completion_tokens)
+            return
+        if config.tokens_per_second:
+            delay += completion_tokens / config.tokens_per_second
+        time.sleep(delay)
+
+        self._send_json(200, {
+            "id": f"mock-{self.server.next_id()}",
+            "object": "chat.completion",
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": finish_reason}],
+            "usage": usage
+        })
+        self.server.stats.record("chat", time.perf_counter() - start, completion_tokens)
+
+    def _send_stream(self, request: Dict, content: str, finish_reason: str, usage: Dict,
+                     tokens_per_second: float):
+        """Server-sent events, one ~4 character token per chunk, paced at the token rate"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        chunk_id = f"mock-{self.server.next_id()}"
+
+        def event(delta: Dict, finish: str = None, **extra):
+            chunk = {"id": chunk_id, "object": "chat.completion.chunk", "model": request.get("model", "mock"),
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra}
+            self.wfile.write(b"data: " + dumps_bytes(chunk) + b"\n\n")
+
+        started = time.perf_counter()
+        for i in range(0, len(content), 4):
+            if tokens_per_second:
+                ahead = started + i / 4 / tokens_per_second - time.perf_counter()
+                if ahead > 0:
+                    self.wfile.flush()
+                    time.sleep(ahead)
+            event({"content": content[i:i + 4]})
+        event({}, finish_reason)
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self.wfile.write(b"data: " + dumps_bytes({'id': chunk_id, 'choices': [], 'usage': usage}) + b"\n\n")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.stats = MockStats()
+        self.rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def random(self) -> float:
+        with self._lock:
+            return self.rng.random()
+
+    def choices(self, population, k: int) -> List:
+        with self._lock:
+            return self.rng.choices(population, k=k)
+
+    def sample_latency(self, config: EndpointConfig) -> float:
+        with self._lock:
+            return config.sample_latency(self.rng)
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def make_questions(self, count: int) -> List[Dict]:
+        questions = []
+        for _ in range(count):
+            if self.config.question_pool:
+                with self._lock:
+                    n = self.rng.randrange(self.config.question_pool)
+                # A pool entry always has the same text
+                words = " ".join(random.Random(n).choices(WORDS, k=6))
+            else:
+                n = self.next_id()
+                words = " ".join(self.choices(WORDS, 6))
+            questions.append({
+                "question": f"Question {n}: how did {words} shape your thinking?",
+                "category": "mock",
+                "complexity": "intermediate",
+                "focus_area": words.split()[0]
+            })
+        return questions
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+
+def start_mock_server(config: MockConfig, port: int = 0, host: str = "127.0.0.1") -> MockServer:
+    """Start the mock server on a daemon thread; port 0 picks a free port"""
+    server = MockServer((host, port), config)
+    threading.Thread(target=server.serve_forever, name="mock-server", daemon=True).start()
+    return server
+
+
+def add_endpoint_arguments(parser, prefix: str, defaults: EndpointConfig):
+    parser.add_argument(f"--{prefix}-latency", default=defaults.latency,
+                       choices=["fixed", "uniform", "exponential", "lognormal"], help="Latency distribution")
+    parser.add_argument(f"--{prefix}-latency-median", type=float, default=defaults.latency_median,
+                       help="Median (or fixed) latency in seconds")
+    parser.add_argument(f"--{prefix}-latency-spread", type=float, default=defaults.latency_spread,
+                       help="Lognormal sigma or uniform +/- fraction")
+    parser.add_argument(f"--{prefix}-429-rate", type=float, default=defaults.error_rate_429,
+                       help="Probability of a 429 response")
+    parser.add_argument(f"--{prefix}-tokens-per-second", type=float, default=defaults.tokens_per_second,
+                       help="Simulated completion token rate (0 = instant)")
+
+
+def endpoint_config_from_args(args, prefix: str) -> EndpointConfig:
+    prefix = prefix.replace('-', '_')
+    return EndpointConfig(
+        latency=getattr(args, f"{prefix}_latency"),
+        latency_median=getattr(args, f"{prefix}_latency_median"),
+        latency_spread=getattr(args, f"{prefix}_latency_spread"),
+        error_rate_429=getattr(args, f"{prefix}_429_rate"),
+        tokens_per_second=getattr(args, f"{prefix}_tokens_per_second"),
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible server and Google CSE")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--answer-tokens", type=int, default=300, help="Words per simulated answer")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--question-pool", type=int, default=0,
+                        help="Distinct questions to draw generated questions from (0 = always new)")
+    add_endpoint_arguments(parser, "chat", EndpointConfig(tokens_per_second=200))
+    add_endpoint_arguments(parser, "search", EndpointConfig(latency_median=0.1))
+    args = parser.parse_args()
+
+    config = MockConfig(chat=endpoint_config_from_args(args, "chat"),
+                        search=endpoint_config_from_args(args, "search"),
+                        answer_tokens=args.answer_tokens, seed=args.seed, question_pool=args.question_pool)
+    server = MockServer(("127.0.0.1", args.port), config)
+    print(f"🧪 Mock server on {server.base_url}")
+    print(f"   Chat:   {server.base_url}/v1/chat/completions  {asdict(config.chat)}")
+    print(f"   Search: {server.base_url}/customsearch/v1  {asdict(config.search)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️ Mock server stopped")
+
+
+if __name__ == "__main__":
+    main()
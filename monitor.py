@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Live Run Monitor
+Tails an answer JSONL file while a run is writing it, reading only the bytes added since the
+last look, and prints rolling throughput, latency percentiles and error rate. Stalls longer
+than a threshold, a high error rate and slow answers are flagged as they happen.
+"""
+
+import glob
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from serialization import JSONDecodeError, loads
+
+# Largest read per look, so a long backlog is taken in steps instead of all at once
+READ_BYTES = 8 * 1024 * 1024
+
+# Fewest answers in the window before the error rate and latency alerts fire
+MIN_ALERT_SAMPLES = 5
+
+# Runners append progress to {OUTPUT_PATH}.temp during a run and write OUTPUT_PATH at the end
+OUTPUT_PATTERNS = ("output/*.jsonl", "output/*.jsonl.temp")
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Linearly interpolated percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class FileTail:
+    """Complete new lines of a file that is being appended to"""
+
+    def __init__(self, path: str, from_end: bool = False):
+        self.path = path
+        self.from_end = from_end
+        self.offset = 0
+        self._partial = b""
+        self._inode = None
+        self._skip_partial = False
+
+    def read_lines(self) -> List[bytes]:
+        """Lines completed since the last call (at most READ_BYTES of new data); a truncated or
+        replaced file is read again from the start"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if self._inode is None:
+            self._inode = stat.st_ino
+            if self.from_end and stat.st_size:
+                self.offset = stat.st_size
+                # Starting inside a line being written: drop its remainder
+                with open(self.path, 'rb') as f:
+                    f.seek(stat.st_size - 1)
+                    self._skip_partial = f.read(1) != b"\n"
+        elif stat.st_ino != self._inode or stat.st_size < self.offset:
+            self._inode = stat.st_ino
+            self.offset = 0
+            self._partial = b""
+            self._skip_partial = False
+        if stat.st_size <= self.offset:
+            return []
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(min(stat.st_size - self.offset, READ_BYTES))
+        self.offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        # The last piece is a line still being written
+        self._partial = lines.pop()
+        if self._skip_partial and lines:
+            lines.pop(0)
+            self._skip_partial = False
+        return [line for line in lines if line.strip()]
+
+
+class RunMonitor:
+    """Rolling statistics over the answers of the last window seconds"""
+
+    def __init__(self, window: float = 300):
+        self.window = window
+        self.started = time.time()
+        # (timestamp, latency in seconds or None, error) per answer in the window
+        self._events = deque()
+        self.total = 0
+        self.total_errors = 0
+        self.unparseable = 0
+        self.last_answer: Optional[float] = None
+
+    def add_line(self, line: bytes, now: float):
+        try:
+            record = loads(line)
+        except JSONDecodeError:
+            self.unparseable += 1
+            return
+        if isinstance(record, dict):
+            self.add(record, now)
+
+    def add(self, record: Dict, now: float):
+        """Count an answer record; records without a timestamp are placed at now"""
+        timestamp = record.get("timestamp")
+        if not isinstance(timestamp, (int, float)):
+            timestamp = now
+        latency = record.get("latency_s")
+        if latency is None and record.get("duration_ms") is not None:
+            latency = record["duration_ms"] / 1000
+        if latency is None and self.last_answer is not None:
+            # Runners without a latency field: the gap since the previous answer
+            latency = max(timestamp - self.last_answer, 0)
+        error = bool(record.get("error"))
+
+        self._events.append((timestamp, latency, error))
+        self.total += 1
+        self.total_errors += error
+        self.last_answer = timestamp if self.last_answer is None else max(self.last_answer, timestamp)
+
+    def snapshot(self, now: float) -> Dict:
+        """Throughput, latency percentiles and error rate over the window ending at now"""
+        cutoff = now - self.window
+        while self._events and self._events[0][0] < cutoff:
+            self._events.popleft()
+
+        count = len(self._events)
+        errors = sum(1 for _, _, error in self._events if error)
+        latencies = sorted(latency for _, latency, _ in self._events if latency is not None)
+        # Until a full window has passed, the rate is over the time actually observed
+        span = max(min(self.window, now - min(self.started, self._events[0][0] if count else now)), 1)
+        return {
+            "answers": count,
+            "per_minute": count / span * 60,
+            "error_rate": errors / count if count else 0.0,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "latencies": len(latencies),
+            "idle_seconds": now - self.last_answer if self.last_answer is not None else now - self.started,
+        }
+
+
+def format_status(monitor: RunMonitor, stats: Dict, now: float) -> str:
+    latency = (f"p50 {stats['p50']:.1f}s p90 {stats['p90']:.1f}s p99 {stats['p99']:.1f}s"
+               if stats["latencies"] else "no latency yet")
+    last = (f"last answer {stats['idle_seconds']:.0f}s ago" if monitor.last_answer is not None
+            else "no answers yet")
+    status = (f"📊 {datetime.fromtimestamp(now):%H:%M:%S} | {monitor.total} answers | "
+              f"{stats['per_minute']:.1f}/min | {latency} | errors {stats['error_rate']:.1%} | {last}")
+    if monitor.unparseable:
+        status += f" | {monitor.unparseable} unparseable lines"
+    return status
+
+
+class Alerts:
+    """Prints an alert when a condition starts and a notice when it clears, not on every refresh"""
+
+    def __init__(self, stall_seconds: float, error_rate: float, latency_p50: Optional[float]):
+        self.stall_seconds = stall_seconds
+        self.error_rate = error_rate
+        self.latency_p50 = latency_p50
+        self._active: Dict[str, bool] = {}
+
+    def _set(self, name: str, active: bool, start_message: str, clear_message: str):
+        if active and not self._active.get(name):
+            print(start_message)
+        elif not active and self._active.get(name):
+            print(clear_message)
+        self._active[name] = active
+
+    def check(self, stats: Dict):
+        self._set("stall", stats["idle_seconds"] > self.stall_seconds,
+                  f"⚠️ Stall: no new answers for {stats['idle_seconds']:.0f}s (threshold {self.stall_seconds:.0f}s)",
+                  "✅ Answers are arriving again")
+        enough = stats["answers"] >= MIN_ALERT_SAMPLES
+        self._set("errors", enough and stats["error_rate"] > self.error_rate,
+                  f"⚠️ Error rate {stats['error_rate']:.1%} over the last {stats['answers']} answers "
+                  f"(threshold {self.error_rate:.0%})",
+                  f"✅ Error rate back to {stats['error_rate']:.1%}")
+        if self.latency_p50 is not None:
+            self._set("latency", stats["latencies"] >= MIN_ALERT_SAMPLES and stats["p50"] > self.latency_p50,
+                      f"⚠️ Median latency {stats['p50']:.1f}s (threshold {self.latency_p50:.1f}s)",
+                      f"✅ Median latency back to {stats['p50']:.1f}s")
+
+
+def latest_output(patterns: Tuple[str, ...] = OUTPUT_PATTERNS) -> Optional[str]:
+    """Most recently modified output file, including the progress file of a run in flight"""
+    paths = [p for pattern in patterns for p in glob.glob(pattern) if os.path.isfile(p)]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def monitor(path: str, window: float = 300, refresh: float = 10, stall_seconds: float = 300,
+            error_rate: float = 0.2, latency_p50: Optional[float] = None,
+            from_end: bool = False, once: bool = False) -> RunMonitor:
+    """Follow path, printing a status line every refresh seconds until interrupted
+    (or, with once, after reading what is there now)"""
+    tail = FileTail(path, from_end=from_end)
+    run = RunMonitor(window)
+    alerts = Alerts(stall_seconds, error_rate, latency_p50)
+    if not os.path.exists(path):
+        print(f"⏳ Waiting for {path} to be created...")
+
+    while True:
+        # Take everything written so far before reporting
+        while True:
+            lines = tail.read_lines()
+            if not lines:
+                break
+            now = time.time()
+            for line in lines:
+                run.add_line(line, now)
+
+        now = time.time()
+        stats = run.snapshot(now)
+        print(format_status(run, stats, now))
+        if once:
+            return run
+        alerts.check(stats)
+        time.sleep(refresh)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Follow an answer file during a run and report its health")
+    parser.add_argument("path", nargs="?", help="Answer JSONL file (default: newest answers or .temp progress file in output/)")
+    parser.add_argument("--window", type=float, default=300, help="Seconds of answers the statistics cover")
+    parser.add_argument("--refresh", type=float, default=10, help="Seconds between status lines")
+    parser.add_argument("--stall", type=float, default=300, help="Flag a stall after this many seconds without an answer")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Flag an error rate above this share of the window")
+    parser.add_argument("--latency", type=float, help="Flag a median latency above this many seconds")
+    parser.add_argument("--from-end", action="store_true", help="Skip the answers already in the file")
+    parser.add_argument("--once", action="store_true", help="Print one status line and exit")
+
+    args = parser.parse_args()
+
+    path = args.path or latest_output()
+    if not path:
+        print("❌ No output file given and none found in output/")
+        return
+
+    print(f"👀 Monitoring {path} (window {args.window:.0f}s, stall after {args.stall:.0f}s)")
+    try:
+        monitor(path, window=args.window, refresh=args.refresh, stall_seconds=args.stall,
+                      error_rate=args.error_rate, latency_p50=args.latency,
+                      from_end=args.from_end, once=args.once)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped monitoring")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Question Filter
+Streaming MinHash-LSH index over the content words of each question. Candidates that
+share an LSH band are verified with exact Jaccard similarity, and drops are counted
+per similarity level.
+"""
+
+import hashlib
+import math
+import random
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metrics import record_cache_lookup
+
+# Mersenne prime for the (a * x + b) mod p permutation family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Question phrasing and function words carry no topic content - dropping them lets
+# "How did prison change you?" match "In what ways did prison change you?"
+STOPWORDS = frozenset("""
+a about after an and any are as at be been before being but by can could did do does
+during for from had has have how i if in into is it its me my of on or our out over
+so some than that the their them then there these they this those through to under up
+us was way ways we were what when where which while who whom whose why will with
+would you your yourself
+""".split())
+
+# Words shared by most questions on a topic make some LSH buckets very large; past this
+# size a bucket stops taking new questions so each lookup verifies a bounded candidate set
+MAX_BUCKET_SIZE = 8
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def content_words(text: str) -> Tuple[str, ...]:
+    """Sorted, lowercased words of a question minus stopwords, possessives and plural s"""
+    words = set()
+    for word in _WORD_RE.findall(text.lower()):
+        if word.endswith("'s"):
+            word = word[:-2]
+        if word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return tuple(sorted(words))
+
+
+def lsh_parameters(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Bands and rows per band: the longest bands that still make a pair at the
+    threshold a candidate with >= 95% probability (verification removes false positives)"""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= 0.95:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """Questions seen so far, indexed by the LSH bands of their MinHash signatures. A question
+    whose content words reach Jaccard >= threshold with an indexed one is a near-duplicate;
+    buckets stop growing at MAX_BUCKET_SIZE."""
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 48, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = lsh_parameters(threshold, num_perm)
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+        # Questions reuse a small vocabulary, so each word's permuted hashes are computed once
+        self._word_hashes: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: Dict[int, object] = {}
+        self._words: List[Tuple[str, ...]] = []
+        # Identical word sets skip the signature entirely
+        self._word_sets = set()
+        self.dropped = Counter()
+        self.checked = 0
+
+    def _hashes(self, word: str) -> Tuple[int, ...]:
+        hashes = self._word_hashes.get(word)
+        if hashes is None:
+            x = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+            hashes = tuple([((a * x + b) % _PRIME) & _MAX_HASH for a, b in self._perms])
+            self._word_hashes[word] = hashes
+        return hashes
+
+    def signature(self, words: Tuple[str, ...]) -> Iterable[int]:
+        """MinHash signature of a word set (an iterator unless there is a single word)"""
+        if len(words) == 1:
+            return self._hashes(words[0])
+        return map(min, zip(*map(self._hashes, words)))
+    
+    def _band_keys(self, signature: Iterable[int]) -> List[int]:
+        # (band, row values...) tuples, so equal rows in different bands do not collide
+        return list(map(hash, zip(range(self.bands), *[iter(signature)] * self.rows)))
+
+    def _best_match(self, words: Tuple[str, ...], keys: List[int]) -> float:
+        candidates = set()
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            if isinstance(bucket, int):
+                candidates.add(bucket)
+            else:
+                candidates.update(bucket)
+
+        if not candidates:
+            return 0.0
+        word_set = set(words)
+        size = len(word_set)
+        indexed = self._words
+        best = 0.0
+        for candidate in candidates:
+            other = indexed[candidate]
+            shared = len(word_set.intersection(other))
+            similarity = shared / (size + len(other) - shared)
+            if similarity > best:
+                best = similarity
+        return best
+
+    def _insert(self, words: Tuple[str, ...], keys: List[int]):
+        question_id = len(self._words)
+        self._words.append(words)
+        self._word_sets.add(words)
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = question_id
+            elif isinstance(bucket, int):
+                self._buckets[key] = [bucket, question_id]
+            elif len(bucket) < MAX_BUCKET_SIZE:
+                bucket.append(question_id)
+
+    def add(self, text: str):
+        """Index a question without checking it, e.g. when seeding from an earlier run"""
+        words = content_words(text)
+        if words:
+            self._insert(words, self._band_keys(self.signature(words)))
+    
+    def add_signature(self, words: Tuple[str, ...], signature: Iterable[int]):
+        """Index a question from a stored word set and signature"""
+        if words:
+            self._insert(words, self._band_keys(signature))
+
+    def check_and_add(self, text: str) -> Optional[float]:
+        """Similarity of the closest indexed question if it reaches the threshold (the
+        question is then dropped), otherwise None and the question is indexed"""
+        words = content_words(text)
+        self.checked += 1
+        if not words:
+            return None
+        if words in self._word_sets:
+            record_cache_lookup("near_dedup", True)
+            self.dropped["1.0"] += 1
+            return 1.0
+        keys = self._band_keys(self.signature(words))
+        similarity = self._best_match(words, keys)
+        is_duplicate = similarity >= self.threshold
+        record_cache_lookup("near_dedup", is_duplicate)
+        if is_duplicate:
+            self.dropped[self._level(similarity)] += 1
+            return similarity
+        self._insert(words, keys)
+        return None
+
+    def filter(self, questions: List[Dict]) -> List[Dict]:
+        """Keep the questions that are not near-duplicates of anything indexed so far"""
+        return [q for q in questions if self.check_and_add(q["question"]) is None]
+
+    def _level(self, similarity: float) -> str:
+        if similarity >= 1.0:
+            return "1.0"
+        low = math.floor(similarity * 10) / 10
+        return f"{low:.1f}-{low + 0.1:.1f}"
+
+    def summary(self) -> str:
+        total = sum(self.dropped.values())
+        if not total:
+            return f"🔍 No near-duplicates found (Jaccard >= {self.threshold:g})"
+        levels = ", ".join(f"{level}: {count}" for level, count in sorted(self.dropped.items()))
+        return f"🔍 Dropped {total} near-duplicates (Jaccard >= {self.threshold:g}) - {levels}"
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Question-to-Answer Pipeline
+Generates questions and answers them in one run: every batch of new, deduplicated questions
+goes into a bounded queue that answering workers drain while generation continues, so the
+answering endpoint is busy from the first batch instead of waiting for the whole dataset.
+"""
+
+# tqdm is imported where it is used so that short commands start quickly
+import os
+import queue
+import threading
+import time
+from typing import Dict, List
+from serialization import JSONDecodeError, dumps, loads
+from profiling import enable_profiling
+from metrics import start_metrics_server, QUEUE_DEPTH
+import config
+from config import ROLEPLAY_PROMPTS
+from question_generator import QuestionGenerator, QUESTION_TYPES
+from question_schema import RESPONSE_FORMATS
+from fingerprints import DEFAULT_FINGERPRINTS_PATH
+from main_local_llm_only import LLMOnlyQAGenerator
+
+# Queue entry that tells an answering worker to exit
+_DONE = None
+
+
+class AnswerPipeline:
+    """Answering side of the pipeline: a bounded question queue and the workers draining it.
+    submit() blocks while the queue is full, which throttles generation to the answering rate."""
+
+    def __init__(self, answerer: LLMOnlyQAGenerator, character: str, answers_path: str,
+                 queue_size: int = 100, workers: int = 1):
+        self.answerer = answerer
+        self.character = character
+        self.answers_path = answers_path
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self._seen = set()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._bar = None
+        self.submitted = 0
+        # question_id of the next submitted question; a resumed run continues after the earlier ids
+        self.next_id = 0
+        self.answered = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started = None
+
+    def load_answered(self) -> int:
+        """Skip questions an earlier run already answered into the same answers file"""
+        if not os.path.exists(self.answers_path):
+            return 0
+        with open(self.answers_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = loads(line)
+                except JSONDecodeError:
+                    continue
+                if not isinstance(record, dict):
+                    continue
+                if not record.get("error"):
+                    self._seen.add(str(record.get("question", "")).lower().strip())
+                if isinstance(record.get("question_id"), int):
+                    self.next_id = max(self.next_id, record["question_id"] + 1)
+        return len(self._seen)
+
+    def start(self, bar_position: int = 0):
+        from tqdm import tqdm
+
+        os.makedirs(os.path.dirname(self.answers_path) or ".", exist_ok=True)
+        self._bar = tqdm(total=0, desc="Answering questions", unit="answer", position=bar_position)
+        self.started = time.perf_counter()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"answer-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, questions: List[Dict]):
+        """Queue new questions for answering; exact duplicates (by normalized text) are skipped"""
+        for question in questions:
+            text = question["question"]
+            key = text.lower().strip()
+            if key in self._seen or len(text.strip()) < 10:
+                continue
+            self._seen.add(key)
+            self.queue.put({**question, "question_id": self.next_id})
+            self.next_id += 1
+            self.submitted += 1
+            QUEUE_DEPTH.set(self.queue.qsize(), stage="answer")
+        self._bar.total = self.submitted
+        self._bar.refresh()
+
+    def _work(self):
+        while True:
+            question = self.queue.get()
+            QUEUE_DEPTH.set(self.queue.qsize(), stage="answer")
+            if question is _DONE:
+                return
+            if self._stop.is_set():
+                continue
+
+            started = time.perf_counter()
+            answer = self.answerer.generate_answer(question=question["question"], character=self.character)
+            answer["question_id"] = question["question_id"]
+            for key in ("topic", "generation_type", "category", "complexity"):
+                if key in question:
+                    answer[key] = question[key]
+
+            with self._write_lock:
+                with open(self.answers_path, 'a', encoding='utf-8') as f:
+                    f.write(dumps(answer) + '\n')
+                self.answered += 1
+                self.errors += bool(answer.get("error"))
+                self.busy_seconds += time.perf_counter() - started
+                self._bar.update(1)
+
+            # Rate limiting, per worker
+            time.sleep(config.DELAY_BETWEEN_REQUESTS)
+
+    def finish(self):
+        """Answer everything still queued, then stop the workers"""
+        for _ in self._threads:
+            self.queue.put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        self._bar.close()
+
+    def stop(self):
+        """Drop queued questions and stop once in-flight answers return"""
+        self._stop.set()
+        self.finish()
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        busy = self.busy_seconds / (elapsed * self.workers) if elapsed else 0.0
+        return (f"🎉 Answered {self.answered}/{self.submitted} questions ({self.errors} errors) in {elapsed:.1f}s; "
+                f"answer workers busy {busy:.0%} of the run")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate questions and answer them in one streaming run")
+    parser.add_argument("--topic", "-t", required=True, help="Topic to generate questions about")
+    parser.add_argument("--count", "-c", type=int, default=5000, help="Target number of questions")
+    parser.add_argument("--types", nargs="+",
+                       choices=QUESTION_TYPES,
+                       default=["comprehensive"],
+                       help="Question generation types (can specify multiple)")
+    parser.add_argument("--character", default="default", help="Roleplay character for the answers")
+    parser.add_argument("--output", "-o", help="Questions output file path")
+    parser.add_argument("--answers-output", help="Answers output file path")
+    parser.add_argument("--batch-size", default="auto",
+                       help="Questions per generation call, or 'auto' to adapt it during the run")
+    parser.add_argument("--concurrency", type=int, default=1,
+                       help="Question batches generated in parallel across all types")
+    parser.add_argument("--answer-workers", type=int, default=1, help="Questions answered in parallel")
+    parser.add_argument("--queue-size", type=int, default=100,
+                       help="Questions waiting for an answer before generation pauses")
+    parser.add_argument("--similarity-threshold", type=float, default=0.7,
+                       help="Drop questions whose content words overlap a kept question by this Jaccard similarity (0 = off)")
+    parser.add_argument("--subtopics", type=int, default=0, metavar="N",
+                       help="Outline N subtopics first, then split each type's quota across them (0 = off)")
+    parser.add_argument("--min-yield", type=float, default=0.2,
+                       help="Unique share of a batch below which a generation call counts as low-yield")
+    parser.add_argument("--low-yield-calls", type=int, default=3,
+                       help="Stop a prompt after this many low-yield calls in a row")
+    parser.add_argument("--fingerprints", nargs="?", const=DEFAULT_FINGERPRINTS_PATH, metavar="DB",
+                       help="Skip questions already in this persistent fingerprint store (see fingerprints.py)")
+    parser.add_argument("--response-format", choices=RESPONSE_FORMATS, default="prompt",
+                       help="Constrain generated questions to the question schema (see question_generator.py)")
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream question completions so each question is queued as soon as it is generated")
+    parser.add_argument("--resume", action="store_true",
+                       help="Continue generation from the .temp progress file and skip questions already answered")
+    parser.add_argument("--question-base-url", default=config.LOCAL_AI_BASE_URL,
+                       help="OpenAI-compatible endpoint for question generation")
+    parser.add_argument("--answer-base-url", default=config.LOCAL_AI_BASE_URL,
+                       help="OpenAI-compatible endpoint for answering")
+    parser.add_argument("--answer-model", default=config.LOCAL_AI_MODEL, help="Model used for answering")
+    parser.add_argument("--metrics-port", type=int, help="Expose live run metrics on this local port")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PREFIX",
+                       help="Profile each pipeline stage and write a report and flamegraph stacks")
+
+    args = parser.parse_args()
+
+    if args.character not in ROLEPLAY_PROMPTS:
+        print(f"❌ Invalid character: {args.character}")
+        print(f"Available: {', '.join(ROLEPLAY_PROMPTS.keys())}")
+        return
+    if args.batch_size != "auto" and not (args.batch_size.isdigit() and int(args.batch_size) > 0):
+        parser.error("--batch-size must be a positive integer or 'auto'")
+    batch_size = None if args.batch_size == "auto" else int(args.batch_size)
+    if args.low_yield_calls < 1:
+        parser.error("--low-yield-calls must be at least 1")
+
+    if args.profile is not None:
+        enable_profiling(args.profile or None)
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    slug = args.topic.replace(' ', '_').lower()
+    output_path = args.output or f"output/{slug}_questions.jsonl"
+    answers_path = args.answers_output or f"output/{slug}_{args.character}_answers.jsonl"
+
+    generator = QuestionGenerator(response_format=args.response_format, stream=args.stream)
+    generator.base_url = args.question_base_url
+    answerer = LLMOnlyQAGenerator()
+    answerer.base_url = args.answer_base_url
+    answerer.model = args.answer_model
+
+    pipeline = AnswerPipeline(answerer, args.character, answers_path,
+                              queue_size=args.queue_size, workers=args.answer_workers)
+    if args.resume:
+        print(f"♻️ {pipeline.load_answered()} questions already answered in {answers_path}")
+    elif os.path.exists(answers_path):
+        os.replace(answers_path, f"{answers_path}.prev")
+        print(f"⚠️ Moved earlier answers to {answers_path}.prev (use --resume to continue a run)")
+
+    print(f"🔗 Answering as {ROLEPLAY_PROMPTS[args.character]['name']} with {args.answer_workers} worker(s) "
+          f"on {args.answer_model} while questions are generated (queue of {args.queue_size})")
+    # Generation bars take the first rows when batches run concurrently
+    pipeline.start(bar_position=len(args.types) if args.concurrency > 1 else 1)
+
+    try:
+        # Generation handles its own interrupt; whatever was queued is still answered
+        generator.generate_multi_type_dataset(
+            topic=args.topic,
+            question_types=args.types,
+            target_count=args.count,
+            output_path=output_path,
+            concurrency=args.concurrency,
+            resume=args.resume,
+            similarity_threshold=args.similarity_threshold,
+            batch_size=batch_size,
+            on_questions=pipeline.submit,
+            fingerprints_path=args.fingerprints,
+            subtopics=args.subtopics,
+            min_yield=args.min_yield,
+            low_yield_calls=args.low_yield_calls
+        )
+        print(f"⏳ Generation finished, answering {pipeline.queue.qsize()} queued questions...")
+        pipeline.finish()
+    except KeyboardInterrupt:
+        print("\n⚠️ Process interrupted by user, waiting for in-flight answers")
+        pipeline.stop()
+        print("💡 Rerun with --resume to answer the remaining questions")
+
+    print(pipeline.summary())
+    print(f"📁 Answers saved to: {answers_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Capacity Planner
+Backs the runners' --plan mode: loads the dataset without calling any backend,
+estimates prompt and completion tokens per question from the roleplay persona and
+past output telemetry, and projects wall-clock time, total tokens and cost per backend.
+"""
+
+import glob
+import math
+import os
+import statistics
+from typing import Callable, Dict, List, Optional
+
+import config
+from config import ROLEPLAY_PROMPTS, BACKEND_PRICING, GOOGLE_CSE_PRICE_PER_1000, MAX_TOKENS
+from serialization import JSONDecodeError, loads
+
+# Rough tokenizer: ~4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Per-backend request shape. prompt_overhead is the runner's instruction template in tokens,
+# excluding persona and question; default_latency_s is used until telemetry exists.
+BACKENDS = {
+    "qwen_search": {"runner": "main.py", "pricing": "qwen", "prompt_overhead": 70, "persona": True,
+                    "search": True, "default_latency_s": 15.0, "delay_s": "DELAY_BETWEEN_REQUESTS"},
+    "qwen": {"runner": "main_llm_only.py", "pricing": "qwen", "prompt_overhead": 395, "persona": True,
+             "search": False, "default_latency_s": 15.0, "delay_s": "DELAY_BETWEEN_REQUESTS"},
+    "local": {"runner": "main_local_llm_only.py", "pricing": "local", "prompt_overhead": 475, "persona": True,
+              "search": False, "default_latency_s": 40.0, "delay_s": "DELAY_BETWEEN_REQUESTS"},
+    "claude_code": {"runner": "main_claude_code.py", "pricing": "claude_code", "prompt_overhead": 225,
+                    "persona": True, "search": False, "default_latency_s": 60.0, "delay_s": 2},
+    "claude_login": {"runner": "main_claude_login.py", "pricing": "claude_login", "prompt_overhead": 15,
+                     "persona": False, "search": False, "default_latency_s": 30.0, "delay_s": 2},
+}
+
+# Three search results of title + 200-character snippet are added to the prompt
+SEARCH_CONTEXT_TOKENS = 200
+SEARCH_LATENCY_S = 0.5
+DEFAULT_COMPLETION_TOKENS = 600
+MAX_TELEMETRY_RECORDS_PER_FILE = 20000
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def record_backend(record: Dict) -> Optional[str]:
+    method = record.get("method")
+    if method == "claude_code_sdk":
+        return "claude_code"
+    if method == "claude_login":
+        return "claude_login"
+    if method == "llm_only":
+        return "local" if record.get("model") == config.LOCAL_AI_MODEL else "qwen"
+    if "search_results" in record:
+        return "qwen_search"
+    return None
+
+
+def load_telemetry(paths: List[str] = None) -> Dict[str, Dict]:
+    """Summarize completed answers in earlier output files, per backend"""
+    if paths is None:
+        paths = [p for p in glob.glob("output/*.jsonl") if os.path.isfile(p)]
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    for path in paths:
+        previous_timestamp = None
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f):
+                if line_num >= MAX_TELEMETRY_RECORDS_PER_FILE:
+                    break
+                try:
+                    record = loads(line)
+                except JSONDecodeError:
+                    continue
+                backend = record_backend(record)
+                timestamp = record.get("timestamp")
+                if backend is None or record.get("error"):
+                    previous_timestamp = timestamp
+                    continue
+                backend_samples = samples.setdefault(
+                    backend, {"completion_tokens": [], "prompt_tokens": [], "latency_s": []})
+
+                usage = record.get("usage") or {}
+                completion = usage.get("completion_tokens") or estimate_tokens(str(record.get("answer", "")))
+                backend_samples["completion_tokens"].append(completion)
+                if usage.get("prompt_tokens"):
+                    backend_samples["prompt_tokens"].append(usage["prompt_tokens"])
+
+                if record.get("latency_s") is not None:
+                    backend_samples["latency_s"].append(record["latency_s"])
+                elif record.get("duration_ms") is not None:
+                    backend_samples["latency_s"].append(record["duration_ms"] / 1000)
+                elif previous_timestamp is not None and timestamp is not None:
+                    # Older outputs only have completion timestamps; runs are serial so the gap
+                    # between answers is latency plus the fixed delay
+                    gap = timestamp - previous_timestamp - _delay(backend)
+                    if gap > 0:
+                        backend_samples["latency_s"].append(gap)
+                previous_timestamp = timestamp
+
+    summary = {}
+    for backend, backend_samples in samples.items():
+        summary[backend] = {
+            "answers": len(backend_samples["completion_tokens"]),
+            "completion_tokens": statistics.mean(backend_samples["completion_tokens"]),
+            "prompt_tokens": statistics.mean(backend_samples["prompt_tokens"]) if backend_samples["prompt_tokens"] else None,
+            "latency_s": statistics.median(backend_samples["latency_s"]) if backend_samples["latency_s"] else None,
+        }
+    return summary
+
+
+def _delay(backend: str) -> float:
+    delay = BACKENDS[backend]["delay_s"]
+    return getattr(config, delay) if isinstance(delay, str) else delay
+
+
+def plan_backend(backend: str, questions: List[Dict], character: str, telemetry: Dict,
+                 concurrency: int = 1, rate_limit: float = None) -> Dict:
+    """Project tokens, wall-clock time and cost of answering questions on one backend"""
+    spec = BACKENDS[backend]
+    observed = telemetry.get(backend, {})
+    persona_tokens = estimate_tokens(ROLEPLAY_PROMPTS[character]["prompt"]) if spec["persona"] else 0
+    question_tokens = sum(estimate_tokens(q["question"]) for q in questions)
+
+    if observed.get("prompt_tokens"):
+        prompt_tokens = observed["prompt_tokens"] * len(questions)
+    else:
+        fixed = persona_tokens + spec["prompt_overhead"] + (SEARCH_CONTEXT_TOKENS if spec["search"] else 0)
+        prompt_tokens = fixed * len(questions) + question_tokens
+    completion_per_question = min(observed.get("completion_tokens") or DEFAULT_COMPLETION_TOKENS, MAX_TOKENS)
+    completion_tokens = completion_per_question * len(questions)
+
+    latency = observed.get("latency_s") or spec["default_latency_s"]
+    if spec["search"]:
+        latency += SEARCH_LATENCY_S
+    per_worker_rate = 1 / (latency + _delay(backend))
+    throughput = concurrency * per_worker_rate
+    if rate_limit:
+        throughput = min(throughput, rate_limit / 60)
+    wall_clock_s = len(questions) / throughput if throughput else 0
+
+    pricing = BACKEND_PRICING[spec["pricing"]]
+    cost = (prompt_tokens * pricing["prompt"] + completion_tokens * pricing["completion"]) / 1_000_000
+    if spec["search"]:
+        cost += len(questions) / 1000 * GOOGLE_CSE_PRICE_PER_1000
+
+    return {
+        "backend": backend,
+        "runner": spec["runner"],
+        "questions": len(questions),
+        "prompt_tokens": int(prompt_tokens),
+        "completion_tokens": int(completion_tokens),
+        "latency_s": latency,
+        "latency_source": "telemetry" if observed.get("latency_s") else "default",
+        "telemetry_answers": observed.get("answers", 0),
+        "throughput_per_min": throughput * 60,
+        "wall_clock_s": wall_clock_s,
+        "cost_usd": cost,
+        "rate_limited": bool(rate_limit) and rate_limit / 60 < concurrency * per_worker_rate,
+    }
+
+
+def _format_duration(seconds: float) -> str:
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes = remainder // 60
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {int(seconds) % 60:02d}s"
+
+
+def print_plan(load_dataset: Callable[[str], List[Dict]], dataset_path: str, character: str, backend: str,
+               start_from: int = 0, max_questions: int = None, concurrency: int = 1,
+               rate_limit: float = None, telemetry_paths: List[str] = None) -> List[Dict]:
+    """Load the dataset the way the runner would and print a plan for every backend"""
+    questions = load_dataset(dataset_path)
+    if start_from > 0:
+        questions = questions[start_from:]
+    if max_questions:
+        questions = questions[:max_questions]
+    # The runners skip blank and very short questions
+    questions = [q for q in questions if q["question"] and len(q["question"].strip()) >= 10]
+
+    telemetry = load_telemetry(telemetry_paths)
+    plans = [plan_backend(name, questions, character, telemetry, concurrency, rate_limit) for name in BACKENDS]
+
+    print(f"📋 Run plan for {len(questions):,} questions as {ROLEPLAY_PROMPTS[character]['name']}")
+    print(f"⚙️ Concurrency {concurrency}, rate limit {f'{rate_limit:g}/min' if rate_limit else 'none'}")
+    if telemetry:
+        print("📈 Telemetry: " + ", ".join(f"{name} {t['answers']:,} answers" for name, t in telemetry.items()))
+    else:
+        print("📈 Telemetry: none found in output/, using default latencies and answer lengths")
+    if concurrency > 1:
+        print("ℹ️ Runners answer one question at a time; concurrency > 1 assumes parallel shards")
+
+    print(f"\n   {'backend':<14}{'latency':>10}{'per min':>9}{'wall clock':>12}"
+          f"{'prompt tok':>14}{'compl. tok':>13}{'cost USD':>11}")
+    for plan in plans:
+        marker = "➡️" if plan["backend"] == backend else "  "
+        latency = f"{plan['latency_s']:.1f}s" + ("*" if plan["latency_source"] == "telemetry" else "")
+        limited = " (rate-limited)" if plan["rate_limited"] else ""
+        print(f"{marker} {plan['backend']:<14}{latency:>10}{plan['throughput_per_min']:>9.1f}"
+              f"{_format_duration(plan['wall_clock_s']):>12}{plan['prompt_tokens']:>14,}"
+              f"{plan['completion_tokens']:>13,}{plan['cost_usd']:>11.2f}{limited}")
+    print("\n   * latency from telemetry; token and cost figures are estimates (~4 characters per token)")
+    return plans
+
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Per-Stage Profiling Hooks
+Wraps pipeline stages (load, prompt_build, request, parse, save) with cProfile and
+tracemalloc, and runs a background stack sampler that writes flamegraph-compatible
+folded stacks. Disabled by default - stage() is a no-op until enable_profiling() is called.
+"""
+
+import atexit
+import io
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+# cProfile, pstats and tracemalloc are only imported once profiling is enabled
+if TYPE_CHECKING:
+    import cProfile
+
+STAGES = ["load", "prompt_build", "request", "parse", "save"]
+
+
+class StageProfiler:
+    def __init__(self, output_prefix: str, sample_interval: float = 0.005):
+        self.output_prefix = output_prefix
+        self.sample_interval = sample_interval
+        self.profiles: Dict[str, "cProfile.Profile"] = {}
+        self.wall_time = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.peak_memory = defaultdict(int)
+        self.allocated = defaultdict(int)
+        self.folded = defaultdict(int)
+        self._lock = threading.Lock()
+        self._thread_stages: Dict[int, List[str]] = {}
+        self._active_profile: Optional["cProfile.Profile"] = None
+        self._profile_owner: Optional[int] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+    def start(self):
+        import tracemalloc
+        self._started_at = time.perf_counter()
+        tracemalloc.start()
+        self._sampler = threading.Thread(target=self._sample_loop, name="stage-sampler", daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        import cProfile
+        import tracemalloc
+        thread_id = threading.get_ident()
+        with self._lock:
+            stack = self._thread_stages.setdefault(thread_id, [])
+            stack.append(name)
+            # cProfile only sees the calling thread and only one profiler can be active,
+            # so the first thread to enter a stage owns it until the stage exits
+            profile = None
+            if self._profile_owner is None:
+                profile = self.profiles.setdefault(name, cProfile.Profile())
+                self._profile_owner = thread_id
+                self._active_profile = profile
+        memory_before, _ = tracemalloc.get_traced_memory()
+        if len(stack) == 1:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            memory_after, memory_peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                stack.pop()
+                if profile:
+                    self._profile_owner = None
+                    self._active_profile = None
+                self.wall_time[name] += elapsed
+                self.calls[name] += 1
+                self.peak_memory[name] = max(self.peak_memory[name], memory_peak - memory_before)
+                self.allocated[name] += max(memory_after - memory_before, 0)
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.sample_interval):
+            frames = sys._current_frames()
+            with self._lock:
+                active = {tid: stack[-1] for tid, stack in self._thread_stages.items() if stack}
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(active.get(thread_id, "unstaged"))
+                self.folded[";".join(reversed(stack))] += 1
+
+    def stop(self) -> str:
+        """Stop sampling, write all profile outputs and return the report path"""
+        import pstats
+        import tracemalloc
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        total = time.perf_counter() - self._started_at
+        tracemalloc.stop()
+
+        os.makedirs(os.path.dirname(self.output_prefix) or ".", exist_ok=True)
+
+        folded_path = f"{self.output_prefix}.folded"
+        with open(folded_path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.folded.items()):
+                f.write(f"{stack} {count}\n")
+
+        report = io.StringIO()
+        report.write(f"=== STAGE PROFILE ({total:.2f}s wall clock) ===\n")
+        report.write(f"{'stage':<14}{'calls':>8}{'total s':>12}{'mean ms':>12}{'share':>8}{'peak MiB':>11}{'alloc MiB':>11}\n")
+        staged = 0.0
+        ordered = [s for s in STAGES if s in self.calls] + sorted(s for s in self.calls if s not in STAGES)
+        for name in ordered:
+            seconds = self.wall_time[name]
+            staged += seconds
+            report.write(
+                f"{name:<14}{self.calls[name]:>8}{seconds:>12.3f}{seconds / self.calls[name] * 1000:>12.2f}"
+                f"{seconds / total * 100 if total else 0:>7.1f}%"
+                f"{self.peak_memory[name] / 2**20:>11.2f}{self.allocated[name] / 2**20:>11.2f}\n"
+            )
+        other = max(total - staged, 0)
+        report.write(f"{'unstaged':<14}{'':>8}{other:>12.3f}{'':>12}{other / total * 100 if total else 0:>7.1f}%\n")
+
+        for name in ordered:
+            profile = self.profiles.get(name)
+            if not profile:
+                continue
+            profile.dump_stats(f"{self.output_prefix}.{name}.prof")
+            report.write(f"\n=== TOP FUNCTIONS: {name} ===\n")
+            stats = pstats.Stats(profile, stream=report)
+            stats.sort_stats("cumulative").print_stats(15)
+
+        report_path = f"{self.output_prefix}.txt"
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+
+        print(f"\n⏱️ Profile report: {report_path}")
+        print(f"🔥 Flamegraph stacks: {folded_path} (render with flamegraph.pl or speedscope)")
+        return report_path
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def enable_profiling(output_prefix: str = None) -> StageProfiler:
+    """Start profiling for the rest of the process; outputs are written at exit"""
+    global _profiler
+    if _profiler is None:
+        if output_prefix is None:
+            output_prefix = f"output/profile_{int(time.time())}"
+        _profiler = StageProfiler(output_prefix)
+        _profiler.start()
+        atexit.register(_profiler.stop)
+        print(f"⏱️ Profiling enabled, writing to {output_prefix}.*")
+    return _profiler
+
+
+def stage(name: str):
+    """Context manager marking a pipeline stage; free when profiling is disabled"""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.stage(name)
@@ -5,27 +5,155 @@ Generates rich, focused questions on specified topics using only the model's int
 Optimized prompts designed to create comprehensive question datasets with minimum 5000 questions.
 """
 
-import requests
-import pandas as pd
-import json
+# pandas, requests and tqdm are imported where they are used so that short commands start quickly
 import time
 import os
-from tqdm import tqdm
-from typing import List, Dict
-from config import (
-   MAX_TOKENS, TEMPERATURE, 
-    LOCAL_AI_MODEL, LOCAL_AI_BASE_URL
-)
+import threading
+from typing import Callable, List, Dict, Tuple, Optional
+from serialization import JSONDecodeError, dump, dumps, dumps_bytes, load, loads
+from profiling import enable_profiling, stage
+from metrics import (track_request, record_usage, record_retry, record_cache_lookup, record_parse_result,
+                     start_metrics_server, QUEUE_DEPTH, PARSE_RESULTS, UNIQUE_YIELD, FIRST_QUESTION_LATENCY)
+from near_dedup import NearDuplicateIndex
+from fingerprints import FingerprintIndex, DEFAULT_FINGERPRINTS_PATH
+from json_stream import JSONArrayParser, parse_partial_array
+from question_schema import RESPONSE_FORMATS, response_format_fields, validate_questions
+import config
+from config import MAX_TOKENS, TEMPERATURE
+
+# Follow-up requests for the questions missing from a truncated response
+MAX_REASKS = 2
+
+QUESTION_TYPES = ["comprehensive", "expert", "personal"]
+
+class BatchSizer:
+    """Questions per generation call - fixed, or in auto mode adapted from truncated
+    responses, parse failures and unique questions per second"""
+    
+    def __init__(self, batch_size: Optional[int] = None, start_size: int = 10, min_size: int = 5,
+                 max_size: int = MAX_TOKENS * 2 // 40):
+        self.adaptive = batch_size is None
+        self.size = batch_size or start_size
+        self.min_size = min_size
+        # ~40 completion tokens per question object, so larger batches would not fit max_tokens
+        self.max_size = max_size
+        self.rates: Dict[int, float] = {}
+        self.shrinks = 0
+    
+    def update(self, requested: int, unique: int, seconds: float, status: Dict):
+        if not self.adaptive:
+            return
+        if status.get("truncated") or status.get("parse_failed") or status.get("error"):
+            # The response did not fit or did not parse: halve, and stay below 90% of this size
+            self.max_size = max(self.min_size, min(self.max_size, int(requested * 0.9)))
+            self.size = max(self.min_size, requested // 2)
+            self.shrinks += 1
+            return
+        if requested < self.size // 2:
+            return  # the tail end of a quota says little about the batch size
+        
+        rate = unique / seconds if seconds > 0 else 0.0
+        previous = self.rates.get(requested)
+        self.rates[requested] = rate if previous is None else 0.7 * previous + 0.3 * rate
+        
+        # Hill-climb on unique questions/s: keep growing while larger batches are no worse
+        # than the best size seen so far, otherwise go back to the best size
+        best_size = max(self.rates, key=self.rates.get)
+        if self.rates[requested] >= 0.95 * self.rates[best_size]:
+            self.size = min(self.max_size, requested + max(2, requested // 4))
+        else:
+            self.size = best_size
+    
+    def describe(self) -> str:
+        if not self.adaptive:
+            return f"{self.size} questions per call"
+        return f"auto, settled at {self.size} questions per call ({self.shrinks} shrinks after truncated or unparseable responses)"
+
+
+class YieldTracker:
+    """New questions kept per question requested, call by call, for one generation stream. The
+    stream is saturated after `patience` calls in a row below `min_yield` (or adding nothing)."""
+    
+    def __init__(self, min_yield: float = 0.2, patience: int = 3):
+        self.min_yield = min_yield
+        self.patience = patience
+        self.yields: List[float] = []
+        self.low_streak = 0
+        self.saturated = False
+    
+    def record(self, requested: int, kept: int) -> float:
+        unique_yield = kept / requested if requested else 0.0
+        self.yields.append(unique_yield)
+        self.low_streak = self.low_streak + 1 if unique_yield < self.min_yield or not kept else 0
+        if self.low_streak >= self.patience:
+            self.saturated = True
+        return unique_yield
+
+
+class TopicRun:
+    """One topic's share of a generation job: quotas, kept questions, dedup index and progress files"""
+    
+    def __init__(self, topic: str, question_types: List[str], target_count: int, output_path: str = None,
+                 on_questions: Callable[[List[Dict]], None] = None, min_yield: float = 0.2,
+                 low_yield_calls: int = 3):
+        self.topic = topic
+        self.question_types = question_types
+        self.target_count = target_count
+        self.output_path = output_path or f"output/{topic.replace(' ', '_').lower()}_questions.jsonl"
+        self.questions_per_type = target_count // len(question_types)
+        self.on_questions = on_questions
+        self.questions: List[Dict] = []
+        self.next_batch: Dict[str, int] = {}
+        self.near_duplicates = None
+        self.subtopics: List[str] = []
+        # Normalized text of every kept question, for exact dedup as batches arrive
+        self.seen = set()
+        self.duplicates = 0
+        self.min_yield = min_yield
+        self.low_yield_calls = low_yield_calls
+        self.yields: Dict[Tuple[str, Optional[str]], YieldTracker] = {}
+    
+    def tracker(self, question_type: str, subtopic: str = None) -> YieldTracker:
+        key = (question_type, subtopic)
+        if key not in self.yields:
+            self.yields[key] = YieldTracker(self.min_yield, self.low_yield_calls)
+        return self.yields[key]
+    
+    def generated(self, question_type: str, subtopic: str = None) -> int:
+        return sum(1 for q in self.questions if q.get("generation_type") == question_type
+                   and (subtopic is None or q.get("subtopic") == subtopic))
+    
+    def streams(self) -> List[Tuple[str, Optional[str], int]]:
+        """(question type, subtopic, quota) for each generation stream; with an outline every
+        type's quota is split evenly across the subtopics"""
+        if not self.subtopics:
+            return [(q_type, None, self.questions_per_type) for q_type in self.question_types]
+        share, extra = divmod(self.questions_per_type, len(self.subtopics))
+        return [(q_type, subtopic, share + (i < extra))
+                for q_type in self.question_types for i, subtopic in enumerate(self.subtopics)]
 
 class QuestionGenerator:
-    def __init__(self):
+    def __init__(self, response_format: str = "prompt", stream: bool = False):
         self.api_key = "hf_QZqYQZqYQZqYQZqYQZqYQZqYQZqYQZqY"
-        self.base_url = LOCAL_AI_BASE_URL
-        self.model = LOCAL_AI_MODEL
+        self.base_url = config.LOCAL_AI_BASE_URL
+        self.model = config.LOCAL_AI_MODEL
+        # How the JSON output is enforced: prompt instructions, response_format schema or grammar
+        self.response_format = response_format
+        # Read completions as a token stream and parse questions as each one closes
+        self.stream = stream
+        # Streamed questions are filtered and saved from the request threads
+        self._keep_lock = threading.Lock()
     
     def generate_questions(self, topic: str, question_type: str = "comprehensive", 
-                          num_questions: int = 100) -> List[Dict]:
-        """Generate AI questions using only the model's internal knowledge with optimized prompts"""
+                          num_questions: int = 100, status: Dict = None, focus: str = None,
+                          on_questions: Callable[[List[Dict]], None] = None) -> List[Dict]:
+        """Generate AI questions using only the model's internal knowledge with optimized prompts.
+        focus narrows the questions to one subtopic. If a status dict is passed it is filled with
+        truncated/salvaged/invalid/parse_failed/error flags. When streaming, on_questions receives
+        the questions as they are parsed and status["streamed"] counts them; fallback questions
+        (text extraction, errors) are only returned."""
+        if status is None:
+            status = {}
         
         # Define question generation strategies
         question_strategies = {
@@ -152,51 +280,221 @@ class QuestionGenerator:
         strategy_config = question_strategies.get(question_type, question_strategies["comprehensive"])
         strategy_name = strategy_config["name"]
         system_prompt = strategy_config["prompt"]
+        if focus:
+            system_prompt += f"""
+
+                FOCUS: Every question must be about this specific aspect of {topic}: {focus}.
+                Go deep into this aspect rather than asking about {topic} in general."""
         
         # Generate questions using Local AI
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            with stage("prompt_build"):
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                }
             
-            payload = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": system_prompt}
-                ],
-                "max_tokens": MAX_TOKENS * 2,  # More tokens for question generation
-                "temperature": TEMPERATURE + 0.1  # Slightly higher creativity
-            }
+                payload = {
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt}
+                    ],
+                    "max_tokens": MAX_TOKENS * 2,  # More tokens for question generation
+                    "temperature": TEMPERATURE + 0.1  # Slightly higher creativity
+                }
+                response_format = self.response_format
+                payload.update(response_format_fields(response_format, num_questions))
+                if self.stream:
+                    payload["stream"] = True
+                    payload["stream_options"] = {"include_usage": True}
+                body = dumps_bytes(payload)
             
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=120  # Longer timeout for question generation
-            )
-            response.raise_for_status()
+            # Constrained output must match the schema exactly
+            strict = response_format != "prompt"
+            import requests
+            try:
+                with track_request("local"), stage("request"):
+                    requested_at = time.perf_counter()
+                    response = requests.post(
+                        f"{self.base_url}/chat/completions",
+                        headers=headers,
+                        data=body,
+                        timeout=120,  # Longer timeout for question generation
+                        stream=self.stream
+                    )
+                    response.raise_for_status()
+                    if self.stream:
+                        # The stream is read while the model is still generating
+                        questions, parser, content = self._read_stream(response, status, strict, requested_at,
+                                                                       on_questions, num_questions)
+            except requests.HTTPError as e:
+                # A rejected streamed response still holds its connection
+                e.response.close()
+                if not strict or e.response.status_code not in (400, 422):
+                    raise
+                # The server does not support this constraint: fall back to prompt-only JSON, as a
+                # request of its own rather than inside the rejected one's tracking
+                print(f"⚠️ Server rejected --response-format {response_format} "
+                      f"(HTTP {e.response.status_code}), falling back to prompt")
+                self.response_format = "prompt"
+                record_retry("local")
+                return self.generate_questions(topic, question_type, num_questions, status, focus,
+                                               on_questions)
             
-            data = response.json()
-            content = data['choices'][0]['message']['content'].strip()
+            if self.stream:
+                if questions:
+                    status["streamed"] = len(questions)
+                    if not parser.finished:
+                        status["salvaged"] = len(questions)
+                    record_parse_result("salvaged" if not parser.finished
+                                        else "invalid_items" if status.get("invalid") else "valid")
+                    return questions
+                status["parse_failed"] = True
+                record_parse_result("parse_failed")
+                return self._extract_questions_from_text(content, topic, num_questions)
             
-            # Parse JSON response
-            try:
-                questions = json.loads(content)
-                if isinstance(questions, list):
+            with stage("parse"):
+                data = loads(response.content)
+                record_usage("local", data.get('usage'))
+                content = data['choices'][0]['message']['content'].strip()
+                status["truncated"] = data['choices'][0].get('finish_reason') == 'length'
+                
+                # Parse JSON response
+                try:
+                    questions = loads(content)
+                    if isinstance(questions, dict) and isinstance(questions.get("questions"), list):
+                        questions = questions["questions"]
+                    if not isinstance(questions, list):
+                        raise ValueError("Response is not a list")
+                    questions, invalid, _ = validate_questions(questions, strict, num_questions)
+                    if invalid:
+                        status["invalid"] = invalid
+                    record_parse_result("valid" if not invalid else "invalid_items")
+                    return questions
+                except JSONDecodeError:
+                    # A truncated or fenced array still holds complete question objects
+                    questions, invalid, _ = validate_questions(parse_partial_array(content), strict, num_questions)
+                    if questions:
+                        status["salvaged"] = len(questions)
+                        if invalid:
+                            status["invalid"] = invalid
+                        record_parse_result("salvaged")
+                        return questions
+                    
+                    # Fallback: try to extract questions from text
+                    status["parse_failed"] = True
+                    record_parse_result("parse_failed")
+                    questions = self._extract_questions_from_text(content, topic, num_questions)
                     return questions
-                else:
-                    raise ValueError("Response is not a list")
-            except json.JSONDecodeError:
-                # Fallback: try to extract questions from text
-                questions = self._extract_questions_from_text(content, topic, num_questions)
-                return questions
             
         except Exception as e:
             print(f"Error generating questions: {str(e)}")
+            status["error"] = str(e)
+            record_parse_result("error")
             # Fallback: generate basic questions
             return self._generate_fallback_questions(topic, num_questions)
     
+    def _read_stream(self, response, status: Dict, strict: bool, requested_at: float,
+                     on_questions: Callable[[List[Dict]], None] = None,
+                     max_items: int = None) -> Tuple[List[Dict], JSONArrayParser, str]:
+        """Parse a server-sent events completion one question object at a time, handing each group
+        of valid questions to on_questions as soon as it closes; with strict, at most max_items
+        are kept. Returns the valid questions, the
+        parser (finished once the array closed) and the text received before the first question,
+        which is only kept for text extraction when no question parses."""
+        import requests
+        parser = JSONArrayParser()
+        questions = []
+        preamble = []
+        finish_reason = None
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = loads(data)
+                record_usage("local", chunk.get('usage'))
+                for choice in chunk.get('choices') or []:
+                    finish_reason = choice.get('finish_reason') or finish_reason
+                    text = (choice.get('delta') or {}).get('content')
+                    if not text:
+                        continue
+                    if not questions:
+                        preamble.append(text)
+                    remaining = max_items - len(questions) if max_items is not None else None
+                    # Questions past the requested count are dropped but are not schema failures
+                    valid, invalid, _ = validate_questions(parser.feed(text), strict, remaining)
+                    if invalid:
+                        status["invalid"] = status.get("invalid", 0) + invalid
+                    if not valid:
+                        continue
+                    if not questions:
+                        first = time.perf_counter() - requested_at
+                        status["first_question_seconds"] = round(first, 3)
+                        FIRST_QUESTION_LATENCY.observe(first)
+                        preamble = []
+                    questions.extend(valid)
+                    if on_questions:
+                        on_questions(valid)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # A dropped stream keeps every question that was complete before it broke
+            if not questions:
+                raise
+            status["error"] = str(e)
+        finally:
+            response.close()
+        status["truncated"] = finish_reason == 'length' or (parser.started and not parser.finished)
+        return questions, parser, "".join(preamble).strip()
+    
+    def generate_subtopics(self, topic: str, count: int) -> List[str]:
+        """Ask the model for an outline of distinct subtopics that together cover the topic;
+        an empty list if the outline cannot be generated"""
+        prompt = f"""You are planning a large, diverse question dataset about {topic}.
+
+                List exactly {count} distinct subtopics of {topic} that together cover it completely: periods, events, people, places, ideas, works, relationships, controversies, personal life and legacy.
+                Each subtopic should be specific enough to support many different questions on its own, short (2-8 words), and must not overlap with the others.
+
+                Return only a JSON array of {count} subtopic strings, no additional text."""
+        
+        try:
+            payload = {
+                "model": self.model,
+                "messages": [{"role": "system", "content": prompt}],
+                "max_tokens": MAX_TOKENS,
+                "temperature": TEMPERATURE
+            }
+            
+            import requests
+            with track_request("local"), stage("request"):
+                response = requests.post(
+                    f"{self.base_url}/chat/completions",
+                    headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"},
+                    data=dumps_bytes(payload),
+                    timeout=120
+                )
+                response.raise_for_status()
+            
+            data = loads(response.content)
+            record_usage("local", data.get('usage'))
+            content = data['choices'][0]['message']['content']
+        except Exception as e:
+            print(f"Error generating subtopics: {str(e)}")
+            return []
+        
+        # A truncated outline still has its complete entries
+        subtopics = []
+        seen = set()
+        for item in parse_partial_array(content):
+            if isinstance(item, dict):
+                item = item.get("subtopic") or item.get("name") or ""
+            item = str(item).strip()
+            if item and item.lower() not in seen:
+                seen.add(item.lower())
+                subtopics.append(item)
+        return subtopics[:count]
+    
     def _extract_questions_from_text(self, text: str, topic: str, num_questions: int) -> List[Dict]:
         """Extract questions from text response if JSON parsing fails"""
         questions = []
@@ -261,22 +559,429 @@ class QuestionGenerator:
         
         return questions
     
-    def save_questions(self, questions: List[Dict], output_path: str):
-        """Save questions to JSONL file"""
+    def deduplicate_questions(self, questions: List[Dict]) -> List[Dict]:
+        """Remove questions whose normalized text was already seen, keeping the first occurrence"""
+        unique_questions = []
+        seen_questions = set()
+        
+        for question in questions:
+            question_text = question["question"].lower().strip()
+            record_cache_lookup("dedup", question_text in seen_questions)
+            if question_text not in seen_questions:
+                seen_questions.add(question_text)
+                unique_questions.append(question)
+        
+        return unique_questions
+    
+    def save_questions(self, questions: List[Dict], output_path: str, verbose: bool = True,
+                       append: bool = True):
+        """Save questions to JSONL file (append=False replaces its contents)"""
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        with open(output_path, 'a', encoding='utf-8') as f:
+        with stage("save"), open(output_path, 'a' if append else 'w', encoding='utf-8') as f:
+            for question in questions:
+                f.write(dumps(question) + '\n')
+        
+        if verbose:
+            print(f"✅ Saved {len(questions)} questions to {output_path}")
+    
+    def record_batch(self, output_path: str, question_type: str, batch: int, requested: int,
+                     generated: int, status: Dict = None):
+        """Append a finished batch's metadata to the batch log; its questions are already in the progress file"""
+        entry = {
+            "generation_type": question_type,
+            "batch": batch,
+            "requested": requested,
+            "generated": generated,
+            **(status or {}),
+            "timestamp": time.time()
+        }
+        with open(f"{output_path}.batches.jsonl", 'a', encoding='utf-8') as f:
+            f.write(dumps(entry) + '\n')
+    
+    def _read_progress_file(self, path: str) -> List[Dict]:
+        """Read a JSONL progress file, skipping a record cut off mid-write"""
+        records = []
+        if not os.path.exists(path):
+            return records
+        
+        line = "\n"
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(loads(line))
+                except JSONDecodeError:
+                    continue
+        
+        # Terminate a partial last line so the next append starts on its own line
+        if not line.endswith("\n"):
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write("\n")
+        return records
+    
+    def load_progress(self, output_path: str) -> Tuple[List[Dict], Dict[str, int]]:
+        """Read an earlier run's progress file; returns its questions and the next batch number per type"""
+        questions = self._read_progress_file(f"{output_path}.temp")
+        # Batches that returned nothing only show up in the batch log
+        batches = self._read_progress_file(f"{output_path}.batches.jsonl")
+        
+        next_batch = {}
+        for record in questions + batches:
+            q_type = record.get("generation_type")
+            if isinstance(record.get("batch"), int):
+                next_batch[q_type] = max(next_batch.get(q_type, 0), record["batch"] + 1)
+        
+        return questions, next_batch
+    
+    def _generate_batch(self, run: TopicRun, question_type: str, num_questions: int,
+                        batch: int, subtopic: str = None) -> Tuple[List[Dict], Dict]:
+        """Generate one batch, tag its questions with their metadata and keep the new ones as
+        they arrive (per question when streaming); returns the kept questions and the call's status"""
+        status = {"duplicates_dropped": 0, "near_duplicates_dropped": 0}
+        kept = []
+        
+        def keep(questions: List[Dict]):
+            for question in questions:
+                question["topic"] = run.topic
+                question["generation_type"] = question_type
+                question["batch"] = batch
+                if subtopic:
+                    question["subtopic"] = subtopic
+                question["timestamp"] = time.time()
+            kept.extend(self._keep_questions(run, questions, status))
+        
+        def request(count: int, call_status: Dict) -> List[Dict]:
+            questions = self.generate_questions(
+                topic=run.topic,
+                question_type=question_type,
+                num_questions=count,
+                status=call_status,
+                focus=subtopic,
+                on_questions=keep
+            )
+            # Streamed questions were kept as they arrived; fallback questions are kept now
+            if not call_status.get("streamed"):
+                keep(questions)
+            return questions
+        
+        started = time.perf_counter()
+        received = len(request(num_questions, status))
+        
+        # A cut-off array keeps its complete objects; ask again only for the missing count
+        partial = status.get("salvaged")
+        while partial and received < num_questions and status.get("reasks", 0) < MAX_REASKS:
+            retry_status = {}
+            record_retry("local")
+            received += len(request(num_questions - received, retry_status))
+            status["reasks"] = status.get("reasks", 0) + 1
+            partial = retry_status.get("salvaged")
+        
+        status["seconds"] = round(time.perf_counter() - started, 3)
+        return kept, status
+    
+    def _start_topic(self, run: TopicRun, resume: bool, similarity_threshold: float,
+                     fingerprints_path: str = None, subtopics: int = 0):
+        """Load or set aside earlier progress, outline subtopics, build the topic's dedup index
+        and show its targets"""
+        temp_path = f"{run.output_path}.temp"
+        batch_log_path = f"{run.output_path}.batches.jsonl"
+        
+        if resume:
+            saved_questions, run.next_batch = self.load_progress(run.output_path)
+            run.questions = self.deduplicate_questions(saved_questions)
+            run.seen = {q["question"].lower().strip() for q in run.questions}
+            print(f"♻️ Resuming from {temp_path}: {len(run.questions)} unique questions already generated")
+            if run.on_questions and run.questions:
+                run.on_questions(run.questions)
+        else:
+            # Keep an earlier run's progress out of this run's files
+            for path in (temp_path, batch_log_path):
+                if os.path.exists(path):
+                    os.replace(path, f"{path}.prev")
+                    print(f"⚠️ Moved earlier progress to {path}.prev (use --resume to continue a run)")
+        
+        # Each batch is checked against everything kept so far, including resumed questions
+        if fingerprints_path:
+            run.near_duplicates = FingerprintIndex(fingerprints_path, similarity_threshold)
+            print(f"📚 Checking against {run.near_duplicates.loaded} known questions in {fingerprints_path}")
+        elif similarity_threshold > 0:
+            run.near_duplicates = NearDuplicateIndex(similarity_threshold)
+        if run.near_duplicates:
+            for question in run.questions:
+                run.near_duplicates.add(question["question"])
+        
+        # Phase one of subtopic fan-out: an outline, kept next to the output so --resume reuses it
+        if subtopics:
+            outline_path = f"{run.output_path}.subtopics.json"
+            if resume and os.path.exists(outline_path):
+                with open(outline_path, 'r', encoding='utf-8') as f:
+                    run.subtopics = load(f)
+                print(f"🗂️ Reusing {len(run.subtopics)} subtopics from {outline_path}")
+            else:
+                run.subtopics = self.generate_subtopics(run.topic, subtopics)
+                if run.subtopics:
+                    os.makedirs(os.path.dirname(outline_path) or ".", exist_ok=True)
+                    with open(outline_path, 'w', encoding='utf-8') as f:
+                        dump(run.subtopics, f, indent=True)
+                    print(f"🗂️ Outlined {len(run.subtopics)} subtopics: {', '.join(run.subtopics[:5])}"
+                          f"{', ...' if len(run.subtopics) > 5 else ''}")
+                else:
+                    print("⚠️ No subtopic outline, generating from the topic prompts alone")
+        
+        # Show target distribution
+        print(f"\n📋 Target distribution:")
+        for q_type in run.question_types:
+            existing = run.generated(q_type)
+            resumed = f" ({existing} already generated)" if existing else ""
+            print(f"   {q_type}: {run.questions_per_type} questions{resumed}")
+        if run.subtopics:
+            print(f"   split across {len(run.subtopics)} subtopics "
+                  f"(~{max(run.questions_per_type // len(run.subtopics), 1)} per subtopic and type)")
+        print()
+    
+    def _keep_questions(self, run: TopicRun, questions: List[Dict], status: Dict) -> List[Dict]:
+        """Filter questions against the topic's questions, append the new ones to the progress file
+        and hand them on; returns what was kept. Safe to call from concurrent request threads."""
+        if not questions:
+            return []
+        with self._keep_lock:
+            # Drop exact repeats of questions already kept, then paraphrases
+            fresh = []
             for question in questions:
-                f.write(json.dumps(question, ensure_ascii=False) + '\n')
+                question_text = question["question"].lower().strip()
+                record_cache_lookup("dedup", question_text in run.seen)
+                if question_text not in run.seen:
+                    run.seen.add(question_text)
+                    fresh.append(question)
+            status["duplicates_dropped"] += len(questions) - len(fresh)
+            run.duplicates += len(questions) - len(fresh)
+            kept = run.near_duplicates.filter(fresh) if run.near_duplicates else fresh
+            status["near_duplicates_dropped"] += len(fresh) - len(kept)
+            run.questions.extend(kept)
+            
+            if kept:
+                self.save_questions(kept, f"{run.output_path}.temp", verbose=False)
+                if run.on_questions:
+                    run.on_questions(kept)
+        return kept
+    
+    def _close_batch(self, run: TopicRun, question_type: str, batch: int, requested: int,
+                     questions: List[Dict], status: Dict, sizer: BatchSizer, verbose: bool = True,
+                     subtopic: str = None):
+        """Account for a finished batch whose new questions were already kept: batch size,
+        unique yield and the batch log"""
+        sizer.update(requested, len(questions), status["seconds"], status)
+        
+        # Unique yield telemetry; a stream whose calls keep adding little is stopped
+        tracker = run.tracker(question_type, subtopic)
+        status["unique_yield"] = round(tracker.record(requested, len(questions)), 3)
+        UNIQUE_YIELD.observe(status["unique_yield"], generation_type=question_type)
+        if tracker.saturated:
+            status["saturated"] = True
+        
+        self.record_batch(run.output_path, question_type, batch, requested, len(questions), status)
+        if verbose:
+            print(f"✅ Saved {len(questions)} questions to {run.output_path}.temp")
+    
+    def _finish_topic(self, run: TopicRun) -> List[Dict]:
+        """Deduplicate a topic's questions, show its distribution and write its output file"""
+        unique_questions = self.deduplicate_questions(run.questions)
+        
+        print(f"🔄 Removed {run.duplicates + len(run.questions) - len(unique_questions)} duplicate questions")
+        if run.near_duplicates:
+            print(run.near_duplicates.summary())
+        
+        # Unique yield per call for each type: what the first and the latest calls still added
+        for q_type in run.question_types:
+            trackers = [tracker for (t_type, _), tracker in run.yields.items() if t_type == q_type]
+            yields = [y for tracker in trackers for y in tracker.yields]
+            if not yields:
+                continue
+            first = sum(tracker.yields[0] for tracker in trackers) / len(trackers)
+            last = sum(tracker.yields[-1] for tracker in trackers) / len(trackers)
+            saturated = sum(tracker.saturated for tracker in trackers)
+            note = f", stopped {saturated} saturated stream{'s' if saturated != 1 else ''}" if saturated else ""
+            print(f"📉 Unique yield {q_type}: {sum(yields) / len(yields):.0%} over {len(yields)} calls "
+                  f"(first {first:.0%}, latest {last:.0%}){note}")
+        
+        # Show final distribution by type
+        type_counts = {}
+        for question in unique_questions:
+            q_type = question.get('generation_type', 'unknown')
+            type_counts[q_type] = type_counts.get(q_type, 0) + 1
+        
+        print(f"\n📊 Final question distribution by type:")
+        for q_type, count in type_counts.items():
+            print(f"   {q_type}: {count} questions")
         
-        print(f"✅ Saved {len(questions)} questions to {output_path}")
+        # Save final results; they include resumed questions, so replace any earlier output
+        self.save_questions(unique_questions, run.output_path, append=False)
+        print(f"🎉 Completed! Generated {len(unique_questions)} unique questions about {run.topic}")
+        print(f"📁 Saved to: {run.output_path}")
+        return unique_questions
+    
+    def _print_run_stats(self, sizer: BatchSizer):
+        print(f"📏 Batch size: {sizer.describe()}")
+        print(f"🧾 Responses ({self.response_format}): " + ", ".join(
+            f"{int(PARSE_RESULTS.value(result=result))} {result.replace('_', ' ')}"
+            for result in ("valid", "salvaged", "invalid_items", "parse_failed", "error")))
+    
+    def _generate_concurrently(self, runs: List[TopicRun], concurrency: int, sizer: BatchSizer,
+                               on_topic_done: Callable[[TopicRun], None] = None):
+        """Run batches for every topic and question type from one pool, up to `concurrency` requests
+        in flight. Topics are filled in order, so each one completes (and is passed to on_topic_done)
+        as early as possible while the pool stays full."""
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        from tqdm import tqdm
+        
+        if len(runs) == 1:
+            print(f"⚡ Running up to {concurrency} batches in parallel across {len(runs[0].question_types)} types")
+        else:
+            print(f"⚡ Running up to {concurrency} batches in parallel across {len(runs)} topics")
+        
+        # One stream per topic, question type and subtopic
+        streams = [(r, q_type, subtopic) for r, run in enumerate(runs) for q_type, subtopic, _ in run.streams()]
+        topic_streams = [[s for s, stream in enumerate(streams) if stream[0] == run_index]
+                         for run_index in range(len(runs))]
+        quota = [q for run in runs for _, _, q in run.streams()]
+        # Questions carried over by --resume count towards each quota
+        generated = [runs[r].generated(q_type, subtopic) for r, q_type, subtopic in streams]
+        requested = [0] * len(streams)
+        # Batch numbers run per topic and type, across subtopics
+        batches = {(r, q_type): 0 for r, q_type, _ in streams}
+        trackers = [runs[r].tracker(q_type, subtopic) for r, q_type, subtopic in streams]
+        saturated = set()
+        in_flight_per_topic = [0] * len(runs)
+        finished = set()
+        
+        if len(runs) == 1:
+            type_bars = {}
+            for q_type in runs[0].question_types:
+                type_streams = [s for s, stream in enumerate(streams) if stream[1] == q_type]
+                type_bars[q_type] = tqdm(total=sum(quota[s] for s in type_streams),
+                                         initial=sum(min(generated[s], quota[s]) for s in type_streams),
+                                         desc=f"Generating {q_type} questions", unit="question",
+                                         position=len(type_bars))
+            bars = [type_bars[q_type] for _, q_type, _ in streams]
+        else:
+            # Per-stream bars would not fit on screen for a long topic list
+            overall = tqdm(total=sum(quota), initial=sum(min(g, q) for g, q in zip(generated, quota)),
+                           desc=f"Generating questions for {len(runs)} topics", unit="question")
+            bars = [overall] * len(streams)
+        
+        def remaining(s: int) -> int:
+            """Unique questions a stream still needs beyond its in-flight requests; short or failed
+            batches are re-requested until the stream saturates"""
+            return 0 if trackers[s].saturated else quota[s] - generated[s] - requested[s]
+        
+        def hand_off_quota(s: int):
+            """Give a saturated stream's unmet quota to the other subtopics of its topic and type"""
+            saturated.add(s)
+            r, q_type, subtopic = streams[s]
+            siblings = [i for i in topic_streams[r] if streams[i][1] == q_type and not trackers[i].saturated]
+            unmet = max(quota[s] - generated[s], 0)
+            print(f"⚠️ {runs[r].topic} / {q_type}{f' / {subtopic}' if subtopic else ''} saturated: "
+                  f"{runs[r].low_yield_calls} calls in a row added fewer than {runs[r].min_yield:.0%} new questions"
+                  + (f", moving {unmet} to {len(siblings)} other subtopic{'s' if len(siblings) > 1 else ''}"
+                     if siblings and unmet else ""))
+            if not siblings or not unmet:
+                return
+            quota[s] -= unmet
+            share, extra = divmod(unmet, len(siblings))
+            for k, i in enumerate(siblings):
+                quota[i] += share + (k < extra)
+        
+        def next_batch():
+            """Pick the stream with the most unrequested quota in the first unfinished topic;
+            None once every quota is covered"""
+            for stream_ids in topic_streams:
+                open_streams = {s: remaining(s) for s in stream_ids if remaining(s) > 0}
+                if open_streams:
+                    s = max(open_streams, key=open_streams.get)
+                    return s, min(sizer.size, open_streams[s])
+            return None
+        
+        def finish_topics():
+            for r, run in enumerate(runs):
+                if r in finished or in_flight_per_topic[r] or any(remaining(s) > 0 for s in topic_streams[r]):
+                    continue
+                finished.add(r)
+                for q_type in run.question_types:
+                    type_streams = [s for s in topic_streams[r] if streams[s][1] == q_type]
+                    print(f"✅ Generated {sum(generated[s] for s in type_streams)}/"
+                          f"{sum(quota[s] for s in type_streams)} {q_type} questions")
+                if on_topic_done:
+                    on_topic_done(run)
+        
+        def run_batch(s: int, count: int, batch: int) -> Tuple[List[Dict], Dict]:
+            r, q_type, subtopic = streams[s]
+            result = self._generate_batch(runs[r], q_type, count, batch, subtopic)
+            # Rate limiting, per worker
+            time.sleep(config.DELAY_BETWEEN_BATCHES)
+            return result
+        
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="question-batch")
+        in_flight = {}
+        try:
+            while True:
+                while len(in_flight) < concurrency:
+                    job = next_batch()
+                    if job is None:
+                        break
+                    s, count = job
+                    r, q_type, _ = streams[s]
+                    batch = runs[r].next_batch.get(q_type, 0) + batches[(r, q_type)]
+                    future = executor.submit(run_batch, s, count, batch)
+                    in_flight[future] = (s, count, batch)
+                    requested[s] += count
+                    batches[(r, q_type)] += 1
+                    in_flight_per_topic[r] += 1
+                
+                finish_topics()
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    s, count, batch = in_flight.pop(future)
+                    r, q_type, _ = streams[s]
+                    requested[s] -= count
+                    in_flight_per_topic[r] -= 1
+                    questions, status = future.result()
+                    self._close_batch(runs[r], q_type, batch, count, questions, status, sizer,
+                                      verbose=False, subtopic=streams[s][2])
+                    
+                    bars[s].update(max(min(len(questions), quota[s] - generated[s]), 0))
+                    generated[s] += len(questions)
+                    if trackers[s].saturated and s not in saturated:
+                        hand_off_quota(s)
+                    QUEUE_DEPTH.set(sum(max(quota[i] - generated[i], 0) for i in range(len(streams))),
+                                    stage="generate")
+        finally:
+            # On interrupt, drop queued batches instead of waiting for them
+            executor.shutdown(wait=False, cancel_futures=True)
+            for bar in set(bars):
+                bar.close()
     
     def generate_multi_type_dataset(self, topic: str, question_types: List[str], 
-                                   target_count: int = 5000, output_path: str = None) -> List[Dict]:
-        """Generate a comprehensive dataset using multiple question types simultaneously"""
+                                   target_count: int = 5000, output_path: str = None,
+                                   concurrency: int = 1, resume: bool = False,
+                                   similarity_threshold: float = 0.7,
+                                   batch_size: Optional[int] = None,
+                                   on_questions: Callable[[List[Dict]], None] = None,
+                                   fingerprints_path: str = None, subtopics: int = 0,
+                                   min_yield: float = 0.2, low_yield_calls: int = 3) -> List[Dict]:
+        """Generate a comprehensive dataset using multiple question types simultaneously.
+        on_questions, if given, receives kept questions as soon as they are saved - per batch, or
+        as each question arrives when streaming (resumed questions first). With fingerprints_path, questions already in that store
+        from earlier runs or seeded datasets are dropped too. subtopics > 0 first outlines that
+        many subtopics and gives each its own share of every type's quota. Quotas count unique
+        questions; a type (or subtopic) stops early after low_yield_calls calls in a row keep
+        fewer than min_yield new questions per question requested."""
+        from tqdm import tqdm
         
-        if output_path is None:
-            output_path = f"output/{topic.replace(' ', '_').lower()}_questions.jsonl"
+        run = TopicRun(topic, question_types, target_count, output_path, on_questions,
+                       min_yield, low_yield_calls)
         
         print(f"🚀 Starting multi-type question generation for: {topic}")
         print(f"📊 Target: {target_count} questions")
@@ -284,110 +989,120 @@ class QuestionGenerator:
         print(f"🧠 Using Local LLM with optimized question generation prompts")
         print(f"🤖 Using model: {self.model}")
         
-        all_questions = []
-        questions_per_type = target_count // len(question_types)
+        self._start_topic(run, resume, similarity_threshold, fingerprints_path, subtopics)
+        questions_per_type = run.questions_per_type
         
-        # Show target distribution
-        print(f"\n📋 Target distribution:")
-        for q_type in question_types:
-            print(f"   {q_type}: {questions_per_type} questions")
-        print()
+        # batch_size=None sizes each call automatically
+        sizer = BatchSizer(batch_size)
         
+        existing = {q_type: run.generated(q_type) for q_type in question_types}
         # Create overall progress tracking
-        total_generated = 0
+        total_generated = sum(min(count, questions_per_type) for count in existing.values())
         
         try:
-            for i, question_type in enumerate(question_types, 1):
-                print(f"\n📝 [{i}/{len(question_types)}] Generating {questions_per_type} {question_type} questions...")
+            if concurrency > 1 or run.subtopics:
+                # Subtopic streams are scheduled like types, even one batch at a time
+                self._generate_concurrently([run], concurrency, sizer)
+            else:
+                for i, question_type in enumerate(question_types, 1):
+                    missing = max(questions_per_type - existing[question_type], 0)
+                    if missing == 0:
+                        print(f"\n✅ [{i}/{len(question_types)}] {question_type} already has {existing[question_type]} questions")
+                        continue
+                    print(f"\n📝 [{i}/{len(question_types)}] Generating {missing} {question_type} questions...")
                 
-                # Track progress for this type
-                type_questions = []
-                batch_size = 10  # Smaller batches for better progress tracking
-                num_batches = (questions_per_type + batch_size - 1) // batch_size
+                    # Track progress for this type
+                    type_questions = []
+                    tracker = run.tracker(question_type)
+                    batch = run.next_batch.get(question_type, 0)
                 
-                # Create progress bar for individual questions
-                with tqdm(total=questions_per_type, desc=f"Generating {question_type} questions", 
-                         unit="question") as pbar:
+                    # Create progress bar for individual questions
+                    with tqdm(total=questions_per_type, initial=existing[question_type],
+                             desc=f"Generating {question_type} questions", unit="question") as pbar:
                     
-                    for batch in range(num_batches):
-                        batch_size_actual = min(batch_size, questions_per_type - batch * batch_size)
-                        
-                        if batch_size_actual <= 0:
-                            break
+                        # Keep asking until the type has its unique quota or its prompt is saturated
+                        while len(type_questions) < missing and not tracker.saturated:
+                            batch_size_actual = min(sizer.size, missing - len(type_questions))
                         
-                        questions = self.generate_questions(
-                            topic=topic,
-                            question_type=question_type,
-                            num_questions=batch_size_actual
-                        )
+                            questions, status = self._generate_batch(run, question_type, batch_size_actual, batch)
+                            self._close_batch(run, question_type, batch, batch_size_actual,
+                                              questions, status, sizer)
+                            type_questions.extend(questions)
                         
-                        # Add metadata
-                        for question in questions:
-                            question["topic"] = topic
-                            question["generation_type"] = question_type
-                            question["batch"] = batch
-                            question["timestamp"] = time.time()
+                            # Update progress bar for each question generated
+                            pbar.update(len(questions))
                         
-                        type_questions.extend(questions)
-                        all_questions.extend(questions)
+                            # Update overall progress
+                            total_generated += len(questions)
+                            QUEUE_DEPTH.set(max(target_count - total_generated, 0), stage="generate")
+                            batch += 1
                         
-                        # Update progress bar for each question generated
-                        pbar.update(len(questions))
-                        
-                        # Update overall progress
-                        total_generated += len(questions)
-                        
-                        # Save progress every batch
-                        temp_path = f"{output_path}.temp"
-                        self.save_questions(all_questions, temp_path)
-                        
-                        # Rate limiting
-                        time.sleep(2)
+                            # Rate limiting
+                            time.sleep(config.DELAY_BETWEEN_BATCHES)
                 
-                print(f"✅ Generated {len(type_questions)} {question_type} questions")
+                    print(f"✅ Generated {len(type_questions)} {question_type} questions")
+                    if tracker.saturated:
+                        print(f"   ⚠️ Stopped early: {run.low_yield_calls} calls in a row added fewer than "
+                              f"{run.min_yield:.0%} new questions (try --subtopics)")
                 
-                # Show progress summary for this type
-                print(f"   📊 Progress: {len(type_questions)}/{questions_per_type} {question_type} questions completed")
-                print(f"   📈 Overall progress: {total_generated}/{target_count} total questions ({total_generated/target_count*100:.1f}%)")
+                    # Show progress summary for this type
+                    print(f"   📊 Progress: {existing[question_type] + len(type_questions)}/{questions_per_type} {question_type} questions completed")
+                    print(f"   📈 Overall progress: {total_generated}/{target_count} total questions ({total_generated/target_count*100:.1f}%)")
                 
-                # Show sample of generated questions for this type
-                if type_questions:
-                    print(f"   📝 Sample {question_type} question: {type_questions[0]['question'][:80]}...")
-            
-            # Remove duplicates
-            unique_questions = []
-            seen_questions = set()
-            
-            for question in all_questions:
-                question_text = question["question"].lower().strip()
-                if question_text not in seen_questions:
-                    seen_questions.add(question_text)
-                    unique_questions.append(question)
-            
-            print(f"🔄 Removed {len(all_questions) - len(unique_questions)} duplicate questions")
-            
-            # Show final distribution by type
-            type_counts = {}
-            for question in unique_questions:
-                q_type = question.get('generation_type', 'unknown')
-                type_counts[q_type] = type_counts.get(q_type, 0) + 1
-            
-            print(f"\n📊 Final question distribution by type:")
-            for q_type, count in type_counts.items():
-                print(f"   {q_type}: {count} questions")
-            
-            # Save final results
-            self.save_questions(unique_questions, output_path)
-            print(f"🎉 Completed! Generated {len(unique_questions)} unique questions about {topic}")
-            print(f"📁 Saved to: {output_path}")
+                    # Show sample of generated questions for this type
+                    if type_questions:
+                        print(f"   📝 Sample {question_type} question: {type_questions[0]['question'][:80]}...")
             
+            unique_questions = self._finish_topic(run)
+            self._print_run_stats(sizer)
             return unique_questions
         
         except KeyboardInterrupt:
             print("\n⚠️ Process interrupted by user")
-            if all_questions:
-                self.save_questions(all_questions, f"{output_path}.interrupted")
-            return all_questions
+            if run.questions:
+                self.save_questions(run.questions, f"{run.output_path}.interrupted")
+            print(f"💡 Rerun with --resume to continue from {run.output_path}.temp")
+            return run.questions
+    
+    def generate_topics(self, jobs: List[Dict], concurrency: int = 1, resume: bool = False,
+                        similarity_threshold: float = 0.7, batch_size: Optional[int] = None,
+                        fingerprints_path: str = None, subtopics: int = 0, min_yield: float = 0.2,
+                        low_yield_calls: int = 3) -> Dict[str, List[Dict]]:
+        """Generate datasets for many topics (dicts from load_topics) from one shared pool of
+        `concurrency` requests; each topic's output is written as soon as the topic is complete"""
+        runs = [TopicRun(job["topic"], job["types"], job["count"], job.get("output"),
+                         min_yield=min_yield, low_yield_calls=low_yield_calls) for job in jobs]
+        
+        print(f"🚀 Starting question generation for {len(runs)} topics "
+              f"({sum(run.target_count for run in runs)} questions)")
+        print(f"🤖 Using model: {self.model}")
+        for i, run in enumerate(runs, 1):
+            print(f"\n📚 [{i}/{len(runs)}] {run.topic}: {run.target_count} {', '.join(run.question_types)} "
+                  f"questions -> {run.output_path}")
+            self._start_topic(run, resume, similarity_threshold, fingerprints_path, subtopics)
+        
+        # One batch sizer: every topic goes to the same model
+        sizer = BatchSizer(batch_size)
+        results = {}
+        
+        def finish(run: TopicRun):
+            print(f"\n📚 {run.topic}")
+            results[run.topic] = self._finish_topic(run)
+        
+        try:
+            self._generate_concurrently(runs, concurrency, sizer, on_topic_done=finish)
+        except KeyboardInterrupt:
+            print("\n⚠️ Process interrupted by user")
+            for run in runs:
+                if run.topic not in results and run.questions:
+                    self.save_questions(run.questions, f"{run.output_path}.interrupted")
+            print(f"💡 Rerun with --resume to continue the {len(runs) - len(results)} unfinished topics")
+            return results
+        
+        self._print_run_stats(sizer)
+        print(f"\n🎉 Completed {len(results)} topics, "
+              f"{sum(len(questions) for questions in results.values())} unique questions in total")
+        return results
 
     def generate_comprehensive_dataset(self, topic: str, target_count: int = 5000, 
                                      output_path: str = None) -> List[Dict]:
@@ -399,35 +1114,139 @@ class QuestionGenerator:
             output_path=output_path
         )
 
+def load_topics(path: str, count: int, question_types: List[str]) -> List[Dict]:
+    """Jobs for --topics-file: a .json list or .jsonl lines of {"topic", "count", "types", "output"}
+    (or plain topic strings), a .csv with those columns (types separated by spaces), or a .txt with
+    one topic per line. Missing counts and types fall back to --count and --types."""
+    file_ext = path.lower().split('.')[-1]
+    with open(path, 'r', encoding='utf-8') as f:
+        if file_ext == 'json':
+            entries = load(f)
+        elif file_ext == 'jsonl':
+            entries = [loads(line) for line in f if line.strip()]
+        elif file_ext == 'csv':
+            import csv
+            entries = [{k: v for k, v in row.items() if v} for row in csv.DictReader(f)]
+        elif file_ext == 'txt':
+            entries = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        else:
+            raise ValueError(f"Unsupported topics file format: {file_ext}")
+    
+    jobs = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"topic": entry}
+        topic = str(entry.get("topic", "")).strip()
+        if not topic:
+            raise ValueError(f"Topic entry without a topic in {path}: {entry}")
+        types = entry.get("types", question_types)
+        if isinstance(types, str):
+            types = types.split()
+        unknown = [t for t in types if t not in QUESTION_TYPES]
+        if unknown or not types:
+            raise ValueError(f"{topic}: unknown question types {unknown} (choose from {', '.join(QUESTION_TYPES)})")
+        job = {"topic": topic, "count": int(entry.get("count", count)), "types": types}
+        if entry.get("output"):
+            job["output"] = entry["output"]
+        jobs.append(job)
+    
+    # Topics share nothing but the pool, so each needs its own progress and output files
+    outputs = [job.get("output") or job["topic"].replace(' ', '_').lower() for job in jobs]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError(f"Topics in {path} must be unique (or have distinct outputs)")
+    return jobs
+
 def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="AI Question Generator - LLM Only Version")
-    parser.add_argument("--topic", "-t", required=True, help="Topic to generate questions about")
-    parser.add_argument("--count", "-c", type=int, default=5000, help="Target number of questions")
+    topic_source = parser.add_mutually_exclusive_group(required=True)
+    topic_source.add_argument("--topic", "-t", help="Topic to generate questions about")
+    topic_source.add_argument("--topics-file",
+                              help="Topics to generate in one run (.json, .jsonl, .csv or .txt) with optional "
+                                   "per-topic count, types and output; batches share the --concurrency pool")
+    parser.add_argument("--count", "-c", type=int, default=5000, help="Target number of questions (per topic)")
     parser.add_argument("--output", "-o", help="Output file path")
     parser.add_argument("--types", nargs="+", 
-                       choices=["comprehensive", "expert", "personal"],
+                       choices=QUESTION_TYPES,
                        default=["comprehensive"], 
                        help="Question generation types (can specify multiple)")
-    parser.add_argument("--batch-size", type=int, default=50, help="Questions per batch")
+    parser.add_argument("--batch-size", default="auto",
+                       help="Questions per generation call, or 'auto' to adapt it during the run")
+    parser.add_argument("--resume", action="store_true",
+                       help="Continue from the output's .temp progress file, generating only what each type is missing")
+    parser.add_argument("--similarity-threshold", type=float, default=0.7,
+                       help="Drop questions whose content words overlap a kept question by this Jaccard similarity (0 = off)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                       help="Batches generated in parallel across all types and topics (1 = one batch at a time)")
+    parser.add_argument("--min-yield", type=float, default=0.2,
+                       help="New unique questions per question requested below which a call counts as low-yield")
+    parser.add_argument("--low-yield-calls", type=int, default=3,
+                       help="Stop a type (or subtopic) after this many low-yield calls in a row")
+    parser.add_argument("--subtopics", type=int, default=0, metavar="N",
+                       help="Outline N subtopics first, then split each type's quota across them (0 = off)")
+    parser.add_argument("--fingerprints", nargs="?", const=DEFAULT_FINGERPRINTS_PATH, metavar="DB",
+                       help="Drop questions already in this persistent fingerprint store and add the new ones "
+                            f"(default store: {DEFAULT_FINGERPRINTS_PATH}; seed it with fingerprints.py)")
+    parser.add_argument("--response-format", choices=RESPONSE_FORMATS, default="prompt",
+                       help="Constrain output to the question schema: json_schema (response_format) or grammar "
+                            "(llama.cpp GBNF); falls back to prompt if the server rejects it")
+    parser.add_argument("--stream", action="store_true",
+                       help="Stream completions and keep each question as soon as it is generated")
+    parser.add_argument("--metrics-port", type=int, help="Expose live run metrics on this local port")
+    parser.add_argument("--profile", nargs="?", const="", metavar="PREFIX",
+                       help="Profile each pipeline stage and write a report and flamegraph stacks")
     
     args = parser.parse_args()
     
+    if args.batch_size != "auto" and not (args.batch_size.isdigit() and int(args.batch_size) > 0):
+        parser.error("--batch-size must be a positive integer or 'auto'")
+    batch_size = None if args.batch_size == "auto" else int(args.batch_size)
+    if args.low_yield_calls < 1:
+        parser.error("--low-yield-calls must be at least 1")
+    if args.topics_file and args.output:
+        parser.error("--output applies to --topic; give per-topic outputs in the topics file")
+    
+    if args.profile is not None:
+        enable_profiling(args.profile or None)
+    
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    
     # Process question generation
     try:
-        generator = QuestionGenerator()
+        generator = QuestionGenerator(response_format=args.response_format, stream=args.stream)
         
-        if len(args.types) == 1 and args.types[0] != "comprehensive":
+        if args.topics_file:
+            # Generate every topic from one shared pool
+            generator.generate_topics(
+                jobs=load_topics(args.topics_file, args.count, args.types),
+                concurrency=args.concurrency,
+                resume=args.resume,
+                similarity_threshold=args.similarity_threshold,
+                batch_size=batch_size,
+                fingerprints_path=args.fingerprints,
+                subtopics=args.subtopics,
+                min_yield=args.min_yield,
+                low_yield_calls=args.low_yield_calls
+            )
+        
+        elif len(args.types) == 1 and args.types[0] != "comprehensive":
             # Generate single type
+            output_path = args.output or f"output/{args.topic.replace(' ', '_').lower()}_{args.types[0]}_questions.jsonl"
+            status = {}
             questions = generator.generate_questions(
                 topic=args.topic,
                 question_type=args.types[0],
-                num_questions=args.count
+                num_questions=args.count,
+                status=status,
+                on_questions=lambda streamed: generator.save_questions(streamed, output_path, verbose=False)
             )
             
-            output_path = args.output or f"output/{args.topic.replace(' ', '_').lower()}_{args.types[0]}_questions.jsonl"
-            generator.save_questions(questions, output_path)
+            if status.get("streamed"):
+                print(f"✅ Saved {len(questions)} questions to {output_path}")
+            else:
+                generator.save_questions(questions, output_path)
             
         else:
             # Generate multi-type dataset
@@ -435,7 +1254,15 @@ def main():
                 topic=args.topic,
                 question_types=args.types,
                 target_count=args.count,
-                output_path=args.output
+                output_path=args.output,
+                concurrency=args.concurrency,
+                resume=args.resume,
+                similarity_threshold=args.similarity_threshold,
+                batch_size=batch_size,
+                fingerprints_path=args.fingerprints,
+                subtopics=args.subtopics,
+                min_yield=args.min_yield,
+                low_yield_calls=args.low_yield_calls
             )
         
         # if questions:
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Question Output Schema
+JSON schema and GBNF grammar that constrain generation to well-formed question objects,
+and a validator for the parsed objects.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+QUESTION_FIELDS = ("question", "category", "complexity", "focus_area")
+COMPLEXITY_LEVELS = ("basic", "intermediate", "advanced", "introspective")
+
+# prompt: instructions only; json_schema: OpenAI-style response_format (vLLM, Ollama,
+# llama.cpp, LM Studio); grammar: GBNF grammar field (llama.cpp server)
+RESPONSE_FORMATS = ("prompt", "json_schema", "grammar")
+
+# Questions in a fixed key order, so the output parses without any cleanup
+QUESTIONS_GRAMMAR = r'''
+root ::= "[" ws item ("," ws item)* ws "]"
+item ::= "{" ws "\"question\"" ws ":" ws string "," ws "\"category\"" ws ":" ws string "," ws "\"complexity\"" ws ":" ws complexity "," ws "\"focus_area\"" ws ":" ws string ws "}" ws
+complexity ::= "\"basic\"" | "\"intermediate\"" | "\"advanced\"" | "\"introspective\""
+string ::= "\"" ([^"\\\x7F\x00-\x1F] | "\\" (["\\/bfnrt] | "u" [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F]))+ "\""
+ws ::= [ \t\n]*
+'''.strip()
+
+
+def question_schema(num_questions: int) -> Dict:
+    """JSON schema for a batch of questions. Strict-mode servers require an object at the
+    root, so the array is wrapped in {"questions": [...]}, and reject length and count
+    keywords, so the minimum question length and num_questions are enforced by
+    validate_questions instead"""
+    item = {
+        "type": "object",
+        "properties": {
+            "question": {"type": "string"},
+            "category": {"type": "string"},
+            "complexity": {"type": "string", "enum": list(COMPLEXITY_LEVELS)},
+            "focus_area": {"type": "string"},
+        },
+        "required": list(QUESTION_FIELDS),
+        "additionalProperties": False,
+    }
+    return {
+        "type": "object",
+        "properties": {"questions": {"type": "array", "items": item}},
+        "required": ["questions"],
+        "additionalProperties": False,
+    }
+
+
+def response_format_fields(mode: str, num_questions: int) -> Dict:
+    """Extra chat completion payload fields for a response format mode"""
+    if mode == "json_schema":
+        return {"response_format": {"type": "json_schema", "json_schema": {
+            "name": "questions", "strict": True, "schema": question_schema(num_questions)}}}
+    if mode == "grammar":
+        return {"grammar": QUESTIONS_GRAMMAR}
+    return {}
+
+
+def validate_questions(items: List[Any], strict: bool = False,
+                       max_items: Optional[int] = None) -> Tuple[List[Dict], int, int]:
+    """Question objects that match the schema, how many items did not, and how many valid
+    questions were dropped past max_items. Without strict, only a usable "question" string is
+    required (free-form prompt output varies) and max_items is not applied"""
+    valid = []
+    for item in items:
+        if type(item) is not dict:
+            continue
+        question = item.get("question")
+        if type(question) is not str or len(question.strip()) < 10:
+            continue
+        if strict and (type(item.get("category")) is not str
+                       or type(item.get("focus_area")) is not str
+                       or item.get("complexity") not in COMPLEXITY_LEVELS):
+            continue
+        valid.append(item)
+    invalid = len(items) - len(valid)
+    over_limit = 0
+    if strict and max_items is not None and len(valid) > max(max_items, 0):
+        over_limit = len(valid) - max(max_items, 0)
+        valid = valid[:max(max_items, 0)]
+    return valid, invalid, over_limit
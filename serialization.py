@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+JSON Serialization
+The tool's JSON reads and writes go through this module. orjson is used when it is installed and
+the standard library otherwise; both backends produce the same text - compact separators, non-ASCII
+characters written as-is, NaN and Infinity written as null, and indent=True matching
+json.dump(..., indent=2).
+Two kinds of caller keep the standard library on purpose: the nested-answer flattening in
+upload_now.to_pair and export_parquet.to_row, whose ASCII-escaped text is published data, and the
+benchmark scripts, whose fixtures and reports should not depend on the backend being measured.
+"""
+
+import json
+import math
+from typing import IO, Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+# orjson's decode errors subclass json.JSONDecodeError, so callers catch this with either backend
+JSONDecodeError = json.JSONDecodeError
+
+_compact = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode
+_indented = json.JSONEncoder(ensure_ascii=False, indent=2, allow_nan=False).encode
+_string = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _finite(obj: Any) -> Any:
+    """obj with NaN and Infinity replaced by None, which orjson writes as null"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _encode(obj: Any, indent: bool) -> str:
+    encode = _indented if indent else _compact
+    try:
+        return encode(obj)
+    except ValueError as e:
+        if "float" not in str(e):
+            raise
+        # NaN and Infinity are not JSON; the standard library would write them as bare tokens
+        return encode(_finite(obj))
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Parse a JSON document from text or UTF-8 bytes"""
+    if orjson:
+        return orjson.loads(data)
+    try:
+        return json.loads(data)
+    except UnicodeDecodeError as e:
+        # Raised as orjson does, so one except clause covers both backends
+        raise JSONDecodeError(f"Invalid UTF-8: {e.reason}", "", e.start) from e
+
+
+def load(f: IO) -> Any:
+    """Parse a whole JSON file opened in text or binary mode"""
+    return loads(f.read())
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Encode obj as compact JSON text, or indented by two spaces"""
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode('utf-8')
+        except TypeError:
+            # Values orjson rejects (non-string keys, integers over 64 bits, lone surrogates)
+            pass
+    return _encode(obj, indent)
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """dumps() as UTF-8 bytes, e.g. for a request body"""
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass
+    try:
+        return _encode(obj, indent).encode('utf-8')
+    except UnicodeEncodeError:
+        # Lone surrogates have no UTF-8 form; escaped as \ud800 they are still valid JSON
+        return json.dumps(_finite(obj), indent=2 if indent else None,
+                          separators=None if indent else (",", ":")).encode('ascii')
+
+
+def dump(obj: Any, f: IO, indent: bool = False):
+    """Write obj to a file opened in text mode"""
+    f.write(dumps(obj, indent))
+
+
+def encode_string(text: str) -> str:
+    """A str as a JSON string literal, for output laid out by hand"""
+    if orjson:
+        try:
+            return orjson.dumps(text).decode('utf-8')
+        except TypeError:
+            pass
+    return _string(text)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Parquet export tests: the record to row mapping, input format detection, shard rollover and
+renaming, and cleanup after a re-export or a failed one.
+Run with: python -m pytest test_export_parquet.py
+"""
+
+import gzip
+import json
+import lzma
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import export_parquet
+from export_parquet import export_parquet as export, read_records, to_row
+
+
+def _answers(count: int, start: int = 0):
+    return [{"question_id": i, "question": f"Question {i}?", "answer": "x" * 200, "character": "default",
+             "model": "local", "timestamp": 1700000000.0 + i, "latency_s": 1.5,
+             "usage": {"prompt_tokens": 10, "completion_tokens": 20}} for i in range(start, start + count)]
+
+
+def _write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("".join(json.dumps(r) + '\n' for r in records))
+
+
+def _rows(paths):
+    import pyarrow.parquet as pq
+    return [row for path in paths for row in pq.read_table(path).to_pylist()]
+
+
+def test_to_row_maps_fields_onto_schema():
+    row = to_row({"question_id": "7", "question": "Who?", "answer": {"text": "Mandela"},
+                  "roleplay_character": "mandela", "duration_ms": 2500, "error": "timeout",
+                  "usage": {"prompt_tokens": 3}})
+    assert row["question_id"] == 7
+    assert row["answer"] == json.dumps({"text": "Mandela"}, indent=2)
+    assert row["roleplay_character"] == "mandela"
+    assert row["latency_s"] == 2.5
+    assert row["error"] is True
+    assert row["prompt_tokens"] == 3 and row["completion_tokens"] is None
+    assert set(row) == set(export_parquet.answer_schema().names)
+
+
+def test_to_row_drops_ids_that_are_not_integers():
+    assert to_row({"question_id": "q7", "question": "Who?"})["question_id"] is None
+    assert to_row({"question": "Who?"})["question_id"] is None
+    assert to_row({"question_id": 3, "question": "Who?", "latency_s": 0.4, "duration_ms": 900})["latency_s"] == 0.4
+
+
+@pytest.mark.parametrize("name, array", [
+    ("answers.json", True), ("answers.json.gz", True), ("answers.jsonl", False), ("answers.jsonl.xz", False),
+    # Only the file's own extension counts, not the rest of the path
+    ("backup.jsonl/answers.json", True), ("exports.json/answers.jsonl", False),
+])
+def test_read_records_detects_format_by_extension(tmp_path, name, array):
+    records = _answers(3)
+    text = json.dumps(records) if array else "".join(json.dumps(r) + '\n' for r in records)
+    path = tmp_path / name
+    path.parent.mkdir(exist_ok=True)
+    opener = {".gz": gzip.open, ".xz": lzma.open}.get(path.suffix)
+    if opener:
+        with opener(path, 'wt', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        path.write_text(text, encoding='utf-8')
+    assert list(read_records(str(path))) == records
+
+
+def test_shards_roll_over_and_are_renamed(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_parquet, "BATCH_ROWS", 10)
+    source = tmp_path / "answers.jsonl"
+    _write_jsonl(source, _answers(35) + [{"question": "Failed?", "answer": "", "error": "timeout"}])
+    out = tmp_path / "parquet"
+
+    # Every batch reaches the tiny shard size, so each one becomes a shard
+    paths = export([str(source)], str(out), shard_mb=0.000001)
+    assert [os.path.basename(p) for p in paths] == [f"train-0000{i}-of-00004.parquet" for i in range(4)]
+    assert sorted(os.listdir(out)) == sorted(os.path.basename(p) for p in paths)
+    rows = _rows(paths)
+    assert [row["question_id"] for row in rows] == list(range(35))
+
+    # A re-export with fewer shards replaces them all
+    paths = export([str(source)], str(out), skip_errors=False)
+    assert sorted(os.listdir(out)) == ["train-00000-of-00001.parquet"]
+    assert len(_rows(paths)) == 36
+
+
+def test_failed_export_leaves_no_partial_shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_parquet, "BATCH_ROWS", 10)
+    source = tmp_path / "answers.jsonl"
+    _write_jsonl(source, _answers(30))
+    out = tmp_path / "parquet"
+    earlier = export([str(source)], str(out))
+
+    def failing_records(path):
+        yield from _answers(25)
+        raise OSError("read failed")
+
+    monkeypatch.setattr(export_parquet, "read_records", failing_records)
+    with pytest.raises(OSError):
+        export([str(source)], str(out), shard_mb=0.000001)
+    assert sorted(os.listdir(out)) == [os.path.basename(p) for p in earlier]
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Fingerprint store regression test: question_generator.py with --fingerprints and several
+concurrent calls against the mock server. Questions are kept on worker threads, so the store's
+SQLite connection must be usable outside the thread that opened it.
+Run with: python -m pytest test_fingerprints.py
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from mock_server import EndpointConfig, MockConfig, start_mock_server
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def mock_url():
+    pytest.importorskip("requests")
+    config = MockConfig(chat=EndpointConfig(latency="fixed", latency_median=0.02),
+                        search=EndpointConfig(latency="fixed", latency_median=0.0))
+    server = start_mock_server(config)
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+
+
+def _generate(tmp_path, base_url: str, *extra: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, LOCAL_AI_BASE_URL=base_url, DELAY_BETWEEN_REQUESTS="0", DELAY_BETWEEN_BATCHES="0")
+    return subprocess.run(
+        [sys.executable, os.path.join(REPO_DIR, "question_generator.py"), "--topic", "Nelson Mandela",
+         "--fingerprints", str(tmp_path / "fingerprints.db"), *extra],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+
+
+def _stored(tmp_path) -> int:
+    with sqlite3.connect(tmp_path / "fingerprints.db") as db:
+        return db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+
+def test_fingerprints_with_concurrency(tmp_path, mock_url):
+    result = _generate(tmp_path, mock_url, "--count", "40", "--concurrency", "4",
+                       "--output", "output/questions.jsonl")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "SQLite objects created in a thread" not in result.stdout
+    assert _stored(tmp_path) == 40
+
+
+def test_fingerprints_with_subtopics(tmp_path, mock_url):
+    result = _generate(tmp_path, mock_url, "--count", "20", "--subtopics", "3",
+                       "--output", "output/questions.jsonl")
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "SQLite objects created in a thread" not in result.stdout
+    assert _stored(tmp_path) == 20
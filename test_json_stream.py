@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+JSON array salvage tests: truncated, fenced and streamed arrays yield exactly their complete
+elements.
+Run with: python -m pytest test_json_stream.py
+"""
+
+import json
+
+from json_stream import JSONArrayParser, parse_partial_array
+
+QUESTIONS = [{"question": f"Question {i}, with \"quotes\" and ] brackets?", "category": "history"}
+             for i in range(5)]
+TEXT = json.dumps(QUESTIONS, indent=2)
+
+
+def test_complete_array():
+    assert parse_partial_array(TEXT) == QUESTIONS
+
+
+def test_truncated_array_yields_complete_objects_only():
+    # Cut inside the fourth object
+    cut = TEXT.index('"Question 3') + 5
+    assert parse_partial_array(TEXT[:cut]) == QUESTIONS[:3]
+    # Cut right after an object's closing brace
+    end_of_second = TEXT.index("}", TEXT.index('"Question 1')) + 1
+    assert parse_partial_array(TEXT[:end_of_second]) == QUESTIONS[:2]
+
+
+def test_fenced_array_with_prose():
+    text = "Here are your questions:\n```json\n" + TEXT + "\n```\nLet me know if you need more."
+    assert parse_partial_array(text) == QUESTIONS
+    assert parse_partial_array("```json\n" + TEXT[:TEXT.index('"Question 2') + 3]) == QUESTIONS[:2]
+
+
+def test_no_array():
+    assert parse_partial_array("I cannot help with that.") == []
+    assert parse_partial_array("") == []
+
+
+def test_stream_yields_each_element_once_as_it_closes():
+    parser = JSONArrayParser()
+    seen = []
+    for i in range(0, len(TEXT), 7):
+        seen.extend(parser.feed(TEXT[i:i + 7]))
+        assert seen == QUESTIONS[:len(seen)]
+    assert seen == QUESTIONS
+    assert parser.finished and parser.items == len(QUESTIONS)
+    assert parser.feed("[1]") == []
+
+
+def test_number_at_end_of_buffer_waits_for_more_text():
+    parser = JSONArrayParser()
+    assert parser.feed("[1, 2") == [1]
+    assert parser.feed("3, 4]") == [23, 4]
+    assert parser.finished
+
+
+def test_long_stream_keeps_order():
+    items = [{"question": "x" * 1000, "n": i} for i in range(200)]
+    parser = JSONArrayParser()
+    text = json.dumps(items)
+    result = []
+    for i in range(0, len(text), 4096):
+        result.extend(parser.feed(text[i:i + 4096]))
+    assert result == items
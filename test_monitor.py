@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Monitor regression test: a runner (main_local_llm_only.py) answers a small dataset against the
+mock server, and the monitor follows the {OUTPUT_PATH}.temp progress file the runner writes every
+50 questions. Every answer must be counted exactly once.
+Run with: python -m pytest test_monitor.py
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from mock_server import EndpointConfig, MockConfig, start_mock_server
+from monitor import FileTail, RunMonitor, latest_output, monitor
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def mock_url():
+    pytest.importorskip("requests")
+    pytest.importorskip("tqdm")
+    config = MockConfig(chat=EndpointConfig(latency="fixed", latency_median=0.0),
+                        search=EndpointConfig(latency="fixed", latency_median=0.0))
+    server = start_mock_server(config)
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+
+
+def _run(tmp_path, base_url: str, questions: int) -> subprocess.CompletedProcess:
+    dataset = tmp_path / "questions.json"
+    dataset.write_text(json.dumps([{"id": i, "question": f"What happened in year {1900 + i} of the struggle?"}
+                                   for i in range(questions)]), encoding="utf-8")
+    env = dict(os.environ, LOCAL_AI_BASE_URL=base_url, DELAY_BETWEEN_REQUESTS="0", DELAY_BETWEEN_BATCHES="0")
+    return subprocess.run(
+        [sys.executable, os.path.join(REPO_DIR, "main_local_llm_only.py"), "--dataset", str(dataset)],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+
+
+def test_temp_file_holds_each_answer_once(tmp_path, mock_url):
+    result = _run(tmp_path, mock_url, 120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    temp_paths = glob.glob(str(tmp_path / "output" / "*.jsonl.temp"))
+    assert len(temp_paths) == 1
+
+    # Two checkpoints of 50 answers, each written once
+    run = monitor(temp_paths[0], once=True)
+    assert run.total == 100
+    assert run.unparseable == 0
+    with open(temp_paths[0], 'r', encoding='utf-8') as f:
+        ids = [json.loads(line)["question_id"] for line in f]
+    assert ids == list(range(100))
+
+
+def test_tail_follows_checkpoints(tmp_path):
+    temp_path = tmp_path / "answers_1.jsonl.temp"
+    tail = FileTail(str(temp_path))
+    run = RunMonitor()
+    # The runner appends one block of new answers per checkpoint
+    for checkpoint in range(3):
+        with open(temp_path, 'a', encoding='utf-8') as f:
+            for i in range(50):
+                f.write(json.dumps({"question_id": checkpoint * 50 + i, "answer": "a", "timestamp": 1.0}) + '\n')
+        for line in tail.read_lines():
+            run.add_line(line, 1.0)
+        assert run.total == (checkpoint + 1) * 50
+
+
+def test_latest_output_includes_progress_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("output")
+    finished = tmp_path / "output" / "answers_1.jsonl"
+    finished.write_text("", encoding="utf-8")
+    os.utime(finished, (1, 1))
+    running = tmp_path / "output" / "answers_2.jsonl.temp"
+    running.write_text("", encoding="utf-8")
+    assert latest_output() == os.path.join("output", "answers_2.jsonl.temp")
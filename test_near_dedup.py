@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate filter tests: content word normalization, the LSH parameters, drops at the
+similarity threshold, and the bucket size cap.
+Run with: python -m pytest test_near_dedup.py
+"""
+
+import near_dedup
+from near_dedup import NearDuplicateIndex, content_words, lsh_parameters
+
+
+def test_content_words_drop_phrasing():
+    assert content_words("How did prison change you?") == content_words("In what ways did prison change you?")
+    assert content_words("What were Mandela's years on Robben Island like?") == (
+        "island", "like", "mandela", "robben", "year")
+    assert content_words("Why was it?") == ()
+
+
+def test_lsh_parameters_make_threshold_pairs_candidates():
+    bands, rows = lsh_parameters(0.7, 48)
+    assert bands * rows <= 48
+    assert 1 - (1 - 0.7 ** rows) ** bands >= 0.95
+
+
+def test_paraphrase_dropped_and_distinct_question_kept():
+    index = NearDuplicateIndex(threshold=0.7)
+    assert index.check_and_add("How did the years in prison on Robben Island change your view of reconciliation?") is None
+    # Same content words, different phrasing
+    assert index.check_and_add("In what ways did years in prison on Robben Island change your view of reconciliation?") == 1.0
+    # One of seven content words replaced: Jaccard 6/8
+    assert index.check_and_add("How did the years in prison on Robben Island change your view of forgiveness?") == 0.75
+    assert index.check_and_add("What role did sport play in uniting South Africa after 1994?") is None
+    assert index.checked == 4
+    assert sum(index.dropped.values()) == 2
+
+
+def test_threshold_is_inclusive_and_below_threshold_is_kept():
+    # {a, b, c, d} vs {a, b, c, e}: Jaccard 3/5 = 0.6
+    first, second = "alpha bravo charlie delta", "alpha bravo charlie echo"
+    index = NearDuplicateIndex(threshold=0.6)
+    index.add(first)
+    assert index.check_and_add(second) == 0.6
+    strict = NearDuplicateIndex(threshold=0.61)
+    strict.add(first)
+    assert strict.check_and_add(second) is None
+
+
+def test_filter_keeps_order_of_unique_questions():
+    index = NearDuplicateIndex()
+    questions = [{"question": "Who was Walter Sisulu to Mandela?"},
+                 {"question": "Who was Walter Sisulu to Mandela then?"},
+                 {"question": "Which law did the Defiance Campaign oppose?"}]
+    assert index.filter(questions) == [questions[0], questions[2]]
+
+
+def test_bucket_size_is_capped(monkeypatch):
+    monkeypatch.setattr(near_dedup, "MAX_BUCKET_SIZE", 3)
+    index = NearDuplicateIndex(threshold=0.9)
+    # Every question shares most words, so they land in the same buckets
+    for i in range(10):
+        index.add(f"mandela presidency reconciliation truth commission topic{i}")
+    assert index._buckets
+    assert all(isinstance(bucket, int) or len(bucket) <= 3 for bucket in index._buckets.values())
+    # An exact word set is still caught without the buckets
+    assert index.check_and_add("topic7 mandela presidency reconciliation truth commission") == 1.0
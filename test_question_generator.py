@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Generation control tests: BatchSizer keeps batch sizes within bounds as it adapts, and
+YieldTracker marks a stream saturated after enough low-yield calls in a row.
+Run with: python -m pytest test_question_generator.py
+"""
+
+import random
+
+from question_generator import BatchSizer, YieldTracker
+
+
+def test_fixed_batch_size_never_changes():
+    sizer = BatchSizer(batch_size=25)
+    sizer.update(25, 0, 1.0, {"truncated": True})
+    sizer.update(25, 25, 0.1, {})
+    assert sizer.size == 25 and sizer.shrinks == 0
+
+
+def test_truncated_response_halves_and_caps():
+    sizer = BatchSizer(start_size=40, min_size=5, max_size=50)
+    sizer.update(40, 10, 2.0, {"truncated": True})
+    assert sizer.size == 20
+    assert sizer.max_size == 36
+    # Growth after recovery stops below the size that was cut off
+    for _ in range(10):
+        sizer.update(sizer.size, sizer.size, 1.0, {})
+    assert sizer.size <= 36
+
+
+def test_sizer_stays_within_bounds():
+    rng = random.Random(3)
+    sizer = BatchSizer(start_size=10, min_size=5, max_size=50)
+    for _ in range(500):
+        requested = sizer.size
+        status = {"truncated": rng.random() < 0.1, "parse_failed": rng.random() < 0.05}
+        sizer.update(requested, rng.randint(0, requested), rng.uniform(0.5, 5.0), status)
+        assert 5 <= sizer.size <= 50
+        assert 5 <= sizer.max_size <= 50
+
+
+def test_sizer_grows_while_larger_batches_are_faster():
+    sizer = BatchSizer(start_size=10, min_size=5, max_size=50)
+    for _ in range(20):
+        # Unique questions per second rise with the batch size
+        sizer.update(sizer.size, sizer.size, 1.0, {})
+    assert sizer.size == 50
+
+
+def test_tail_of_quota_is_ignored():
+    sizer = BatchSizer(start_size=20)
+    sizer.update(3, 0, 10.0, {})
+    assert sizer.size == 20 and not sizer.rates
+
+
+def test_tracker_saturates_after_low_yield_calls_in_a_row():
+    tracker = YieldTracker(min_yield=0.2, patience=3)
+    assert tracker.record(10, 1) == 0.1
+    tracker.record(10, 0)
+    assert not tracker.saturated
+    # A good call resets the streak
+    tracker.record(10, 5)
+    tracker.record(10, 1)
+    tracker.record(10, 1)
+    assert not tracker.saturated
+    tracker.record(10, 1)
+    assert tracker.saturated
+    assert tracker.yields == [0.1, 0.0, 0.5, 0.1, 0.1, 0.1]
+
+
+def test_tracker_counts_calls_adding_nothing_as_low():
+    tracker = YieldTracker(min_yield=0.0, patience=2)
+    tracker.record(10, 0)
+    tracker.record(0, 0)
+    assert tracker.saturated
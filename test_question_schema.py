@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Question schema tests: the strict schema only uses keywords strict-mode servers accept, and
+validate_questions enforces the limits the schema leaves out.
+Run with: python -m pytest test_question_schema.py
+"""
+
+from question_schema import question_schema, validate_questions
+
+QUESTION = {"question": "What did Mandela study at Fort Hare?", "category": "education",
+            "complexity": "basic", "focus_area": "early life"}
+
+
+def test_strict_schema_has_no_length_or_count_keywords():
+    text = str(question_schema(10))
+    assert "minLength" not in text and "maxItems" not in text
+
+
+def test_short_and_incomplete_questions_are_invalid():
+    items = [QUESTION, {**QUESTION, "question": "Why?"}, {**QUESTION, "complexity": "hard"}, "text"]
+    assert validate_questions(items, strict=True) == ([QUESTION], 3, 0)
+    # Without strict only the question text is checked
+    assert validate_questions(items) == ([QUESTION, {**QUESTION, "complexity": "hard"}], 2, 0)
+
+
+def test_questions_past_max_items_are_not_counted_invalid():
+    items = [QUESTION] * 5 + [{"question": "short"}]
+    assert validate_questions(items, strict=True, max_items=3) == ([QUESTION] * 3, 1, 2)
+    # A quota already reached drops every further question without calling it invalid
+    assert validate_questions([QUESTION] * 2, strict=True, max_items=0) == ([], 0, 2)
+    assert validate_questions(items, max_items=3) == ([QUESTION] * 5, 1, 0)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Serialization backend parity: orjson (when installed) and the standard library fallback must
+write the same text, including for values JSON cannot represent such as NaN and Infinity.
+Run with: python -m pytest test_serialization.py
+"""
+
+import json
+
+import pytest
+
+import serialization
+
+NON_FINITE = {"latency_s": float("nan"), "bounds": [float("inf"), -float("inf")], "score": 1.5}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+def test_non_finite_floats_are_null(backend):
+    assert serialization.dumps(NON_FINITE) == '{"latency_s":null,"bounds":[null,null],"score":1.5}'
+    assert serialization.dumps_bytes(NON_FINITE) == b'{"latency_s":null,"bounds":[null,null],"score":1.5}'
+    assert json.loads(serialization.dumps(NON_FINITE, indent=True)) == {
+        "latency_s": None, "bounds": [None, None], "score": 1.5}
+
+
+def test_non_finite_floats_with_stdlib_only_values(backend):
+    # Non-string keys and lone surrogates are always encoded by the standard library
+    assert serialization.dumps({1: float("nan")}) == '{"1":null}'
+    assert serialization.dumps_bytes(["\ud800", float("inf")]) == b'["\\ud800",null]'
+
+
+def test_backends_agree(backend):
+    record = {"question": "Qui était Mandela ?", "answer": "Président", "usage": {"prompt_tokens": 12},
+              "error": False, "latency_s": 0.25}
+    assert serialization.dumps(record) == json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+    assert serialization.dumps(record, indent=True) == json.dumps(record, ensure_ascii=False, indent=2)
+
+
+def test_circular_reference_still_fails(backend):
+    loop = []
+    loop.append(loop)
+    with pytest.raises((ValueError, TypeError)):
+        serialization.dumps(loop)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Delta publishing tests: publish_delta against a temporary hub directory as the pairs file grows,
+is edited and is pruned, and push_delta with a stand-in for the Hub client.
+Run with: python -m pytest test_upload_delta.py
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import upload_now
+from upload_now import load_manifest, pair_line, publish_delta, push_delta
+
+
+def _line(question: str, answer: str) -> str:
+    return pair_line({"question": question, "answer": answer}).decode('utf-8') + '\n'
+
+
+def _write(path, pairs, mode='w'):
+    with open(path, mode, encoding='utf-8') as f:
+        f.write("".join(_line(q, a) for q, a in pairs))
+
+
+def _published(hub_dir):
+    """Question -> answer over every shard in the manifest"""
+    import pyarrow.parquet as pq
+    pairs = {}
+    for shard in load_manifest(hub_dir)["shards"]:
+        for row in pq.read_table(os.path.join(hub_dir, shard)).to_pylist():
+            assert row["question"] not in pairs
+            pairs[row["question"]] = row["answer"]
+    return pairs
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "pairs.jsonl"), str(tmp_path / "hub")
+
+
+def test_append_only_growth_is_read_from_saved_offset(paths, capsys):
+    input_file, hub_dir = paths
+    _write(input_file, [("q1", "a1"), ("q2", "a2"), ("q3", "a3")])
+    written, removed = publish_delta(input_file, hub_dir)
+    assert len(written) == 1 and removed == []
+    size = os.path.getsize(input_file)
+    assert load_manifest(hub_dir)["input"]["size"] == size
+
+    _write(input_file, [("q4", "a4"), ("q5", "a5")], mode='a')
+    capsys.readouterr()
+    written, removed = publish_delta(input_file, hub_dir)
+    assert f"read from byte {size}" in capsys.readouterr().out
+    assert len(written) == 1 and removed == []
+    assert len(load_manifest(hub_dir)["shards"][written[0]]["records"]) == 2
+    assert _published(hub_dir) == {f"q{i}": f"a{i}" for i in range(1, 6)}
+
+
+def test_unchanged_input_writes_nothing(paths):
+    input_file, hub_dir = paths
+    _write(input_file, [("q1", "a1"), ("q2", "a2")])
+    publish_delta(input_file, hub_dir)
+    assert publish_delta(input_file, hub_dir) == ([], [])
+
+
+def test_changed_answer_rewrites_its_old_shard(paths):
+    input_file, hub_dir = paths
+    _write(input_file, [("q1", "a1"), ("q2", "a2"), ("q3", "a3")])
+    (first,), _ = publish_delta(input_file, hub_dir)
+
+    _write(input_file, [("q1", "a1"), ("q2", "a2 revised"), ("q3", "a3")])
+    written, removed = publish_delta(input_file, hub_dir)
+    assert removed == [first]
+    assert not os.path.exists(os.path.join(hub_dir, first))
+    # One shard with the new answer, one with the old shard's other pairs
+    assert len(written) == 2
+    assert _published(hub_dir) == {"q1": "a1", "q2": "a2 revised", "q3": "a3"}
+
+
+def test_prune_removes_pairs_no_longer_in_input(paths):
+    input_file, hub_dir = paths
+    _write(input_file, [("q1", "a1"), ("q2", "a2"), ("q3", "a3")])
+    (first,), _ = publish_delta(input_file, hub_dir)
+
+    _write(input_file, [("q1", "a1"), ("q3", "a3")])
+    assert publish_delta(input_file, hub_dir) == ([], [])
+    assert len(_published(hub_dir)) == 3
+
+    written, removed = publish_delta(input_file, hub_dir, prune=True)
+    assert removed == [first] and len(written) == 1
+    assert _published(hub_dir) == {"q1": "a1", "q3": "a3"}
+
+
+def test_trailing_partial_line_is_read_again(paths):
+    input_file, hub_dir = paths
+    complete = _line("q1", "a1") + _line("q2", "a2")
+    partial = _line("q3", "a3")
+    with open(input_file, 'w', encoding='utf-8') as f:
+        f.write(complete + partial[:10])
+    publish_delta(input_file, hub_dir)
+    assert _published(hub_dir) == {"q1": "a1", "q2": "a2"}
+    assert load_manifest(hub_dir)["input"]["size"] == len(complete.encode('utf-8'))
+
+    with open(input_file, 'a', encoding='utf-8') as f:
+        f.write(partial[10:])
+    publish_delta(input_file, hub_dir)
+    assert _published(hub_dir) == {"q1": "a1", "q2": "a2", "q3": "a3"}
+
+
+def test_complete_last_line_without_newline_is_not_published_twice(paths):
+    input_file, hub_dir = paths
+    with open(input_file, 'w', encoding='utf-8') as f:
+        f.write(_line("q1", "a1") + _line("q2", "a2").rstrip('\n'))
+    publish_delta(input_file, hub_dir)
+    with open(input_file, 'a', encoding='utf-8') as f:
+        f.write('\n' + _line("q3", "a3"))
+    publish_delta(input_file, hub_dir)
+    assert _published(hub_dir) == {"q1": "a1", "q2": "a2", "q3": "a3"}
+
+
+class FakeHub:
+    """Stands in for huggingface_hub.HfApi, failing the first `failures` commits"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.commits = []
+
+    def __call__(self):
+        return self
+
+    def create_repo(self, *args, **kwargs):
+        pass
+
+    def create_commit(self, operations, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection reset")
+        self.commits.append(operations)
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    huggingface_hub = pytest.importorskip("huggingface_hub")
+    fake = FakeHub()
+    monkeypatch.setattr(huggingface_hub, "HfApi", fake)
+    return fake
+
+
+def _pushed_paths(operations):
+    return sorted(op.path_in_repo for op in operations if type(op).__name__ == "CommitOperationAdd")
+
+
+def test_failed_push_is_retried_by_next_push(paths, hub):
+    input_file, hub_dir = paths
+    _write(input_file, [("q1", "a1"), ("q2", "a2")])
+    (first,), _ = publish_delta(input_file, hub_dir)
+
+    hub.failures = 1
+    with pytest.raises(OSError):
+        push_delta(hub_dir, "user/repo")
+    assert load_manifest(hub_dir)["pending"]["added"] == [first]
+
+    # The next run finds nothing new, but the shard is still pushed
+    assert publish_delta(input_file, hub_dir) == ([], [])
+    assert push_delta(hub_dir, "user/repo") == ([first], [])
+    assert _pushed_paths(hub.commits[0]) == [f"data/{first}", upload_now.MANIFEST_NAME]
+    assert load_manifest(hub_dir)["pending"] == {"added": [], "removed": []}
+    assert push_delta(hub_dir, "user/repo") == ([], [])
+    assert len(hub.commits) == 1
+
+
+def test_push_after_runs_without_push_sends_the_net_change(paths, hub):
+    input_file, hub_dir = paths
+    _write(input_file, [("q1", "a1"), ("q2", "a2")])
+    (first,), _ = publish_delta(input_file, hub_dir)
+    push_delta(hub_dir, "user/repo")
+
+    # Two unpushed runs: the second replaces a shard the first one wrote
+    _write(input_file, [("q3", "a3")], mode='a')
+    (second,), _ = publish_delta(input_file, hub_dir)
+    _write(input_file, [("q1", "a1"), ("q2", "a2"), ("q3", "a3 revised")])
+    written, removed = publish_delta(input_file, hub_dir)
+    assert removed == [second]
+
+    added, deleted = push_delta(hub_dir, "user/repo")
+    # The unpushed shard is never uploaded, and only published shards are deleted on the Hub
+    assert second not in added and deleted == []
+    assert added == written
@@ -1,31 +1,378 @@
-from datasets import Dataset
+#!/usr/bin/env python3
+"""
+Build the question/answer dataset for the Hugging Face Hub.
+Pairs are streamed from the cleaned JSONL (or JSON array) into Dataset.from_generator, which
+writes Arrow files as it goes, then saved as a sharded local directory that can be pushed
+now or later - memory use stays flat however large the dataset is.
+With --delta, a manifest of the published shards and their record hashes is kept in a local
+hub directory, and only new or changed pairs are written (and pushed) as new shards.
+"""
+
+# datasets, pyarrow and huggingface_hub are imported where they are used so that --help starts quickly
+import glob
+import hashlib
 import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from export_parquet import read_records
+from serialization import JSONDecodeError, dump, dumps_bytes, encode_string, load, loads
 
-data = []
+HUB_REPO = "takenolab/nelson_mandela_qa"
+DEFAULT_HUB_DIR = "output/hub/nelson_mandela_qa"
+MANIFEST_NAME = "manifest.json"
 
-with open("nelson_mandela_QA.json", "r") as f:
-    data = json.load(f)
 
-# Clean the data - flatten nested answers
-cleaned_data = []
-for item in data:
+def to_pair(item: Dict) -> Optional[Dict]:
+    """A record's question/answer pair with a nested answer flattened to text; None if unusable"""
     question = item.get('question', '')
     answer = item.get('answer', '')
-    
-    # If answer is a dict, convert it to a string
+
+    # If answer is a dict, convert it to a string. Kept on json.dumps: this text is the published
+    # answer, and its ASCII-escaped layout is what earlier releases and delta manifests hold
     if isinstance(answer, dict):
         answer = json.dumps(answer, indent=2)
-    
+
     # Ensure both are strings
     if isinstance(question, str) and isinstance(answer, str):
-        cleaned_data.append({
+        return {
             'question': question,
             'answer': answer
-        })
+        }
+    return None
+
+
+def iter_pairs(path: str, stamp: Tuple = None) -> Iterator[Dict]:
+    """Question/answer pairs of a .jsonl or .json file. stamp (the file's size and mtime) only
+    keys the datasets cache, so an edited file is rebuilt."""
+    for item in read_records(path):
+        pair = to_pair(item)
+        if pair:
+            yield pair
+
+
+# Files an earlier build left in the output directory: Parquet shards, or a save_to_disk directory
+BUILD_FILES = ["train-*-of-*.parquet", "data-*-of-*.arrow", "dataset_info.json", "state.json"]
+
+
+def clear_build(output_dir: str):
+    """Remove an earlier build from output_dir, so a smaller rebuild leaves no stale shards behind"""
+    for pattern in BUILD_FILES:
+        for path in glob.glob(os.path.join(glob.escape(output_dir), pattern)):
+            os.remove(path)
+
+
+def build_dataset(input_file: str, output_dir: str, max_shard_size: str = "500MB", parquet: bool = False):
+    """Stream input_file into a dataset and save it to output_dir as Arrow shards
+    (save_to_disk) or, with parquet, as train-NNNNN-of-NNNNN.parquet files"""
+    from datasets import Dataset, Features, Value
+
+    clear_build(output_dir)
+    stat = os.stat(input_file)
+    dataset = Dataset.from_generator(
+        iter_pairs,
+        features=Features({'question': Value('string'), 'answer': Value('string')}),
+        gen_kwargs={"path": input_file, "stamp": (stat.st_size, stat.st_mtime)}
+    )
+    print(f"Cleaned data: {len(dataset)} items")
+
+    if parquet:
+        from datasets.utils.py_utils import convert_file_size_to_int
+        os.makedirs(output_dir, exist_ok=True)
+        num_shards = max(1, -(-dataset.data.nbytes // convert_file_size_to_int(max_shard_size)))
+        for index in range(num_shards):
+            path = os.path.join(output_dir, f"train-{index:05d}-of-{num_shards:05d}.parquet")
+            dataset.shard(num_shards, index, contiguous=True).to_parquet(path)
+        print(f"Saved {num_shards} Parquet shard(s) to {output_dir}")
+    else:
+        dataset.save_to_disk(output_dir, max_shard_size=max_shard_size)
+        print(f"Saved dataset to {output_dir}")
+    return dataset
+
+
+def record_key(question: str) -> str:
+    """Identity of a pair: the cleaned pairs carry no question_id, so the question text is the key"""
+    return hashlib.blake2b(question.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def content_hash(line: bytes) -> str:
+    """Hash of a pair's JSONL line; clean_data.py writes pairs in exactly this form, so its
+    unchanged lines are recognized without being parsed"""
+    return hashlib.blake2b(line, digest_size=8).hexdigest()
+
+
+def pair_line(pair: Dict) -> bytes:
+    # Laid out as clean_data.py writes a pair, so published hashes stay valid
+    return ('{"question": ' + encode_string(pair['question']) + ', "answer": '
+            + encode_string(pair['answer']) + '}').encode('utf-8')
+
+
+def load_manifest(hub_dir: str) -> Dict:
+    """Published shards with, per shard and in row order, the key -> content hash of each record,
+    the size and digest of the input at the last publish, and the shards added and removed
+    locally that have not been pushed yet"""
+    path = os.path.join(hub_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"version": 1, "next_shard": 0, "shards": {}, "input": {}, "pending": {"added": [], "removed": []}}
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = load(f)
+    manifest.setdefault("pending", {"added": [], "removed": []})
+    return manifest
+
+
+def save_manifest(hub_dir: str, manifest: Dict):
+    path = os.path.join(hub_dir, MANIFEST_NAME)
+    # Written last and atomically, so an interrupted publish leaves the previous manifest intact
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        dump(manifest, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _unchanged_prefix(path: str, last_input: Dict):
+    """How many bytes at the start of a JSONL input are exactly what the last publish read, and
+    the input digest so far; an input that was only appended to is read from where it stopped"""
+    digest = hashlib.blake2b(digest_size=16)
+    size = last_input.get("size", 0)
+    if not size or os.path.getsize(path) < size:
+        return 0, digest
+    with open(path, 'rb') as f:
+        remaining = size
+        while remaining:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    if digest.hexdigest() == last_input.get("digest"):
+        return size, digest
+    return 0, hashlib.blake2b(digest_size=16)
+
+
+def publish_delta(input_file: str, hub_dir: str, shard_records: int = 100000,
+                  prune: bool = False) -> Tuple[List[str], List[str]]:
+    """Publish only what changed since the last run into hub_dir: new and changed pairs go into
+    new shards, and shards still holding an old version of a changed pair (or, with prune, a pair
+    that is no longer in the input) are rewritten without it. Returns the shard files written
+    and the shard files removed."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    started = time.perf_counter()
+    os.makedirs(hub_dir, exist_ok=True)
+    manifest = load_manifest(hub_dir)
+    published = {key: (shard, digest) for shard, info in manifest["shards"].items()
+                 for key, digest in info["records"].items()}
+    published_keys = {digest: key for key, (_, digest) in published.items()}
+    schema = pa.schema([("question", pa.string()), ("answer", pa.string())])
+    written, removed = [], []
+
+    def new_shard(table, records: Dict[str, str]):
+        name = f"train-{manifest['next_shard']:05d}.parquet"
+        manifest["next_shard"] += 1
+        pq.write_table(table, os.path.join(hub_dir, name), compression="zstd")
+        manifest["shards"][name] = {"records": records, "created": time.time()}
+        manifest["pending"]["added"].append(name)
+        written.append(name)
+
+    # JSONL inputs are read as raw lines: only lines that are not published verbatim are parsed,
+    # and an input that only grew is read from where the last publish stopped (pruning needs
+    # every key, so it reads everything)
+    jsonl = input_file.lower().endswith(".jsonl")
+    last_input = {} if prune else manifest.get("input", {})
+    offset, input_digest = _unchanged_prefix(input_file, last_input) if jsonl else (0, None)
+    consumed = offset
+
+    def changed_pairs() -> Iterator[Tuple[str, Dict]]:
+        """(content hash, pair) for every pair that was not published in this exact form"""
+        if not jsonl:
+            for pair in iter_pairs(input_file):
+                yield content_hash(pair_line(pair)), pair
+            return
+        nonlocal consumed
+        with open(input_file, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                # A last line still being written is read again next time
+                if line.endswith(b"\n"):
+                    input_digest.update(line)
+                    consumed += len(line)
+                digest = content_hash(line.rstrip(b"\r\n"))
+                if digest in published_keys:
+                    yield digest, None
+                    continue
+                try:
+                    item = loads(line)
+                except JSONDecodeError:
+                    continue
+                pair = to_pair(item) if isinstance(item, dict) else None
+                if pair:
+                    yield content_hash(pair_line(pair)), pair
+
+    # Only the changed pairs are held in memory
+    rows, records, seen = [], {}, set()
+    stale: Dict[str, Set[str]] = {}
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0}
+    for digest, pair in changed_pairs():
+        key = published_keys.get(digest) or record_key(pair['question'])
+        if key in seen or (offset and key in published):
+            # Repeated question: the first answer wins, as in a full read of the input
+            continue
+        seen.add(key)
+        shard, published_digest = published.get(key, (None, None))
+        if digest == published_digest:
+            counts["unchanged"] += 1
+            continue
+        if shard:
+            stale.setdefault(shard, set()).add(key)
+            counts["changed"] += 1
+        else:
+            counts["new"] += 1
+        rows.append(pair)
+        records[key] = digest
+        if len(rows) == shard_records:
+            new_shard(pa.Table.from_pylist(rows, schema=schema), records)
+            rows, records = [], {}
+    if rows:
+        new_shard(pa.Table.from_pylist(rows, schema=schema), records)
+    if offset:
+        # Everything before the offset is published as it was
+        counts["unchanged"] = len(published)
+
+    if prune:
+        for key, (shard, _) in published.items():
+            if key not in seen:
+                stale.setdefault(shard, set()).add(key)
+                counts["removed"] += 1
+
+    # Rewrite only the shards that hold superseded pairs; the manifest lists their keys in row order
+    for shard, keys in stale.items():
+        old_records = manifest["shards"].pop(shard)["records"]
+        keep = [key not in keys for key in old_records]
+        removed.append(shard)
+        if shard in manifest["pending"]["added"]:
+            # Never pushed, so there is nothing to delete on the Hub
+            manifest["pending"]["added"].remove(shard)
+        else:
+            manifest["pending"]["removed"].append(shard)
+        if any(keep):
+            table = pq.read_table(os.path.join(hub_dir, shard)).filter(pa.array(keep))
+            new_shard(table, {key: digest for key, digest in old_records.items() if key not in keys})
+
+    # Other inputs give no guarantee about the next JSONL's prefix
+    input_state = {"size": consumed, "digest": input_digest.hexdigest()} if jsonl else {}
+    if written or removed or input_state != manifest.get("input"):
+        manifest["input"] = input_state
+        save_manifest(hub_dir, manifest)
+    for shard in removed:
+        os.remove(os.path.join(hub_dir, shard))
+
+    total = sum(len(info["records"]) for info in manifest["shards"].values())
+    print(f"Delta: {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged"
+          + (f", {counts['removed']} removed" if prune else "")
+          + (f" (read from byte {offset}, the input only grew)" if offset else ""))
+    print(f"Wrote {len(written)} shard(s), replaced {len(removed)}; {total} pairs in {len(manifest['shards'])} "
+          f"shard(s) in {hub_dir} ({time.perf_counter() - started:.1f}s)")
+    return written, removed
+
+
+def push_delta(hub_dir: str, repo: str) -> Tuple[List[str], List[str]]:
+    """Upload every shard delta publishes added since the last successful push, delete the ones
+    they replaced and update the manifest on the Hub, in one commit. The shards stay pending in
+    the local manifest until the commit succeeds, so a failed push is retried by the next one.
+    Returns the shard files added and removed (none if nothing was pending)."""
+    from huggingface_hub import CommitOperationAdd, CommitOperationDelete, HfApi
+
+    manifest = load_manifest(hub_dir)
+    added, removed = manifest["pending"]["added"], manifest["pending"]["removed"]
+    if not added and not removed:
+        return [], []
+    pushed = {**manifest, "pending": {"added": [], "removed": []}}
+
+    operations = [CommitOperationAdd(path_in_repo=f"data/{name}", path_or_fileobj=os.path.join(hub_dir, name))
+                  for name in added]
+    operations += [CommitOperationDelete(path_in_repo=f"data/{name}") for name in removed]
+    operations.append(CommitOperationAdd(path_in_repo=MANIFEST_NAME, path_or_fileobj=dumps_bytes(pushed)))
+    api = HfApi()
+    api.create_repo(repo, repo_type="dataset", exist_ok=True)
+    api.create_commit(repo_id=repo, repo_type="dataset", operations=operations,
+                      commit_message=f"Add {len(added)} shard(s), remove {len(removed)}")
+    save_manifest(hub_dir, pushed)
+    return added, removed
+
+
+def hub_data_files(repo: str) -> List[str]:
+    """Files of the Hub dataset repository other than its card and git attributes (none if it
+    does not exist yet)"""
+    from huggingface_hub import HfApi
+    from huggingface_hub.utils import RepositoryNotFoundError
+
+    try:
+        files = HfApi().list_repo_files(repo, repo_type="dataset")
+    except RepositoryNotFoundError:
+        return []
+    return [name for name in files if name not in (".gitattributes", "README.md")]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the Q&A dataset locally and optionally push it to the Hub")
+    parser.add_argument("--input", "-i", default="nelson_mandela_QA.jsonl",
+                       help="Cleaned pairs from clean_data.py (.jsonl or .json)")
+    parser.add_argument("--output-dir", "-o", default="output/hf_dataset", help="Local dataset directory")
+    parser.add_argument("--max-shard-size", default="500MB", help="Largest shard, e.g. 500MB or 1GB")
+    parser.add_argument("--parquet", action="store_true",
+                       help="Write Parquet shards instead of a save_to_disk directory")
+    parser.add_argument("--push", action="store_true", help="Push the dataset to the Hub after building it")
+    parser.add_argument("--push-only", action="store_true",
+                       help="Push an earlier save_to_disk build from --output-dir without rebuilding")
+    parser.add_argument("--repo", default=HUB_REPO, help="Hub dataset repository")
+    parser.add_argument("--delta", action="store_true",
+                       help="Publish only new or changed pairs into --hub-dir as new Parquet shards")
+    parser.add_argument("--hub-dir", default=DEFAULT_HUB_DIR,
+                       help="Local copy of the published shards and their manifest (used with --delta)")
+    parser.add_argument("--shard-records", type=int, default=100000, help="Pairs per delta shard")
+    parser.add_argument("--prune", action="store_true",
+                       help="With --delta, also remove published pairs that are no longer in the input")
+
+    args = parser.parse_args()
+
+    if args.delta:
+        if not os.path.exists(args.input):
+            print(f"Error: Input file {args.input} not found!")
+            return
+        if args.push and not os.path.exists(os.path.join(args.hub_dir, MANIFEST_NAME)):
+            # Without the manifest every pair looks new, and pushing it would duplicate what the repo holds
+            existing = hub_data_files(args.repo)
+            if existing:
+                print(f"Error: {args.repo} already has {len(existing)} data file(s) but {args.hub_dir} has no "
+                      f"{MANIFEST_NAME}; restore the hub directory from the repo, or push --delta to a new repo")
+                return
+        publish_delta(args.input, args.hub_dir, args.shard_records, args.prune)
+        if args.push:
+            # Also pushes shards left pending by earlier runs without --push or with a failed push
+            added, removed = push_delta(args.hub_dir, args.repo)
+            if added or removed:
+                print(f"Pushed {len(added)} shard(s) and removed {len(removed)} on {args.repo}")
+            else:
+                print(f"Nothing to push; {args.repo} is up to date")
+        return
+
+    if args.push_only:
+        from datasets import load_from_disk
+        dataset = load_from_disk(args.output_dir)
+        print(f"Loaded {len(dataset)} items from {args.output_dir}")
+    else:
+        if not os.path.exists(args.input):
+            print(f"Error: Input file {args.input} not found!")
+            return
+        dataset = build_dataset(args.input, args.output_dir, args.max_shard_size, args.parquet)
 
-print(f"Original data: {len(data)} items")
-print(f"Cleaned data: {len(cleaned_data)} items")
+    if args.push or args.push_only:
+        dataset.push_to_hub(args.repo, max_shard_size=args.max_shard_size)
+        print(f"Pushed to {args.repo}")
 
-dataset = Dataset.from_list(cleaned_data)
 
-dataset.push_to_hub("takenolab/nelson_mandela_qa")
\ No newline at end of file
+if __name__ == "__main__":
+    main()